@@ -1,22 +1,207 @@
+from collections import deque
+
 import numpy as np
 
+
+class RunningStats:
+    """Welford running mean / variance, vectorized over any array shape. O(1) per update."""
+
+    def __init__(self, shape=()):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    def update(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean = self.mean + delta / self.count
+        self.m2 = self.m2 + delta * (x - self.mean)
+
+    def get_state(self):
+        return {"count": np.asarray(self.count), "mean": np.asarray(self.mean), "m2": np.asarray(self.m2)}
+
+    def set_state(self, state):
+        self.count = int(state["count"])
+        self.mean = np.array(state["mean"], dtype=float)
+        self.m2 = np.array(state["m2"], dtype=float)
+
+    @property
+    def center(self):
+        return self.mean
+
+    @property
+    def std(self):
+        if self.count < 2:
+            return np.zeros_like(self.mean)
+        return np.sqrt(self.m2 / (self.count - 1))
+
+
+class EWMAStats:
+    """Exponentially weighted mean / variance with a half-life in frames. O(1) per update."""
+
+    def __init__(self, half_life, shape=()):
+        self.alpha = 1.0 - 0.5 ** (1.0 / half_life)
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.var = np.zeros(shape)
+
+    def update(self, x):
+        self.count += 1
+        # Behaves like a cumulative average until 1/count drops below alpha (no zero-variance start)
+        alpha = max(self.alpha, 1.0 / self.count)
+        delta = x - self.mean
+        self.mean = self.mean + alpha * delta
+        self.var = (1.0 - alpha) * (self.var + alpha * delta * delta)
+
+    def get_state(self):
+        return {"count": np.asarray(self.count), "mean": np.asarray(self.mean), "var": np.asarray(self.var)}
+
+    def set_state(self, state):
+        self.count = int(state["count"])
+        self.mean = np.array(state["mean"], dtype=float)
+        self.var = np.array(state["var"], dtype=float)
+
+    @property
+    def center(self):
+        return self.mean
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+
+class WindowStats:
+    """Median / MAD over the last `window` frames. Bounded memory, O(window) per update."""
+
+    def __init__(self, window, shape=()):
+        self.count = 0
+        self.values = deque(maxlen=window)
+        self.shape = shape
+
+    def update(self, x):
+        self.count += 1
+        self.values.append(np.asarray(x, dtype=float))
+
+    def get_state(self):
+        values = np.stack(self.values) if self.values else np.zeros((0,) + tuple(self.shape))
+        return {"count": np.asarray(self.count), "values": values}
+
+    def set_state(self, state):
+        self.count = int(state["count"])
+        self.values.clear()
+        self.values.extend(np.array(v, dtype=float) for v in state["values"])
+
+    @property
+    def center(self):
+        if not self.values:
+            return np.zeros(self.shape)
+        return np.median(np.stack(self.values), axis=0)
+
+    @property
+    def std(self):
+        if not self.values:
+            return np.zeros(self.shape)
+        data = np.stack(self.values)
+        # 1.4826 * MAD estimates the standard deviation for normal data
+        return 1.4826 * np.median(np.abs(data - np.median(data, axis=0)), axis=0)
+
+
 class AnomalyDetector:
-    def __init__(self):
-        self.motion_history = []
-        self.density_history = []
+    """
+    Streaming anomaly detector with constant memory per update.
+    mode: "welford" (cumulative baseline), "ewma" (half_life frames) or "robust" (windowed median/MAD)
+    """
+
+    MODES = ("welford", "ewma", "robust")
+
+    def __init__(self, mode="welford", half_life=300, window=300, warmup=10,
+                 cell_z_scale=6.0, min_density_std=0.01, min_motion_std=0.1):
+        if mode not in self.MODES:
+            raise ValueError(f"[ERROR] Unknown anomaly mode: {mode}")
+        self.mode = mode
+        self.half_life = half_life
+        self.window = window
+        self.warmup = warmup
+        self.cell_z_scale = cell_z_scale
+        # Std floors so static cells don't turn sensor noise into huge z-scores
+        self.min_density_std = min_density_std
+        self.min_motion_std = min_motion_std
+
+        self.motion_stats = self._new_stats()
+        self.density_stats = self._new_stats()
+        # Per-cell baselines are created on the first map (shape = density grid)
+        self.cell_motion_stats = None
+        self.cell_density_stats = None
+
+    def _new_stats(self, shape=()):
+        if self.mode == "ewma":
+            return EWMAStats(self.half_life, shape)
+        if self.mode == "robust":
+            return WindowStats(self.window, shape)
+        return RunningStats(shape)
+
+    def get_state(self):
+        """
+        Baselines as a flat {name: array} dict (np.savez-ready), e.g. for checkpoints.
+        Restoring it into a detector of the same mode continues without a new warm-up.
+        """
+        state = {"mode": np.asarray(self.mode)}
+        groups = {"motion": self.motion_stats, "density": self.density_stats,
+                  "cell_motion": self.cell_motion_stats, "cell_density": self.cell_density_stats}
+        for group, stats in groups.items():
+            if stats is not None:
+                state.update({f"{group}.{key}": value for key, value in stats.get_state().items()})
+        return state
+
+    def set_state(self, state):
+        mode = str(state["mode"])
+        if mode != self.mode:
+            raise ValueError(f"[ERROR] Anomaly state is for mode '{mode}', detector uses '{self.mode}'")
+        for group in ("motion", "density", "cell_motion", "cell_density"):
+            fields = {key.split(".", 1)[1]: value for key, value in state.items() if key.startswith(group + ".")}
+            if not fields:
+                stats = None
+            else:
+                shape = np.shape(fields["values"])[1:] if "values" in fields else np.shape(fields["mean"])
+                stats = self._new_stats(shape)
+                stats.set_state(fields)
+            setattr(self, f"{group}_stats", stats)
 
     def compute_score(self, motion, density):
-        self.motion_history.append(motion)
-        self.density_history.append(density)
+        self.motion_stats.update(motion)
+        self.density_stats.update(density)
 
-        if len(self.motion_history) < 10:
+        if self.motion_stats.count < self.warmup:
             return 0.0
 
-        motion_mean = np.mean(self.motion_history)
-        density_mean = np.mean(self.density_history)
+        motion_mean = self.motion_stats.center
+        density_mean = self.density_stats.center
 
         motion_dev = abs(motion - motion_mean)
         density_dev = abs(density - density_mean)
 
         score = (motion_dev + density_dev) / 2.0
-        return min(score, 1.0)
+        return min(float(score), 1.0)
+
+    def compute_cell_scores(self, density_map, motion_map):
+        """
+        Per-cell anomaly scores (0-1) against each cell's own baseline.
+        Score = mean |z| of density and motion, divided by cell_z_scale.
+        """
+        if self.cell_density_stats is None or self.cell_density_stats.center.shape != density_map.shape:
+            self.cell_density_stats = self._new_stats(density_map.shape)
+            self.cell_motion_stats = self._new_stats(motion_map.shape)
+
+        self.cell_density_stats.update(density_map)
+        self.cell_motion_stats.update(motion_map)
+
+        if self.cell_density_stats.count < self.warmup:
+            return np.zeros(density_map.shape)
+
+        density_std = np.maximum(self.cell_density_stats.std, self.min_density_std)
+        motion_std = np.maximum(self.cell_motion_stats.std, self.min_motion_std)
+        density_z = np.abs(density_map - self.cell_density_stats.center) / density_std
+        motion_z = np.abs(motion_map - self.cell_motion_stats.center) / motion_std
+
+        scores = (density_z + motion_z) / (2.0 * self.cell_z_scale)
+        return np.minimum(scores, 1.0)
@@ -0,0 +1,222 @@
+"""
+Batch analysis of video archives.
+
+    python batch.py data/archive/2024-05-01/            # every video in a directory
+    python batch.py "data/archive/*/cam3_*.mp4" -w 8     # or a glob
+
+Each clip runs headless (analytics only) in its own worker process and writes
+a per-frame metrics CSV, its metric store and its console log to the output
+directory. A JSON manifest there records every clip as in_progress / done /
+failed; it is rewritten atomically after each change, so an interrupted run
+simply resumes - finished clips are skipped, in-progress ones are redone,
+failed ones are retried with --retry-failed.
+"""
+
+import argparse
+import contextlib
+import csv
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import config
+
+MANIFEST_NAME = "manifest.json"
+CSV_FIELDS = ("frame", "position", "time", "density", "motion", "anomaly_score", "anomaly", "risk", "risk_score")
+
+
+def find_videos(inputs, extensions=None):
+    """Expand directories and glob patterns into a sorted, de-duplicated list of video files."""
+    extensions = tuple(e.lower() for e in (extensions or getattr(config, 'VIDEO_EXTENSIONS', (".mp4",))))
+    found = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                found.update(os.path.join(root, f) for f in files if f.lower().endswith(extensions))
+        else:
+            found.update(p for p in glob.glob(item, recursive=True)
+                         if os.path.isfile(p) and p.lower().endswith(extensions))
+    return sorted(os.path.abspath(p) for p in found)
+
+
+def clip_id(path):
+    """Output file stem: clip name plus a short path hash, so equal names in different folders don't collide."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{stem}-{hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _write_atomic(path, write):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", newline="") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+class Manifest:
+    """Clip states of one output directory, persisted as JSON after every change."""
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.clips = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.clips = json.load(f).get("clips", {})
+
+    def status(self, clip):
+        entry = self.clips.get(clip, {})
+        # A finished clip whose CSV was deleted is redone
+        if entry.get("status") == "done" and not os.path.exists(entry.get("csv", "")):
+            return None
+        return entry.get("status")
+
+    def update(self, clip, status, **fields):
+        entry = self.clips.setdefault(clip, {})
+        entry.update(fields, status=status, updated=time.time())
+        self.save()
+
+    def save(self):
+        _write_atomic(self.path, lambda f: json.dump({"clips": self.clips}, f, indent=2))
+
+    def counts(self):
+        counts = {}
+        for entry in self.clips.values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
+
+
+def process_clip(video_path, output_dir):
+    """
+    Worker: headless analysis of one clip. Writes <clip_id>.csv (per-frame metrics)
+    and <clip_id>.log (console output) and returns the run summary.
+    With CHECKPOINT_PATH set, an interrupted clip resumes from its own <clip_id>.ckpt.npz
+    (workers never share the configured file).
+    """
+    import cv2
+    # One OpenCV thread per worker - the pool itself provides the parallelism
+    cv2.setNumThreads(1)
+    from main import EnhancedCrowdSafetySystem
+
+    name = clip_id(video_path)
+    csv_path = os.path.join(output_dir, f"{name}.csv")
+    checkpoint = os.path.join(output_dir, f"{name}.ckpt.npz") if getattr(config, 'CHECKPOINT_PATH', None) else False
+    records = []
+    with open(os.path.join(output_dir, f"{name}.log"), "w") as log, contextlib.redirect_stdout(log):
+        summary = EnhancedCrowdSafetySystem().process_video(
+            video_path, headless=True, live=False, realtime=False, on_frame=records.append,
+            metric_store=os.path.join(output_dir, f"{name}.metrics"), checkpoint=checkpoint)
+    if summary is None:
+        raise IOError(f"[ERROR] Cannot open video: {video_path}")
+    if checkpoint and os.path.exists(checkpoint):
+        # The manifest marks the clip done - its checkpoint is no longer needed
+        os.remove(checkpoint)
+
+    def write(f):
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+    _write_atomic(csv_path, write)
+    return dict(summary, csv=csv_path)
+
+
+def _run_clip(args):
+    """Pool entry point: never raises, so one bad clip cannot stop the batch."""
+    video_path, output_dir = args
+    try:
+        return video_path, process_clip(video_path, output_dir), None
+    except Exception as e:
+        return video_path, None, f"{e}\n{traceback.format_exc(limit=3)}"
+
+
+def run_batch(inputs, output_dir=None, workers=None, retry_failed=False):
+    """
+    Analyze every video matched by `inputs` on a process pool, resuming from the manifest.
+    Returns the aggregate report.
+    """
+    output_dir = output_dir or getattr(config, 'BATCH_OUTPUT_DIR', 'data/outputs/batch')
+    workers = workers or getattr(config, 'BATCH_WORKERS', 0) or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+
+    videos = find_videos(inputs)
+    manifest = Manifest(output_dir)
+    skip = {"done", "failed"} if not retry_failed else {"done"}
+    pending = [v for v in videos if manifest.status(v) not in skip]
+
+    print("=" * 50)
+    print("CROWD SAFETY AI - BATCH ANALYSIS")
+    print("=" * 50)
+    print(f"Clips found: {len(videos)} | to process: {len(pending)} | "
+          f"already done: {sum(manifest.status(v) == 'done' for v in videos)}")
+    print(f"Workers: {workers} | Output: {output_dir}")
+    print("-" * 50)
+
+    start_time = time.time()
+    frames = 0
+    done = failed = 0
+    todo = list(reversed(pending))
+    in_flight = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while todo or in_flight:
+                # Keep exactly `workers` clips running; a clip is in_progress only once submitted
+                while todo and len(in_flight) < workers:
+                    video = todo.pop()
+                    manifest.update(video, "in_progress", started=time.time())
+                    in_flight[pool.submit(_run_clip, (video, output_dir))] = video
+
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    del in_flight[future]
+                    video, summary, error = future.result()
+                    if error is None:
+                        done += 1
+                        frames += summary["frames"]
+                        manifest.update(video, "done", error=None, **summary)
+                        print(f"✅ [{done + failed}/{len(pending)}] {os.path.basename(video)}: "
+                              f"{summary['frames']} frames at {summary['fps']:.1f} FPS | "
+                              f"high risk {summary['high_risk_frames']} | anomalies {summary['anomalies']}")
+                    else:
+                        failed += 1
+                        manifest.update(video, "failed", error=error)
+                        print(f"❌ [{done + failed}/{len(pending)}] {os.path.basename(video)}: {error.splitlines()[0]}")
+    except KeyboardInterrupt:
+        print("\nBatch interrupted - rerun the same command to resume")
+
+    elapsed = time.time() - start_time
+    report = {
+        "clips": done,
+        "failed": failed,
+        "frames": frames,
+        "seconds": elapsed,
+        "fps": frames / max(elapsed, 1e-6),
+        "clips_per_hour": done * 3600 / max(elapsed, 1e-6),
+        "manifest": manifest.counts(),
+    }
+
+    print("\n" + "=" * 50)
+    print("BATCH COMPLETE")
+    print(f"Clips: {done} done | {failed} failed in {elapsed:.1f}s")
+    print(f"Throughput: {report['fps']:.1f} FPS | {report['clips_per_hour']:.1f} clips/hour")
+    print(f"Manifest: {report['manifest']}")
+    print("=" * 50)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crowd Safety AI batch analysis")
+    parser.add_argument("inputs", nargs="+", help="video directories and/or glob patterns")
+    parser.add_argument("-o", "--output-dir", help="CSV / log / manifest directory (default BATCH_OUTPUT_DIR)")
+    parser.add_argument("-w", "--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--retry-failed", action="store_true", help="also rerun clips that failed before")
+    args = parser.parse_args(argv)
+
+    report = run_batch(args.inputs, args.output_dir, args.workers, args.retry_failed)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+Per-stage benchmark suite driven by deterministic synthetic crowd videos.
+
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json --tolerance 0.15
+
+Each resolution gets its own generated clip (moving blobs with controllable
+count, speed and size on a textured background). Every pipeline stage is timed
+per call - the legacy stage functions as well as the production path
+(FrameAnalyzer.analyze at the analysis resolution, MotionEngine) - and reported as throughput plus p50/p95/p99 latency in JSON. With
+--baseline, stages whose p50 got slower than the tolerance fail the run.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from video_loader import VideoLoader
+from preprocessing import Preprocessor
+from frame_analysis import FrameAnalyzer
+from anomaly_detection import AnomalyDetector
+from visualizer import DashboardVisualizer
+from dashboard import CrowdSafetyDashboard
+import density_estimation
+import motion_analysis
+import risk_classifier
+
+import config
+
+DEFAULT_RESOLUTIONS = ((640, 480), (1280, 720), (1920, 1080))
+
+
+def generate_synthetic_video(path, width, height, frames=90, blobs=60, speed=3.0, blob_size=0.02, fps=25, seed=0):
+    """
+    Write a deterministic synthetic crowd clip.
+    blobs: number of people-like blobs (density), speed: px/frame at 640px width,
+    blob_size: blob radius as a fraction of the frame width.
+    """
+    rng = np.random.default_rng(seed)
+    scale = width / 640.0
+
+    # Static textured background so optical flow has something to lock onto
+    background = rng.integers(40, 90, size=(height // 8 + 1, width // 8 + 1, 3), dtype=np.uint8)
+    background = cv2.resize(background, (width, height), interpolation=cv2.INTER_LINEAR)
+
+    pos = rng.uniform(0, 1, size=(blobs, 2)) * (width, height)
+    angle = rng.uniform(0, 2 * np.pi, size=blobs)
+    vel = np.stack([np.cos(angle), np.sin(angle)], axis=1) * speed * scale
+    radius = np.maximum(2, (rng.uniform(0.7, 1.3, size=blobs) * blob_size * width)).astype(int)
+    colors = rng.integers(120, 255, size=(blobs, 3))
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise IOError(f"[ERROR] Cannot write synthetic video: {path}")
+
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    for _ in range(frames):
+        np.copyto(frame, background)
+        pos = (pos + vel) % (width, height)
+        for (x, y), r, c in zip(pos, radius, colors):
+            cv2.ellipse(frame, (int(x), int(y)), (int(r), int(r * 1.6)), 0, 0, 360, tuple(int(v) for v in c), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+class StageTimer:
+    """Collects per-call latencies (ns) for named stages."""
+
+    def __init__(self, warmup=3):
+        self.warmup = warmup
+        self.samples = {}
+
+    def time(self, name, fn, *args):
+        start = time.perf_counter_ns()
+        result = fn(*args)
+        self.samples.setdefault(name, []).append(time.perf_counter_ns() - start)
+        return result
+
+    def summary(self):
+        out = {}
+        for name, samples in self.samples.items():
+            data = np.asarray(samples[self.warmup:] or samples, dtype=np.float64) / 1e6
+            out[name] = {
+                "n": int(len(data)),
+                "mean_ms": float(data.mean()),
+                "p50_ms": float(np.percentile(data, 50)),
+                "p95_ms": float(np.percentile(data, 95)),
+                "p99_ms": float(np.percentile(data, 99)),
+                "throughput_fps": float(1000.0 / data.mean()) if data.mean() > 0 else 0.0,
+            }
+        return out
+
+
+def benchmark_resolution(video_path, width, height):
+    """Time every pipeline stage over one synthetic clip."""
+    timer = StageTimer()
+    rows, cols = getattr(config, 'GRID_ROWS', 10), getattr(config, 'GRID_COLS', 10)
+
+    loader = VideoLoader(video_path, resize_width=width, resize_height=height)
+    preprocessor = Preprocessor()
+    detector = AnomalyDetector()
+    visualizer = DashboardVisualizer()
+    dashboard = CrowdSafetyDashboard(max_history=150)
+    analyzer = FrameAnalyzer(rows, cols)
+    # FrameAnalyzer works at the analysis size: below it the stage would time an upscale no deployment runs
+    analysis_size = analyzer.analysis_size
+    time_analyzer = analysis_size is None or (width >= analysis_size[0] and height >= analysis_size[1])
+    last_position = 0
+    tier = getattr(config, 'MOTION_TIER', 'full')
+    engines = {name: motion_analysis.MotionEngine(name, rows, cols) for name in dict.fromkeys(("full", tier))}
+
+    density_history, risk_history = [], []
+    prev_gray = None
+    try:
+        while True:
+            ret, frame = timer.time("VideoLoader.read", loader.read)
+            if not ret:
+                break
+
+            gray = timer.time("Preprocessor.process", preprocessor.process, frame)
+            density_map = timer.time("estimate_density", density_estimation.estimate_density, gray, rows, cols)
+            density = float(np.mean(density_map))
+
+            motion = 0.0
+            if prev_gray is not None:
+                motion = float(timer.time("compute_motion", motion_analysis.compute_motion, prev_gray, gray))
+                for name, engine in engines.items():
+                    timer.time(f"MotionEngine[{name}]", engine.compute, prev_gray, gray)
+            prev_gray = gray
+
+            # What the live pipeline runs per frame: preprocess + density + motion in one call,
+            # with the same frame gap process_video passes
+            frame_gap = loader.position - last_position
+            last_position = loader.position
+            if time_analyzer:
+                timer.time("FrameAnalyzer.analyze", analyzer.analyze, frame, frame_gap)
+
+            timer.time("AnomalyDetector.compute_score", detector.compute_score, motion, density)
+
+            risk = risk_classifier.combined_score(density, motion)
+            density_history.append(density)
+            risk_history.append(risk)
+            dashboard.update_metrics(density, risk, motion / 20.0, False, 0.0)
+
+            vis = timer.time("create_pro_dashboard", visualizer.create_pro_dashboard,
+                             frame, density, motion, risk, 0.0, density_history, risk_history, 92.5)
+            timer.time("render_dashboard", dashboard.render_dashboard, vis)
+    finally:
+        loader.release()
+
+    return timer.summary()
+
+
+def run_benchmarks(resolutions=DEFAULT_RESOLUTIONS, frames=90, blobs=60, speed=3.0, seed=0):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for width, height in resolutions:
+            label = f"{width}x{height}"
+            print(f"⏱️  {label}: generating {frames} synthetic frames...")
+            path = generate_synthetic_video(os.path.join(tmp, f"synthetic_{label}.mp4"), width, height,
+                                            frames=frames, blobs=blobs, speed=speed, seed=seed)
+            results[label] = benchmark_resolution(path, width, height)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "cpu_count": os.cpu_count(),
+            "opencv_threads": cv2.getNumThreads(),
+            "frames": frames,
+            "blobs": blobs,
+            "speed": speed,
+            "seed": seed,
+            "motion_tier": getattr(config, 'MOTION_TIER', 'full'),
+            # FrameAnalyzer.analyze runs at this size (only timed for resolutions at least this large)
+            "analysis_size": [getattr(config, 'ANALYSIS_WIDTH', None), getattr(config, 'ANALYSIS_HEIGHT', None)],
+        },
+        "results": results,
+    }
+
+
+def compare_to_baseline(current, baseline, tolerance=0.15):
+    """Return a list of regressions: stages whose p50 latency grew by more than `tolerance`."""
+    regressions = []
+    for label, stages in current["results"].items():
+        for stage, stats in stages.items():
+            base = baseline.get("results", {}).get(label, {}).get(stage)
+            if not base or base["p50_ms"] <= 0:
+                continue
+            change = stats["p50_ms"] / base["p50_ms"] - 1.0
+            if change > tolerance:
+                regressions.append({
+                    "resolution": label,
+                    "stage": stage,
+                    "baseline_p50_ms": base["p50_ms"],
+                    "current_p50_ms": stats["p50_ms"],
+                    "change": change,
+                })
+    return regressions
+
+
+def print_report(report):
+    for label, stages in report["results"].items():
+        print(f"\n{label}")
+        print(f"  {'stage':32s} {'fps':>9s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+        for stage, s in stages.items():
+            print(f"  {stage:32s} {s['throughput_fps']:9.1f} {s['p50_ms']:9.2f} {s['p95_ms']:9.2f} {s['p99_ms']:9.2f}")
+
+
+def parse_resolutions(text):
+    return tuple(tuple(int(v) for v in item.lower().split("x")) for item in text.split(","))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crowd Safety AI per-stage benchmark")
+    parser.add_argument("--resolutions", type=parse_resolutions, default=DEFAULT_RESOLUTIONS,
+                        help="comma separated WxH list (default 640x480,1280x720,1920x1080)")
+    parser.add_argument("--frames", type=int, default=90)
+    parser.add_argument("--blobs", type=int, default=60, help="crowd density (number of blobs)")
+    parser.add_argument("--speed", type=float, default=3.0, help="blob speed in px/frame at 640px width")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against a saved JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed p50 slowdown (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.resolutions, args.frames, args.blobs, args.speed, args.seed)
+    print_report(report)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        report["regressions"] = regressions
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) vs {args.baseline}:")
+            for r in regressions:
+                print(f"  {r['resolution']} {r['stage']}: {r['baseline_p50_ms']:.2f} -> "
+                      f"{r['current_p50_ms']:.2f} ms ({r['change']:+.0%})")
+            status = 1
+        else:
+            print(f"\n✅ No regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+
+    # Written after the comparison so the saved report includes its regressions
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report saved to {args.output}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
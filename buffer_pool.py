@@ -0,0 +1,105 @@
+"""
+Preallocated frame buffers.
+
+Frame-sized arrays (decoded frames, gray frames, flow fields, summed-area tables)
+are taken from a BufferPool and filled through OpenCV dst= outputs, so after
+warm-up the pipeline allocates no frame-sized arrays at all. Buffers are keyed by name;
+asking for a different shape or dtype under the same name replaces the buffer
+(and counts as an allocation) - shapes that vary per frame, such as the change
+gate's partial flow box, show up in the counter. Rings hand out `count` buffers round-robin for
+data that has to outlive the next call (previous gray frame, frames waiting in
+a prefetch queue).
+
+Components take an optional pool; without one, buffer() / ring_buffer() return
+None and OpenCV allocates a fresh output as before.
+"""
+
+import threading
+
+import numpy as np
+
+
+class BufferPool:
+    """
+    Shape-keyed buffer pool with allocation counters.
+    end_frame() returns the allocations since the previous call - 0 once warmed up.
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        self._buffers = {}
+        self._rings = {}
+        # Allocation only: lookups of existing buffers take no lock
+        self._lock = threading.Lock()
+
+        self.allocations = 0
+        self.last_frame_allocations = 0
+        self._frames = 0
+        self._mark = 0
+
+    def _allocate(self, shape, dtype):
+        with self._lock:
+            self.allocations += 1
+        if self.metrics is not None:
+            self.metrics.inc("pool_allocations")
+        return np.empty(shape, dtype=dtype)
+
+    def get(self, name, shape, dtype=np.uint8):
+        """The buffer registered under `name` (contents are whatever the last user left)."""
+        shape, dtype = tuple(shape), np.dtype(dtype)
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._allocate(shape, dtype)
+            self._buffers[name] = buf
+        return buf
+
+    def ring(self, name, count, shape, dtype=np.uint8):
+        """
+        Next of `count` buffers, round-robin: a buffer handed out stays untouched
+        for the following count - 1 calls.
+        """
+        shape, dtype = tuple(shape), np.dtype(dtype)
+        slots, index = self._rings.get(name, (None, 0))
+        if slots is None or len(slots) != count:
+            slots, index = [None] * count, 0
+        buf = slots[index]
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._allocate(shape, dtype)
+            slots[index] = buf
+        self._rings[name] = (slots, (index + 1) % count)
+        return buf
+
+    def end_frame(self):
+        """Close one frame: returns (and publishes) the allocations it caused."""
+        allocations = self.allocations
+        self.last_frame_allocations = allocations - self._mark
+        self._mark = allocations
+        self._frames += 1
+        if self.metrics is not None:
+            self.metrics.set_gauge("pool_allocations_per_frame", self.last_frame_allocations)
+        return self.last_frame_allocations
+
+    def nbytes(self):
+        buffers = list(self._buffers.values())
+        for slots, _ in list(self._rings.values()):
+            buffers.extend(b for b in slots if b is not None)
+        return sum(b.nbytes for b in buffers)
+
+    def stats(self):
+        return {
+            "buffers": len(self._buffers) + sum(len(s) for s, _ in self._rings.values()),
+            "bytes": self.nbytes(),
+            "allocations": self.allocations,
+            "frames": self._frames,
+            "last_frame_allocations": self.last_frame_allocations,
+        }
+
+
+def buffer(pool, name, shape, dtype=np.uint8):
+    """pool.get(...) or None without a pool (OpenCV then allocates the output)."""
+    return pool.get(name, shape, dtype) if pool is not None else None
+
+
+def ring_buffer(pool, name, count, shape, dtype=np.uint8):
+    """pool.ring(...) or None without a pool."""
+    return pool.ring(name, count, shape, dtype) if pool is not None else None
@@ -0,0 +1,98 @@
+"""
+Change gate for quiet scenes.
+
+A downsampled frame difference, averaged per grid cell, decides which cells
+changed since the previous frame. FrameAnalyzer skips the whole frame when
+nothing changed and runs optical flow only over the changed cells otherwise;
+unchanged cells carry their previous values forward. A cell is recomputed once
+more on the frame after it settles, so the carried value is the settled one (not
+the last moving one), and a forced refresh every `refresh_interval` frames
+recomputes everything so carried values never go stale.
+"""
+
+import cv2
+import numpy as np
+
+from buffer_pool import buffer, ring_buffer
+from density_estimation import _integral, grid_sums
+
+
+class ChangeGate:
+    """
+    Per-cell change detector.
+    threshold: mean absolute gray-level difference per cell that counts as change
+    scale: downsampling factor for the difference image
+    pool: optional BufferPool for the downsampled / difference images
+    """
+
+    def __init__(self, threshold=3.0, scale=0.25, refresh_interval=50, pool=None):
+        self.threshold = threshold
+        self.scale = scale
+        self.refresh_interval = refresh_interval
+        self.pool = pool
+        self.prev_small = None
+        self.prev_changed = None
+        self.frames_since_refresh = 0
+
+        self.frames = 0
+        self.skipped_frames = 0
+        self.cells_total = 0
+        self.cells_changed = 0
+
+    def reset(self):
+        self.prev_small = None
+        self.prev_changed = None
+
+    def update(self, frame, ys, xs, size=None):
+        """
+        frame: BGR or gray frame at any resolution
+        ys / xs: cell edges in pixels of `size` (width, height), default the frame's own size;
+                 the difference image is `scale` times that size
+        Returns a (rows, cols) bool map of cells to recompute.
+        """
+        w, h = size if size is not None else (frame.shape[1], frame.shape[0])
+        # Shrink first, then convert: the gate never touches full-resolution pixels twice
+        size = (max(1, round(w * self.scale)), max(1, round(h * self.scale)))
+        shape = (size[1], size[0])
+        # The previous small frame is compared against, so gray frames alternate between two slots
+        if frame.ndim == 3:
+            small = cv2.resize(frame, size, dst=buffer(self.pool, "gate.resized", shape + (3,)),
+                               interpolation=cv2.INTER_AREA)
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=ring_buffer(self.pool, "gate.small", 2, shape))
+        else:
+            small = cv2.resize(frame, size, dst=ring_buffer(self.pool, "gate.small", 2, shape),
+                               interpolation=cv2.INTER_AREA)
+
+        rows, cols = len(ys) - 1, len(xs) - 1
+        refresh = (self.prev_small is None or self.prev_small.shape != small.shape
+                   or self.frames_since_refresh + 1 >= self.refresh_interval)
+        if refresh:
+            changed = np.ones((rows, cols), dtype=bool)
+            self.frames_since_refresh = 0
+        else:
+            sys_ = np.round(np.asarray(ys) * (small.shape[0] / h)).astype(int)
+            sxs = np.round(np.asarray(xs) * (small.shape[1] / w)).astype(int)
+            diff = cv2.absdiff(small, self.prev_small, buffer(self.pool, "gate.diff", small.shape))
+            areas = np.outer(np.diff(sys_), np.diff(sxs))
+            cell_diff = grid_sums(_integral(diff, self.pool, "gate.integral"), sys_, sxs) / np.maximum(areas, 1)
+            moving = (cell_diff > self.threshold) & (areas > 0)
+            changed = moving | self.prev_changed if self.prev_changed.shape == moving.shape else moving
+            self.prev_changed = moving
+            self.frames_since_refresh += 1
+
+        if refresh:
+            self.prev_changed = np.zeros((rows, cols), dtype=bool)
+        self.prev_small = small
+        self.frames += 1
+        self.cells_total += changed.size
+        self.cells_changed += int(changed.sum())
+        if not changed.any():
+            self.skipped_frames += 1
+        return changed
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "skipped_ratio": self.skipped_frames / max(self.frames, 1),
+            "computed_cell_ratio": self.cells_changed / max(self.cells_total, 1),
+        }
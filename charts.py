@@ -0,0 +1,131 @@
+"""
+Lightweight chart / gauge rendering on preallocated NumPy canvases.
+
+The static parts (background, plot area, grid, title, labels) are drawn once;
+each render copies that background into a reused canvas and draws only the
+data with cv2.polylines / cv2.fillPoly / cv2.ellipse.
+"""
+
+import cv2
+import numpy as np
+
+
+def hex_to_bgr(color):
+    """'#rrggbb' -> (b, g, r)"""
+    color = color.lstrip('#')
+    r, g, b = (int(color[i:i + 2], 16) for i in (0, 2, 4))
+    return (b, g, r)
+
+
+def _blend(color, background, alpha):
+    return tuple(int(c * alpha + bg * (1 - alpha)) for c, bg in zip(color, background))
+
+
+class LineChart:
+    """Live line chart with filled area. render() costs a memcpy plus two polygon draws."""
+
+    BACKGROUND = (26, 26, 26)
+    PLOT_BACKGROUND = (42, 42, 42)
+    BORDER = (102, 102, 102)
+    GRID = (80, 80, 80)
+
+    def __init__(self, width, height, title, color, ylabel, y_max=1.0):
+        self.width = width
+        self.height = height
+        self.color = hex_to_bgr(color) if isinstance(color, str) else color
+        self.fill_color = _blend(self.color, self.PLOT_BACKGROUND, 0.4)
+        self.y_max = y_max
+
+        # Plot area inside the canvas
+        self.x0, self.x1 = 48, width - 12
+        self.y0, self.y1 = 34, height - 14
+
+        self.background = np.empty((height, width, 3), dtype=np.uint8)
+        self.background[:] = self.BACKGROUND
+        cv2.rectangle(self.background, (self.x0, self.y0), (self.x1, self.y1), self.PLOT_BACKGROUND, -1)
+        for frac in (0.25, 0.5, 0.75):
+            y = int(self.y1 - frac * (self.y1 - self.y0))
+            for x in range(self.x0, self.x1, 8):
+                cv2.line(self.background, (x, y), (min(x + 4, self.x1), y), self.GRID, 1)
+        cv2.rectangle(self.background, (self.x0, self.y0), (self.x1, self.y1), self.BORDER, 1)
+        (tw, _), _ = cv2.getTextSize(title, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+        cv2.putText(self.background, title, ((width - tw) // 2, 22),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_AA)
+        cv2.putText(self.background, ylabel, (8, 22),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.35, (200, 200, 200), 1, cv2.LINE_AA)
+
+        self.canvas = self.background.copy()
+
+    def _draw_axis_labels(self, top):
+        for frac in (0.0, 0.5, 1.0):
+            y = int(self.y1 - frac * (self.y1 - self.y0))
+            cv2.putText(self.canvas, f"{frac * top:.1f}", (8, y + 4),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.33, (200, 200, 200), 1)
+
+    def render(self, data):
+        """Draw `data` (any sequence / array of values) and return the reused canvas."""
+        np.copyto(self.canvas, self.background)
+
+        values = np.asarray(data, dtype=np.float64) if not isinstance(data, np.ndarray) else data
+        # Fixed 0..y_max axis, stretched only when data exceeds it
+        top = max(self.y_max, float(values.max())) if len(values) else self.y_max
+        self._draw_axis_labels(top)
+
+        if len(values) < 2:
+            return self.canvas
+
+        xs = np.linspace(self.x0 + 1, self.x1 - 1, len(values))
+        ys = self.y1 - np.clip(values / top, 0.0, 1.0) * (self.y1 - self.y0)
+        line = np.column_stack((xs, ys)).astype(np.int32)
+
+        area = np.concatenate([line, [[line[-1, 0], self.y1], [line[0, 0], self.y1]]]).astype(np.int32)
+        cv2.fillPoly(self.canvas, [area], self.fill_color)
+        cv2.polylines(self.canvas, [line], False, self.color, 2)
+        return self.canvas
+
+
+class Gauge:
+    """Semicircular gauge: static track drawn once, value arc and text drawn per render."""
+
+    BACKGROUND = (26, 26, 26)
+    TRACK = (58, 58, 58)
+
+    def __init__(self, width, height, title, max_value=1.0):
+        self.width = width
+        self.height = height
+        self.max_value = max_value
+
+        self.center = (width // 2, int(height * 0.68))
+        self.radius = int(min(width * 0.38, height * 0.55))
+        self.thickness = 18
+
+        self.background = np.empty((height, width, 3), dtype=np.uint8)
+        self.background[:] = self.BACKGROUND
+        cv2.ellipse(self.background, self.center, (self.radius, self.radius), 0, 180, 360,
+                    self.TRACK, self.thickness, cv2.LINE_AA)
+        (tw, _), _ = cv2.getTextSize(title, cv2.FONT_HERSHEY_SIMPLEX, 0.55, 2)
+        cv2.putText(self.background, title, ((width - tw) // 2, height - 12),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255, 255, 255), 2, cv2.LINE_AA)
+
+        self.canvas = self.background.copy()
+
+    def render(self, value):
+        np.copyto(self.canvas, self.background)
+
+        norm = min(max(value / self.max_value, 0.0), 1.0)
+        if norm < 0.3:
+            color = (0, 255, 0)
+        elif norm < 0.7:
+            color = (0, 170, 255)
+        else:
+            color = (0, 0, 255)
+
+        if norm > 0:
+            cv2.ellipse(self.canvas, self.center, (self.radius, self.radius), 0, 180, 180 + 180 * norm,
+                        color, self.thickness, cv2.LINE_AA)
+
+        text = f"{value:.2f}"
+        (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.1, 2)
+        cv2.putText(self.canvas, text, (self.center[0] - tw // 2, self.center[1] - 8),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.1, (255, 255, 255), 2, cv2.LINE_AA)
+        return self.canvas
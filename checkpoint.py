@@ -0,0 +1,120 @@
+"""
+Checkpoint / resume for long analysis sessions.
+
+A checkpoint is one uncompressed .npz file with everything a restarted run
+needs to continue without a cold start:
+    position / frame number   - the VideoLoader is seeked back to the saved frame
+    prev_gray                 - motion continues across the restart
+    anomaly detector state    - no second warm-up, no burst of false anomalies
+    dashboard counters and every history series (ring buffers, incl. per-cell grids)
+It is written to a temporary file and renamed, so a crash mid-write keeps the
+previous checkpoint. The same file moves a live stream to another node.
+A checkpoint saved at the end of the stream is marked complete and is not
+resumed automatically.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+CHECKPOINT_VERSION = 2
+
+_DASHBOARD_COUNTERS = ("total_frames", "high_risk_frames", "anomaly_count", "alert_count")
+
+
+def _prefixed(prefix, state):
+    return {f"{prefix}.{key}": value for key, value in state.items()}
+
+
+def _unprefixed(prefix, arrays):
+    return {key[len(prefix) + 1:]: value for key, value in arrays.items() if key.startswith(prefix + ".")}
+
+
+class Checkpointer:
+    """
+    Periodic checkpoints of an EnhancedCrowdSafetySystem run.
+    every: save on every N-th analyzed frame (0 = only when asked)
+    """
+
+    def __init__(self, path, every=500):
+        self.path = str(path)
+        self.every = every
+        self.saves = 0
+        self.save_time = 0.0
+        self.last_size = 0
+
+    def due(self, frame_num):
+        return self.every > 0 and frame_num % self.every == 0
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def save(self, system, loader, frame_num, complete=False):
+        """
+        Write the system's state after `frame_num` analyzed frames (loader.position = last frame read).
+        complete: the stream was read to the end
+        """
+        start = time.perf_counter()
+        dashboard = system.dashboard
+        meta = {
+            "version": CHECKPOINT_VERSION,
+            "source": str(loader.video_path),
+            "position": int(loader.position),
+            "frame_num": int(frame_num),
+            "complete": bool(complete),
+            "saved_at": time.time(),
+            "dashboard": {name: int(getattr(dashboard, name)) for name in _DASHBOARD_COUNTERS},
+            "zone_high_risk_frames": system.zone_high_risk_frames,
+        }
+
+        arrays = {"meta": np.asarray(json.dumps(meta))}
+        arrays.update(_prefixed("analyzer", system.analyzer.get_state()))
+        arrays.update(_prefixed("anomaly", system.scorer.anomaly_detector.get_state()))
+        for name, history in dashboard.history.series.items():
+            arrays[f"history.{name}"] = history.view()
+
+        # Per-process temporary file: concurrent writers never replace each other's partial file
+        tmp = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, self.path)
+
+        self.saves += 1
+        self.save_time += time.perf_counter() - start
+        self.last_size = os.path.getsize(self.path)
+
+    def load(self):
+        """(meta, arrays) of the checkpoint file; raises FileNotFoundError / ValueError."""
+        if not self.exists():
+            raise FileNotFoundError(f"[ERROR] Checkpoint not found: {self.path}")
+        with np.load(self.path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        meta = json.loads(str(arrays.pop("meta")))
+        if meta.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"[ERROR] Unsupported checkpoint version: {meta.get('version')}")
+        return meta, arrays
+
+    def restore(self, system, meta=None, arrays=None):
+        """Load the checkpoint into `system` (analyzer, detector, dashboard, histories). Returns its meta."""
+        if meta is None:
+            meta, arrays = self.load()
+        dashboard = system.dashboard
+
+        system.analyzer.set_state(_unprefixed("analyzer", arrays))
+        system.scorer.anomaly_detector.set_state(_unprefixed("anomaly", arrays))
+        for name, history in dashboard.history.series.items():
+            history.clear()
+            history.extend(arrays.get(f"history.{name}", ()))
+        for name, value in meta["dashboard"].items():
+            setattr(dashboard, name, value)
+        system.zone_high_risk_frames = dict(meta.get("zone_high_risk_frames", {}))
+        return meta
+
+    def stats(self):
+        return {
+            "saves": self.saves,
+            "avg_ms": 1000 * self.save_time / max(self.saves, 1),
+            "bytes": self.last_size,
+        }
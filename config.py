@@ -3,13 +3,106 @@ OUTPUT_DIR = "data/outputs"
 
 # OPTIMIZED SETTINGS FOR FASTER PROCESSING
 FRAME_SKIP = 1          # Process every frame (was 2)
-FRAME_WIDTH = 1280      # Higher resolution (was 640)
-FRAME_HEIGHT = 720      # Higher resolution (was 480)
+FRAME_WIDTH = 1280      # Display window size (the window scales the 1920x1080 dashboard)
+FRAME_HEIGHT = 720
+
+# Resolution plan: frames are decoded once at source size; analysis (gray + blur, density,
+# flow) runs on one shrunk copy, the video panel is resized straight to its dashboard slot
+ANALYSIS_WIDTH = 640
+ANALYSIS_HEIGHT = 480
 
 # Grid settings
 GRID_ROWS = 10
 GRID_COLS = 10
+# Multi-scale density grids (finer grids localize hotspots)
+DENSITY_GRIDS = ((4, 4), (10, 10), (20, 20))
+
+# Optical flow tier: "full", "pyramid", "warm" or "sparse" (fastest)
+MOTION_TIER = "full"
+MOTION_SCALE = 0.5      # downscale factor for the "pyramid" / "warm" tiers
+
+# Regions of interest: {camera: {zone: [(x, y), ...]}} with normalized 0-1 polygon coordinates.
+# Only the zones' bounding box is analyzed; each zone gets its own density, motion, risk and alerts.
+ROI_CAMERA = "default"      # camera used by main.py (multi_stream.py uses each stream's name)
+ROI_ZONES = {}
+ROI_MIN_COVERAGE = 0.1      # grid cells with less zone coverage are excluded (NaN)
+
+# Change gate: skip static frames and run optical flow only over changed grid cells
+CHANGE_GATE = False
+CHANGE_THRESHOLD = 3.0          # mean absolute gray difference per cell that counts as change
+CHANGE_SCALE = 0.25             # downsampling of the difference image
+CHANGE_REFRESH_INTERVAL = 50    # frames between forced full recomputes
+
+# Streaming anomaly baseline: "welford" (cumulative), "ewma" or "robust" (windowed median/MAD)
+ANOMALY_MODE = "welford"
+ANOMALY_HALF_LIFE = 300     # frames, for "ewma"
+ANOMALY_WINDOW = 300        # frames, for "robust"
 
 # Risk thresholds
 LOW_RISK_THRESHOLD = 0.4
-HIGH_RISK_THRESHOLD = 0.7
\ No newline at end of file
+HIGH_RISK_THRESHOLD = 0.7
+
+# Rendering: HEADLESS = analytics only (no dashboard frames, window or video output)
+HEADLESS = False
+RENDER_EVERY = 1        # render the dashboard on 1 of every N frames
+
+# Video output (encoded on a background thread)
+OUTPUT_BACKEND = "opencv"   # "opencv", "ffmpeg", "mjpeg" or "raw"
+OUTPUT_SIZE = None          # (width, height); None = full 1920x1080 dashboard
+OUTPUT_FPS = None           # None = source FPS / RENDER_EVERY
+WRITER_QUEUE_SIZE = 8
+WRITER_POLICY = "block"     # "block" or "drop" when the encoder falls behind
+
+# Real-time mode: per-frame budget = FRAME_SKIP / source FPS. When over budget, shed load in order:
+# render less often -> cheaper motion tier -> higher frame skip (density and risk always run)
+REALTIME = False
+REALTIME_HEADROOM = 0.9         # shed when smoothed latency exceeds this fraction of the budget
+SHED_MAX_RENDER_EVERY = 8
+SHED_MAX_FRAME_SKIP = 4
+
+# Background decode queue depth (0 = decode on the analysis thread)
+PREFETCH_DEPTH = 4
+
+# Live capture: always analyze the newest frame (older frames are dropped and counted).
+# Cameras are read as fast as they deliver; files are replayed at real-time speed.
+LIVE = False
+
+# Reuse preallocated frame buffers (decode, preprocessing, flow, output queue) instead of allocating per frame
+BUFFER_POOL = True
+
+# Offline mode: split one video across N worker processes (0 = sequential dashboard run)
+PARALLEL_WORKERS = 0
+
+# Shared-memory pipeline (shm_pipeline.py): decode, analysis and render / encode run as separate
+# processes and hand frames over through SHM_SLOTS shared-memory slots (file output, no display)
+SHM_PIPELINE = False
+SHM_SLOTS = 8
+
+# Per-frame metric store (metric_store.py): memory-mapped columns + risk interval index per video
+METRIC_STORE_DIR = None        # e.g. "data/outputs/metrics" (one store per video; None = off)
+
+# Decode-once frame cache (frame_cache.py): headless file runs store the preprocessed gray frames
+# and later runs with the same preprocessing stream them from a memory-mapped file instead of decoding
+FRAME_CACHE = False
+FRAME_CACHE_DIR = "data/cache/frames"
+FRAME_CACHE_BUDGET_MB = 4096    # least recently used clips are evicted beyond this
+
+# Checkpoints for long runs: detector baseline, prev frame, counters and histories in one .npz.
+# A restarted run with the same source resumes from the last checkpoint.
+CHECKPOINT_PATH = None          # e.g. "data/outputs/session.ckpt.npz" (None = off)
+CHECKPOINT_EVERY = 500          # frames between checkpoints
+
+# Batch archive analysis (batch.py): headless, one clip per worker process
+BATCH_OUTPUT_DIR = "data/outputs/batch"    # per-clip CSV / log files and the resume manifest
+BATCH_WORKERS = 0                          # 0 = one worker per core
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+# Multi-camera runner (multi_stream.py)
+STREAM_SOURCES = []             # list of paths / camera indices, or {name: source}
+STREAM_WORKERS = 0              # 0 = one worker per core
+STREAM_POLICY = "round_robin"   # "round_robin" or "risk"
+
+# Per-stage latency histograms / counters (cheap enough to leave on)
+METRICS_ENABLED = True
+METRICS_PORT = 0                # Prometheus text endpoint on METRICS_HOST:PORT/metrics (0 = off)
+METRICS_HOST = "127.0.0.1"
\ No newline at end of file
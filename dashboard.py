@@ -1,23 +1,32 @@
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg
 from collections import deque
 import time
 
+from charts import LineChart, Gauge
+from history import HistoryStore
+
 
 class CrowdSafetyDashboard:
-    def __init__(self, max_history=100):
+    # (width, height) of the main video slot - render the video panel at this size
+    VIDEO_SIZE = (1180, 865)
+
+    def __init__(self, max_history=100, grid_shape=None):
 
         self.max_history = max_history
 
-        # Historical Data
-        self.density_history = deque(maxlen=max_history)
-        self.risk_history = deque(maxlen=max_history)
-        self.motion_history = deque(maxlen=max_history)
-        self.anomaly_history = deque(maxlen=max_history)
-        self.fps_history = deque(maxlen=max_history)
-        self.timestamps = deque(maxlen=max_history)
+        # Historical Data: one ring-buffer store (O(1) appends, zero-copy windows), shared with
+        # the system and visualizer; grid_shape adds per-cell density / motion grids per frame
+        series = dict(density=(), risk=(), motion=(), anomaly=((), np.uint8), fps=(), timestamps=())
+        if grid_shape is not None:
+            series.update(density_grid=(tuple(grid_shape), np.float32), motion_grid=(tuple(grid_shape), np.float32))
+        self.history = HistoryStore(max_history, **series)
+        self.density_history = self.history["density"]
+        self.risk_history = self.history["risk"]
+        self.motion_history = self.history["motion"]
+        self.anomaly_history = self.history["anomaly"]
+        self.fps_history = self.history["fps"]
+        self.timestamps = self.history["timestamps"]
 
         # Statistics
         self.total_frames = 0
@@ -28,28 +37,29 @@ class CrowdSafetyDashboard:
         # Alerts
         self.current_alerts = []
         self.alert_history = deque(maxlen=10)
+        self.alert_count = 0
+
+        # Live chart / gauge renderers (preallocated canvases, drawn every frame)
+        self.charts = {}
+        self.gauges = {}
 
-        # Cached (for performance)
-        self.cached_density_chart = None
-        self.cached_risk_chart = None
-        self.cached_motion_chart = None
-        self.cached_risk_gauge = None
-        self.cached_density_gauge = None
-        self.cached_stat_panel = None
-        self.cached_alert_panel = None
-        self.cached_heatmap_legend = None
+        # Dirty-region compositor (built on first render)
+        self.compositor = None
 
+        # Optional metrics.MetricsRegistry: feeds the stage timing panel and counts alerts
+        self.metrics = None
 
-    def update_metrics(self, density, risk_level, motion_magnitude, anomaly_detected, fps):
+
+    def update_metrics(self, density, risk_level, motion_magnitude, anomaly_detected, fps,
+                       density_map=None, motion_map=None):
         self.total_frames += 1
         current_time = time.time() - self.start_time
 
-        self.density_history.append(density)
-        self.risk_history.append(risk_level)
-        self.motion_history.append(motion_magnitude)
-        self.anomaly_history.append(1 if anomaly_detected else 0)
-        self.fps_history.append(fps)
-        self.timestamps.append(current_time)
+        record = dict(density=density, risk=risk_level, motion=motion_magnitude,
+                      anomaly=1 if anomaly_detected else 0, fps=fps, timestamps=current_time)
+        if density_map is not None and "density_grid" in self.history:
+            record.update(density_grid=density_map, motion_grid=motion_map)
+        self.history.append(**record)
 
         if risk_level > 0.7:
             self.high_risk_frames += 1
@@ -66,6 +76,9 @@ class CrowdSafetyDashboard:
         }
         self.current_alerts.append(alert)
         self.alert_history.append(alert)
+        self.alert_count += 1
+        if self.metrics is not None:
+            self.metrics.inc("alerts_emitted")
 
 
     def clear_old_alerts(self, max_age=5.0):
@@ -74,66 +87,17 @@ class CrowdSafetyDashboard:
 
 
     def create_line_chart(self, data, title, color, ylabel, width, height):
-        fig, ax = plt.subplots(figsize=(width/100, height/100), dpi=100)
-        fig.patch.set_facecolor('#1a1a1a')
-        ax.set_facecolor('#2a2a2a')
-
-        if len(data) > 0:
-            ax.plot(list(data), color=color, linewidth=2.5, alpha=0.9)
-            ax.fill_between(range(len(data)), list(data), alpha=0.4, color=color)
-
-        ax.set_title(title, color='white', fontsize=11, pad=8, weight='bold')
-        ax.set_ylabel(ylabel, color='white', fontsize=9)
-        ax.tick_params(colors='white', labelsize=8)
-        ax.grid(True, alpha=0.3, color='white', linestyle='--')
-        for side in ax.spines.values():
-            side.set_color('#666666')
-
-        plt.tight_layout()
-
-        canvas = FigureCanvasAgg(fig)
-        canvas.draw()
-        buf = canvas.buffer_rgba()
-        chart = np.asarray(buf)
-        plt.close(fig)
-
-        return cv2.cvtColor(chart, cv2.COLOR_RGBA2BGR)
+        key = (title, width, height)
+        if key not in self.charts:
+            self.charts[key] = LineChart(width, height, title, color, ylabel)
+        return self.charts[key].render(data)
 
 
     def create_gauge(self, value, title, max_value, width, height):
-        fig, ax = plt.subplots(figsize=(width/100, height/100), dpi=100, subplot_kw={'projection': 'polar'})
-        fig.patch.set_facecolor('#1a1a1a')
-        ax.set_facecolor('#1a1a1a')
-
-        theta = np.linspace(0, np.pi, 100)
-        ax.plot(theta, [1]*len(theta), color='#3a3a3a', linewidth=22)
-
-        norm = min(value/max_value, 1.0)
-        theta_val = theta[:int(len(theta)*norm)]
-
-        if norm < 0.3:
-            c = '#00ff00'
-        elif norm < 0.7:
-            c = '#ffaa00'
-        else:
-            c = '#ff0000'
-
-        ax.plot(theta_val, [1]*len(theta_val), color=c, linewidth=22)
-
-        ax.text(np.pi/2, 0.5, f"{value:.2f}", ha='center', va='center', fontsize=26, color='white', weight='bold')
-        ax.text(np.pi/2, -0.25, title, ha='center', va='center', fontsize=12, color='white', weight='bold')
-
-        ax.set_ylim(0, 1.2)
-        ax.axis('off')
-        plt.tight_layout()
-
-        canvas = FigureCanvasAgg(fig)
-        canvas.draw()
-        buf = canvas.buffer_rgba()
-        gauge = np.asarray(buf)
-        plt.close(fig)
-
-        return cv2.cvtColor(gauge, cv2.COLOR_RGBA2BGR)
+        key = (title, width, height)
+        if key not in self.gauges:
+            self.gauges[key] = Gauge(width, height, title, max_value)
+        return self.gauges[key].render(value)
 
 
     def create_stat_panel(self, width, height):
@@ -143,7 +107,7 @@ class CrowdSafetyDashboard:
         cv2.putText(p, 'SYSTEM STATISTICS', (15, 24), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (0,255,255), 2)
 
         uptime = time.time() - self.start_time
-        avg_fps = np.mean(self.fps_history) if len(self.fps_history)>0 else 0
+        avg_fps = self.fps_history.view().mean() if len(self.fps_history)>0 else 0
         risk_pct = (self.high_risk_frames/max(self.total_frames,1))*100
 
         stats = [
@@ -181,6 +145,37 @@ class CrowdSafetyDashboard:
         return p
 
 
+    def create_timing_panel(self, width, height):
+        p = np.zeros((height,width,3),dtype=np.uint8)
+        p[:] = (26,26,26)
+        cv2.rectangle(p,(0,0),(width,35),(40,40,40),-1)
+        cv2.putText(p,'STAGE TIMING (ms)',(12,24),cv2.FONT_HERSHEY_SIMPLEX,0.55,(255,200,100),2)
+
+        summary = self.metrics.stage_summary() if self.metrics is not None else []
+        if not summary:
+            cv2.putText(p,'No timings yet',(15,62),cv2.FONT_HERSHEY_SIMPLEX,0.45,(200,200,200),1)
+            return p
+
+        cv2.putText(p,'stage',(10,56),cv2.FONT_HERSHEY_SIMPLEX,0.4,(150,150,150),1)
+        cv2.putText(p,'p50',(120,56),cv2.FONT_HERSHEY_SIMPLEX,0.4,(150,150,150),1)
+        cv2.putText(p,'p95',(170,56),cv2.FONT_HERSHEY_SIMPLEX,0.4,(150,150,150),1)
+
+        # Bar length relative to the slowest stage's p95
+        slowest = max(p95 for _, _, p95, _, _ in summary) or 1.0
+        y = 80
+        for name, p50, p95, _, _ in summary:
+            if y > height - 10:
+                break
+            cv2.putText(p,name[:12],(10,y),cv2.FONT_HERSHEY_SIMPLEX,0.42,(200,200,200),1)
+            cv2.putText(p,f"{p50:.1f}",(120,y),cv2.FONT_HERSHEY_SIMPLEX,0.42,(100,255,100),1)
+            cv2.putText(p,f"{p95:.1f}",(165,y),cv2.FONT_HERSHEY_SIMPLEX,0.42,(0,170,255),1)
+            cv2.rectangle(p,(10,y+5),(10+int((width-20)*p95/slowest),y+8),(0,170,255),-1)
+            cv2.rectangle(p,(10,y+5),(10+int((width-20)*p50/slowest),y+8),(100,255,100),-1)
+            y += 32
+
+        return p
+
+
     def create_heatmap_legend(self, width, height):
         p = np.zeros((height,width,3),dtype=np.uint8)
         p[:] = (26,26,26)
@@ -200,69 +195,130 @@ class CrowdSafetyDashboard:
         return p
 
 
+    def _build_compositor(self):
+        """Static chrome (background, title, density legend) is drawn once into the compositor background."""
+        comp = DashboardCompositor(1920, 1080, (20,20,20))
+        cv2.putText(comp.background,'CROWD SAFETY MONITORING SYSTEM',(35,42),cv2.FONT_HERSHEY_SIMPLEX,1.3,(255,255,255),3)
+        comp.background[940:1080, 1000:1280] = self.create_heatmap_legend(280,140)
+
+        # Regions must not overlap (video stops where the bottom panels start)
+        x=1220
+        video_w, video_h = self.VIDEO_SIZE
+        comp.add_region('video', 75, 75+video_h, 20, 20+video_w)
+        comp.add_region('risk_gauge', 75, 275, x, x+280)
+        comp.add_region('density_gauge', 75, 275, x+300, x+580)
+        comp.add_region('density_chart', 290, 510, x, x+450)
+        comp.add_region('risk_chart', 520, 740, x, x+450)
+        comp.add_region('motion_chart', 750, 970, x, x+450)
+        comp.add_region('timing', 290, 740, 1690, 1910)
+        comp.add_region('stats', 940, 1080, 20, 440)
+        comp.add_region('alerts', 940, 1080, 460, 980)
+        comp.add_region('fps_badge', 10, 60, 1690, 1910, opaque=False)
+        return comp
+
+
+    def _draw_fps_badge(self, view, current_fps, status_text, status_color):
+        # Region origin is (1690, 10) in dashboard coordinates
+        cv2.rectangle(view,(30,5),(210,45),(40,60,40),-1)
+        cv2.putText(view,f"FPS: {current_fps:.1f}",(40,33),cv2.FONT_HERSHEY_SIMPLEX,0.9,(0,255,0),2)
+        cv2.circle(view,(140,25),15,status_color,-1)
+        cv2.putText(view,status_text,(10,33),cv2.FONT_HERSHEY_SIMPLEX,0.7,status_color,2)
+
+
     def render_dashboard(self, main_frame, model_accuracy=92.5):
+        """
+        Compose the 1920x1080 dashboard. Only regions whose content changed are redrawn
+        into a persistent output buffer - the returned frame is reused on the next call.
+        """
+        if self.compositor is None:
+            self.compositor = self._build_compositor()
 
         current_density = self.density_history[-1] if self.density_history else 0
         current_risk = self.risk_history[-1] if self.risk_history else 0
-        current_motion = self.motion_history[-1] if self.motion_history else 0
         current_fps = self.fps_history[-1] if self.fps_history else 0
 
-
-        # Cache refresh
-        if self.total_frames % 100 == 0 or self.cached_density_chart is None:
-            self.cached_density_chart = self.create_line_chart(self.density_history,'Crowd Density Trend','#00ffff','Density',450,220)
-            self.cached_risk_chart = self.create_line_chart(self.risk_history,'Risk Level Trend','#ff4444','Risk',450,220)
-            self.cached_motion_chart = self.create_line_chart(self.motion_history,'Motion Activity','#44ff44','Motion',450,220)
-            self.cached_risk_gauge = self.create_gauge(current_risk,'RISK LEVEL',1.0,280,200)
-            self.cached_density_gauge = self.create_gauge(current_density,'DENSITY',1.0,280,200)
-
-
-        if self.total_frames % 200 == 0 or self.cached_stat_panel is None:
-            self.cached_stat_panel = self.create_stat_panel(420,140)
-            self.cached_alert_panel = self.create_alert_panel(520,140)
-            self.cached_heatmap_legend = self.create_heatmap_legend(280,140)
-
-        density_chart = self.cached_density_chart
-        risk_chart = self.cached_risk_chart
-        motion_chart = self.cached_motion_chart
-        risk_gauge = self.cached_risk_gauge
-        density_gauge = self.cached_density_gauge
-        stat_panel = self.cached_stat_panel
-        alert_panel = self.cached_alert_panel
-        heatmap = self.cached_heatmap_legend
-
-
-        dashboard = np.zeros((1080,1920,3),dtype=np.uint8)
-        dashboard[:] = (20,20,20)
-
-        main_w, main_h = 1180, 885
-        main_resized = cv2.resize(main_frame,(main_w,main_h))
-        dashboard[75:75+main_h,20:20+main_w]=main_resized
-
-
-        cv2.putText(dashboard,'CROWD SAFETY MONITORING SYSTEM',(35,42),cv2.FONT_HERSHEY_SIMPLEX,1.3,(255,255,255),3)
-
-        cv2.rectangle(dashboard,(1720,15),(1900,55),(40,60,40),-1)
-        cv2.putText(dashboard,f"FPS: {current_fps:.1f}",(1730,43),cv2.FONT_HERSHEY_SIMPLEX,0.9,(0,255,0),2)
-
-        x=1220
-        y=75
-        dashboard[y:y+200,x:x+280]=risk_gauge
-        dashboard[y:y+200,x+300:x+580]=density_gauge
-        y+=215
-        dashboard[y:y+220,x:x+450]=density_chart
-        y+=230
-        dashboard[y:y+220,x:x+450]=risk_chart
-        y+=230
-        dashboard[y:y+220,x:x+450]=motion_chart
-
-        dashboard[940:1080, 20:440]=stat_panel
-        dashboard[940:1080, 460:980]=alert_panel
-        dashboard[940:1080, 1000:1280]=heatmap
-
         status_color = (0,255,0) if current_risk<0.5 else (0,165,255) if current_risk<0.7 else (0,0,255)
         status_text = 'SAFE' if current_risk<0.5 else 'CAUTION' if current_risk<0.7 else 'DANGER'
-        cv2.circle(dashboard,(1830,35),15,status_color,-1)
-        cv2.putText(dashboard,status_text,(1700,43),cv2.FONT_HERSHEY_SIMPLEX,0.7,status_color,2)
 
-        return dashboard
\ No newline at end of file
+        def paste(image):
+            def draw(view):
+                view[:] = image()
+            return draw
+
+        def draw_video(view):
+            if main_frame.shape[:2] == view.shape[:2]:
+                view[:] = main_frame
+            else:
+                cv2.resize(main_frame,(view.shape[1],view.shape[0]),dst=view)
+
+        alert_key = tuple((a['message'], a['time']) for a in self.current_alerts[-3:])
+
+        # region -> (content key, draw function); a region is redrawn only when its key changes
+        updates = {
+            'video': (None, draw_video),
+            'risk_gauge': (round(current_risk, 2),
+                           paste(lambda: self.create_gauge(current_risk,'RISK LEVEL',1.0,280,200))),
+            'density_gauge': (round(current_density, 2),
+                              paste(lambda: self.create_gauge(current_density,'DENSITY',1.0,280,200))),
+            'density_chart': (self.total_frames,
+                              paste(lambda: self.create_line_chart(self.density_history.view(),'Crowd Density Trend','#00ffff','Density',450,220))),
+            'risk_chart': (self.total_frames,
+                           paste(lambda: self.create_line_chart(self.risk_history.view(),'Risk Level Trend','#ff4444','Risk',450,220))),
+            'motion_chart': (self.total_frames,
+                             paste(lambda: self.create_line_chart(self.motion_history.view(),'Motion Activity','#44ff44','Motion',450,220))),
+            # Stats show uptime in seconds - refresh once per second
+            'stats': (int(time.time() - self.start_time), paste(lambda: self.create_stat_panel(420,140))),
+            'alerts': (alert_key, paste(lambda: self.create_alert_panel(520,140))),
+            'timing': (int(time.time() - self.start_time), paste(lambda: self.create_timing_panel(220,450))),
+            'fps_badge': ((f"{current_fps:.1f}", status_text),
+                          lambda view: self._draw_fps_badge(view, current_fps, status_text, status_color)),
+        }
+
+        return self.compositor.compose(updates)
+
+
+class DashboardCompositor:
+    """
+    Dirty-region compositor: a static background rendered once, a persistent output
+    buffer, and named regions that are restored + redrawn only when their content key changes.
+    """
+
+    def __init__(self, width, height, color=(0, 0, 0)):
+        self.background = np.empty((height, width, 3), dtype=np.uint8)
+        self.background[:] = color
+        self.output = None
+        self.regions = {}
+        self._opaque = set()
+        self._keys = {}
+
+    def add_region(self, name, y0, y1, x0, x1, opaque=True):
+        """opaque: the draw function covers the whole region, so the background is not restored first."""
+        self.regions[name] = (slice(y0, y1), slice(x0, x1))
+        if opaque:
+            self._opaque.add(name)
+
+    def invalidate(self):
+        """Force a full redraw (e.g. after the background changed)."""
+        self.output = None
+        self._keys.clear()
+
+    def compose(self, updates):
+        """
+        updates: {region: (key, draw_fn)}. key None means always dirty.
+        Returns the output buffer.
+        """
+        if self.output is None:
+            self.output = self.background.copy()
+            self._keys.clear()
+
+        for name, (key, draw) in updates.items():
+            if key is not None and name in self._keys and self._keys[name] == key:
+                continue
+            region = self.regions[name]
+            view = self.output[region]
+            if name not in self._opaque:
+                np.copyto(view, self.background[region])
+            draw(view)
+            self._keys[name] = key
+
+        return self.output
@@ -1,23 +1,74 @@
+import cv2
 import numpy as np
 
-def estimate_density(gray_frame, rows, cols):
+from buffer_pool import buffer
+
+def _grid_edges(size, cells):
+    """Cell boundaries covering every pixel (cells differ by at most one pixel)."""
+    return np.linspace(0, size, cells + 1).astype(int)
+
+def grid_sums(integral, ys, xs):
+    """Sum of every cell bounded by the edge arrays ys / xs, from a summed-area table."""
+    corners = integral[ys][:, xs]
+    return corners[1:, 1:] - corners[:-1, 1:] - corners[1:, :-1] + corners[:-1, :-1]
+
+def grid_means(integral, rows, cols):
     """
-    Estimate crowd density using pixel intensity variations.
+    Mean value of every grid cell from a summed-area table.
+    integral: output of cv2.integral, shape (h+1, w+1)
     """
-    h, w = gray_frame.shape
-    grid_h = h // rows
-    grid_w = w // cols
+    h, w = integral.shape[0] - 1, integral.shape[1] - 1
+    ys = _grid_edges(h, rows)
+    xs = _grid_edges(w, cols)
 
-    density_map = np.zeros((rows, cols))
+    sums = grid_sums(integral, ys, xs)
+    areas = np.outer(np.diff(ys), np.diff(xs))
+    return sums / np.maximum(areas, 1)
 
-    for i in range(rows):
-        for j in range(cols):
-            cell = gray_frame[
-                i * grid_h:(i + 1) * grid_h,
-                j * grid_w:(j + 1) * grid_w
-            ]
-            density_map[i, j] = np.mean(cell)
+def estimate_density(gray_frame, rows, cols):
+    """
+    Estimate crowd density using pixel intensity variations.
+    """
+    integral = cv2.integral(gray_frame, sdepth=cv2.CV_64F)
+    density_map = grid_means(integral, rows, cols)
 
     # Normalize
     density_map = density_map / 255.0
     return density_map
+
+def _integral(image, pool, name):
+    """Summed-area table (float64), written into a pooled buffer when a pool is given."""
+    h, w = image.shape[:2]
+    return cv2.integral(image, buffer(pool, name, (h + 1, w + 1), np.float64), cv2.CV_64F)
+
+def estimate_density_multiscale(gray_frame, grids=((4, 4), (10, 10), (20, 20)), pool=None):
+    """
+    Density maps at several grid resolutions from one summed-area table.
+    Returns {(rows, cols): density_map}
+    """
+    integral = _integral(gray_frame, pool, "density.integral")
+    return {(rows, cols): grid_means(integral, rows, cols) / 255.0 for rows, cols in grids}
+
+def estimate_density_masked(gray_frame, mask, grids, pool=None):
+    """
+    Density restricted to mask pixels (uint8, nonzero = analyzed).
+    grids: {(rows, cols): (ys, xs, valid)} with cell edges in gray_frame coordinates
+           and a boolean map of cells with enough mask coverage.
+    Returns ({(rows, cols): density_map}, mean density over the mask).
+    Cells outside the mask are NaN.
+    """
+    # 0/1 mask: zeroes pixels outside by multiplication, so pooled outputs need no clearing
+    mask01 = cv2.threshold(mask, 0, 1, cv2.THRESH_BINARY, buffer(pool, "density.mask01", mask.shape))[1]
+    masked = cv2.multiply(gray_frame, mask01, buffer(pool, "density.masked", gray_frame.shape))
+    value_integral = _integral(masked, pool, "density.integral")
+    count_integral = _integral(mask01, pool, "density.count_integral")
+
+    density_maps = {}
+    for key, (ys, xs, valid) in grids.items():
+        counts = grid_sums(count_integral, ys, xs)
+        density_map = grid_sums(value_integral, ys, xs) / np.maximum(counts, 1) / 255.0
+        density_map[~valid] = np.nan
+        density_maps[key] = density_map
+
+    density = value_integral[-1, -1] / max(count_integral[-1, -1], 1) / 255.0
+    return density_maps, density
@@ -0,0 +1,337 @@
+import numpy as np
+
+from preprocessing import Preprocessor
+from buffer_pool import BufferPool
+from anomaly_detection import AnomalyDetector
+from metrics import MetricsRegistry
+from roi import ZoneLayout, load_zones
+from change_gate import ChangeGate
+import density_estimation
+import motion_analysis
+import risk_classifier
+
+import config
+
+
+class FrameAnalyzer:
+    """
+    Per-frame analysis stage: preprocessing -> density grid -> motion.
+    Keeps the previous grayscale frame so motion is continuous across calls.
+    With ROI zones only the zones' bounding box is processed and masked cells are NaN.
+    With the change gate, static frames are skipped and flow runs only over changed cells.
+    With BUFFER_POOL, frame-sized intermediates come from self.pool and are reused every frame.
+    """
+
+    def __init__(self, rows=None, cols=None, metrics=None, zones=None, pool=None):
+        # Analysis resolution: every decoded frame is shrunk to this once (None = decoded size)
+        width, height = getattr(config, 'ANALYSIS_WIDTH', None), getattr(config, 'ANALYSIS_HEIGHT', None)
+        self.analysis_size = (width, height) if width and height else None
+        # Stage timings go to the caller's registry; a disabled one costs nothing
+        self.metrics = metrics or MetricsRegistry(enabled=False)
+        # Preallocated buffers shared by every stage (the caller may share them with its loader)
+        if pool is None and getattr(config, 'BUFFER_POOL', True):
+            pool = BufferPool(metrics=self.metrics)
+        self.pool = pool
+        self.preprocessor = Preprocessor(pool=pool)
+        self.rows = rows or getattr(config, 'GRID_ROWS', 10)
+        self.cols = cols or getattr(config, 'GRID_COLS', 10)
+        # Extra grid resolutions computed from the same summed-area table
+        grids = getattr(config, 'DENSITY_GRIDS', ())
+        self.grids = tuple(dict.fromkeys(tuple(g) for g in (*grids, (self.rows, self.cols))))
+        self.motion_engine = motion_analysis.MotionEngine(
+            tier=getattr(config, 'MOTION_TIER', 'full'),
+            rows=self.rows,
+            cols=self.cols,
+            scale=getattr(config, 'MOTION_SCALE', 0.5),
+            pool=pool,
+        )
+        self.prev_gray = None
+
+        # ROI polygons (config.ROI_ZONES for the configured camera unless given)
+        self.zones = zones if zones is not None else load_zones()
+        self.min_coverage = getattr(config, 'ROI_MIN_COVERAGE', 0.1)
+        self.layout = None
+        self._cells_key = None
+        self._cells = None
+
+        # Change gate: reuse previous results for cells / frames that did not change
+        self.gate = None
+        if getattr(config, 'CHANGE_GATE', False):
+            self.gate = ChangeGate(
+                threshold=getattr(config, 'CHANGE_THRESHOLD', 3.0),
+                scale=getattr(config, 'CHANGE_SCALE', 0.25),
+                refresh_interval=getattr(config, 'CHANGE_REFRESH_INTERVAL', 50),
+                pool=pool,
+            )
+        self._last = None
+        self._raw_motion = None
+        self._pending_gap = 0
+
+    def _layout_for(self, shape):
+        if self.layout is None or (self.layout.frame_height, self.layout.frame_width) != shape[:2]:
+            if self.layout is not None:
+                # Frame size changed: the previous frame is no longer comparable
+                self.prev_gray = None
+            self.layout = ZoneLayout(self.zones, shape, self.min_coverage)
+            print(f"🗺️  ROI: {len(self.zones)} zone(s), analyzing {self.layout.area_fraction:.0%} of the frame")
+        return self.layout
+
+    def reset(self):
+        """Forget the previous frame (next frame gets zero motion)."""
+        self.prev_gray = None
+        self.motion_engine.reset()
+        self._last = None
+        self._raw_motion = None
+        self._pending_gap = 0
+        if self.gate is not None:
+            self.gate.reset()
+
+    def get_state(self):
+        """Frame-to-frame state worth checkpointing: the previous gray frame (analysis resolution)."""
+        return {"prev_gray": self.prev_gray.copy()} if self.prev_gray is not None else {}
+
+    def set_state(self, state):
+        """Continue from a checkpoint: the next frame's motion is measured against the saved frame."""
+        self.reset()
+        prev_gray = state.get("prev_gray")
+        if prev_gray is not None:
+            self.prev_gray = np.array(prev_gray, dtype=np.uint8)
+
+    def _geometry(self, src_w, src_h):
+        """(layout, crop slices of the decoded frame or None, analyzed (width, height)) for a decoded size."""
+        width, height = self.analysis_size or (src_w, src_h)
+        layout = self._layout_for((height, width)) if self.zones else None
+        if layout is None:
+            return None, None, (width, height)
+        # Crop the zones' box from the decoded frame, mapped from analysis coordinates
+        x, y, w, h = layout.bbox
+        sx, sy = src_w / width, src_h / height
+        crop = (slice(round(y * sy), round((y + h) * sy)), slice(round(x * sx), round((x + w) * sx)))
+        return layout, crop, (w, h)
+
+    def preprocess_params(self):
+        """Everything preprocess() output depends on besides the decoded frame (the frame cache key)."""
+        return {
+            "analysis_size": self.analysis_size,
+            "zones": self.zones,
+            "min_coverage": self.min_coverage if self.zones else None,
+            "kernel_size": self.preprocessor.kernel_size,
+            "sigma": self.preprocessor.sigma,
+        }
+
+    def preprocess(self, frame):
+        """
+        Crop and preprocess a decoded BGR frame exactly as analyze() does. The result is
+        what analyze(gray, source_size=...) takes, and what the frame cache stores.
+        """
+        src_h, src_w = frame.shape[:2]
+        _, crop, size = self._geometry(src_w, src_h)
+        if crop is not None:
+            frame = frame[crop]
+        with self.metrics.stage("preprocess"):
+            return self.preprocessor.process(frame, size)
+
+    def _cell_geometry(self, shape, layout):
+        """(ys, xs, valid, pixels): base-grid cell edges in analyzed-frame pixels, usable cells, pixels per cell."""
+        if layout is not None:
+            ys, xs, valid = layout.grid(self.rows, self.cols)
+            return ys, xs, valid, layout.cell_pixels(self.rows, self.cols)
+        if self._cells_key != shape[:2]:
+            ys = density_estimation._grid_edges(shape[0], self.rows)
+            xs = density_estimation._grid_edges(shape[1], self.cols)
+            valid = np.ones((self.rows, self.cols), dtype=bool)
+            self._cells = (ys, xs, valid, np.outer(np.diff(ys), np.diff(xs)).astype(np.float64))
+            self._cells_key = shape[:2]
+        return self._cells
+
+    def _compute_motion(self, gray_frame, layout, ys, xs, changed):
+        """
+        Optical flow over the whole analyzed frame, or - when `changed` is given - only over
+        the bounding box of the changed cells plus one cell of context.
+        Returns (engine result, (r0, r1, c0, c1) cell box).
+        """
+        mask = layout.mask if layout is not None else None
+        if changed is None:
+            return self.motion_engine.compute(self.prev_gray, gray_frame, mask, (ys, xs)), None
+
+        rows_hit = np.flatnonzero(changed.any(axis=1))
+        cols_hit = np.flatnonzero(changed.any(axis=0))
+        r0, r1 = max(rows_hit[0] - 1, 0), min(rows_hit[-1] + 2, self.rows)
+        c0, c1 = max(cols_hit[0] - 1, 0), min(cols_hit[-1] + 2, self.cols)
+        y0, y1, x0, x1 = ys[r0], ys[r1], xs[c0], xs[c1]
+
+        box = (slice(y0, y1), slice(x0, x1))
+        sub_mask = mask[box] if mask is not None else None
+        result = self.motion_engine.compute(self.prev_gray[box], gray_frame[box], sub_mask,
+                                            (ys[r0:r1 + 1] - y0, xs[c0:c1 + 1] - x0))
+        return result, (r0, r1, c0, c1)
+
+    def _keep_prev_gray(self):
+        """
+        A frame was gated out after preprocessing, which still advanced the two-buffer
+        preprocess ring, so the next call would overwrite prev_gray - move it to its own buffer.
+        """
+        if self.pool is None or self.prev_gray is None:
+            return
+        kept = self.pool.get("analysis.prev_gray", self.prev_gray.shape)
+        if kept is not self.prev_gray:
+            np.copyto(kept, self.prev_gray)
+            self.prev_gray = kept
+            self._last["gray"] = kept
+            self.motion_engine.forget_frame()
+
+    def analyze(self, frame, frame_gap=1, source_size=None):
+        """
+        Input: BGR frame at decoded resolution; frame_gap = source frames since the previous call
+               (effective skip). Analysis runs at ANALYSIS_WIDTH x ANALYSIS_HEIGHT.
+               With source_size = decoded (width, height), `frame` is already the preprocess()
+               output (e.g. from the frame cache) and preprocessing is skipped.
+        Output: dict with gray frame, density map(s), mean density,
+                motion magnitude and per-cell motion magnitude/direction maps
+        Motion is normalized by frame_gap so it stays in px per source frame.
+        With ROI zones, "zones" holds per-zone density / motion.
+        With a buffer pool, "gray" is a pooled buffer that the next-but-one call overwrites.
+        """
+        preprocessed = source_size is not None
+        src_w, src_h = source_size if preprocessed else (frame.shape[1], frame.shape[0])
+        layout, crop, (width, height) = self._geometry(src_w, src_h)
+        if crop is not None and not preprocessed:
+            frame = frame[crop]
+        ys, xs, valid, cell_pixels = self._cell_geometry((height, width), layout)
+
+        if preprocessed:
+            gray_frame = frame
+        else:
+            with self.metrics.stage("preprocess"):
+                gray_frame = self.preprocessor.process(frame, (width, height))
+
+        # The gate always sees the preprocess() output, so decoded and cached frames gate alike
+        changed = None
+        if self.gate is not None:
+            with self.metrics.stage("gate"):
+                changed = self.gate.update(gray_frame, ys, xs)
+            if self._last is not None and not changed.any():
+                # Static frame: carry everything forward; the skipped time folds into the next gap
+                self._pending_gap += frame_gap
+                self.metrics.inc("gated_frames")
+                self.motion_engine.forget_frame()
+                self._keep_prev_gray()
+                return dict(self._last, gated=True)
+            if self._last is None or changed.all():
+                changed = None
+        frame_gap += self._pending_gap
+        self._pending_gap = 0
+
+        with self.metrics.stage("density"):
+            if layout is None:
+                density_maps = density_estimation.estimate_density_multiscale(gray_frame, self.grids, self.pool)
+                density_value = np.mean(density_maps[(self.rows, self.cols)])
+            else:
+                cells = {grid: layout.grid(*grid) for grid in self.grids}
+                density_maps, density_value = density_estimation.estimate_density_masked(
+                    gray_frame, layout.mask, cells, self.pool)
+        density_map = density_maps[(self.rows, self.cols)]
+
+        motion, box = None, None
+        # (a restored or stale prev_gray from another analysis size is ignored)
+        if self.prev_gray is not None and self.prev_gray.shape == gray_frame.shape:
+            with self.metrics.stage("motion"):
+                motion, box = self._compute_motion(gray_frame, layout, ys, xs, changed)
+            motion_map = motion["magnitude_map"] / frame_gap
+            direction_map = motion["direction_map"]
+            if box is None:
+                motion_magnitude = motion["motion"] / frame_gap
+            else:
+                # Unchanged cells keep their previous values
+                r0, r1, c0, c1 = box
+                prev_motion, prev_direction = self._raw_motion
+                sub_map, sub_direction = motion_map, direction_map
+                motion_map, direction_map = prev_motion.copy(), prev_direction.copy()
+                motion_map[r0:r1, c0:c1] = sub_map
+                direction_map[r0:r1, c0:c1] = sub_direction
+                motion_magnitude = float((motion_map * cell_pixels).sum() / max(cell_pixels.sum(), 1))
+        else:
+            motion_magnitude = 0.0
+            motion_map = np.zeros((self.rows, self.cols))
+            direction_map = np.zeros((self.rows, self.cols))
+        self._raw_motion = (motion_map, direction_map)
+
+        zones = {}
+        if layout is not None:
+            motion_map = np.where(valid, motion_map, np.nan)
+            direction_map = np.where(valid, direction_map, np.nan)
+            zones = layout.zone_stats(gray_frame, motion if box is None else None)
+            for name, stats in zones.items():
+                if box is not None:
+                    # Partial flow: zone motion from the merged cell map, weighted by zone pixels
+                    weights = layout.cell_pixels(self.rows, self.cols, name)
+                    stats["motion"] = float((self._raw_motion[0] * weights).sum() / max(weights.sum(), 1))
+                elif frame_gap > 1:
+                    stats["motion"] /= frame_gap
+
+        # No copy needed: pooled preprocessor outputs alternate between two buffers
+        self.prev_gray = gray_frame
+
+        self._last = {
+            "gray": gray_frame,
+            "density_map": density_map,
+            "density_maps": density_maps,
+            "density": density_value,
+            "motion": motion_magnitude,
+            "motion_map": motion_map,
+            "direction_map": direction_map,
+            "zones": zones,
+            "gated": False,
+        }
+        return self._last
+
+
+class FrameScorer:
+    """
+    Per-frame scoring stage: streaming anomaly detection (global + per-cell) and risk.
+    Shared by the dashboard system, the parallel replay and the multi-stream runner.
+    """
+
+    def __init__(self, anomaly_threshold=None):
+        self.anomaly_threshold = risk_classifier.ANOMALY_THRESHOLD if anomaly_threshold is None else anomaly_threshold
+        self.anomaly_detector = AnomalyDetector(
+            mode=getattr(config, 'ANOMALY_MODE', 'welford'),
+            half_life=getattr(config, 'ANOMALY_HALF_LIFE', 300),
+            window=getattr(config, 'ANOMALY_WINDOW', 300),
+        )
+
+    def score(self, density_value, motion_magnitude, density_map=None, motion_map=None):
+        """
+        Returns dict with anomaly score/flag, per-cell anomaly map, risk label and normalized risk.
+        A local surge in any cell raises the frame's anomaly score.
+        """
+        anomaly_score = self.anomaly_detector.compute_score(motion_magnitude, density_value)
+        cell_scores = None
+        if density_map is not None and motion_map is not None:
+            cell_scores = self.anomaly_detector.compute_cell_scores(density_map, motion_map)
+            # Cells masked out by ROI zones are NaN
+            scored = cell_scores[np.isfinite(cell_scores)]
+            if scored.size:
+                anomaly_score = max(anomaly_score, float(scored.max()))
+
+        risk_score = risk_classifier.combined_score(density_value, motion_magnitude)
+        risk_str = risk_classifier.classify_risk(risk_score)
+        risk_normalized = risk_classifier.normalize_risk(risk_str, density_value, motion_magnitude)
+
+        return {
+            "anomaly_score": anomaly_score,
+            "anomaly": anomaly_score > self.anomaly_threshold,
+            "cell_scores": cell_scores,
+            "risk": risk_str,
+            "risk_score": risk_normalized,
+        }
+
+    def score_zones(self, zones):
+        """Risk label and normalized risk for every zone of FrameAnalyzer.analyze()["zones"]."""
+        scored = {}
+        for name, stats in zones.items():
+            risk_score = risk_classifier.combined_score(stats["density"], stats["motion"])
+            risk_str = risk_classifier.classify_risk(risk_score)
+            scored[name] = dict(stats, risk=risk_str,
+                                risk_score=risk_classifier.normalize_risk(risk_str, stats["density"], stats["motion"]))
+        return scored
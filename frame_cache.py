@@ -0,0 +1,239 @@
+"""
+Decode-once frame cache for repeated analysis of the same footage.
+
+The first headless run over a clip stores every preprocessed grayscale frame
+(FrameAnalyzer.preprocess() output) in one raw uint8 file; later runs with the
+same preprocessing read them through np.memmap instead of decoding and
+preprocessing again, so the decode cost becomes page-cache reads. Grid sizes,
+flow tiers and detector settings are not part of the key - experiments that
+only vary those all share one entry.
+
+    <FRAME_CACHE_DIR>/<key>/frames.raw    (count, height, width) uint8
+    <FRAME_CACHE_DIR>/<key>/meta.json     source, params, shape, positions, last use
+
+key = sha1(video hash + preprocessing parameters + frame skip). The video hash
+covers the file size and 16 evenly spaced 64 KiB samples, so renamed or copied
+clips still hit and edited ones miss. Entries are written to a temporary
+directory and renamed when the clip was read to the end, so an interrupted run
+never leaves a partial entry. Least recently used entries are evicted to stay
+within FRAME_CACHE_BUDGET_MB.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+import config
+
+_HASH_SAMPLES = 16
+_HASH_SAMPLE_BYTES = 1 << 16
+
+
+def video_hash(path):
+    """Content hash from the file size and evenly spaced samples (no full read of long clips)."""
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, "rb") as f:
+        for i in range(_HASH_SAMPLES):
+            f.seek(max(size - _HASH_SAMPLE_BYTES, 0) * i // (_HASH_SAMPLES - 1))
+            digest.update(f.read(_HASH_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+def _write_json_atomic(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+class FrameCache:
+    """
+    Cache directory with an LRU disk budget.
+    open() returns a CachedVideo on a hit (None on a miss); writer() fills a new entry.
+    """
+
+    def __init__(self, root=None, budget_mb=None):
+        self.root = str(root or getattr(config, 'FRAME_CACHE_DIR', 'data/cache/frames'))
+        if budget_mb is None:
+            budget_mb = getattr(config, 'FRAME_CACHE_BUDGET_MB', 4096)
+        self.budget = int(budget_mb * (1 << 20))
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, video_path, params):
+        blob = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha1(f"{video_hash(video_path)}|{blob}".encode()).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.root, key)
+
+    def open(self, video_path, params):
+        """CachedVideo over the entry for this clip + params, or None if there is none."""
+        path = self._entry(self.key(video_path, params))
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta["last_used"] = time.time()
+        _write_json_atomic(meta_path, meta)
+        return CachedVideo(path, meta, video_path)
+
+    def writer(self, video_path, params, loader):
+        """FrameCacheWriter for a clip about to be decoded by `loader` (gives up if it outgrows the budget)."""
+        return FrameCacheWriter(self, self.key(video_path, params), video_path, params, loader)
+
+    def entries(self):
+        """(key, bytes, last_used) of every complete entry."""
+        found = []
+        for key in os.listdir(self.root):
+            meta_path = os.path.join(self._entry(key), "meta.json")
+            if not os.path.exists(meta_path):
+                continue
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            found.append((key, meta["bytes"], meta["last_used"]))
+        return found
+
+    def evict(self, keep=None):
+        """Delete least recently used entries (never `keep`) until the cache fits the budget."""
+        entries = sorted(self.entries(), key=lambda e: e[2])
+        total = sum(e[1] for e in entries)
+        removed = []
+        for key, size, _ in entries:
+            if total <= self.budget:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            total -= size
+            removed.append(key)
+        return removed
+
+    def stats(self):
+        entries = self.entries()
+        return {"entries": len(entries), "bytes": sum(e[1] for e in entries), "budget": self.budget}
+
+
+class FrameCacheWriter:
+    """
+    Appends preprocessed frames of one clip; commit() publishes the entry once the clip
+    was read to the end, abort() (or any unfinished run) discards it.
+    """
+
+    def __init__(self, cache, key, video_path, params, loader):
+        self.cache = cache
+        self.key = key
+        self.final_path = cache._entry(key)
+        self.path = f"{self.final_path}.tmp{os.getpid()}"
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+        self._file = open(os.path.join(self.path, "frames.raw"), "wb")
+        self.meta = {
+            "source": str(video_path),
+            "params": json.loads(json.dumps(params, default=str)),
+            "fps": loader.source_fps,
+            "source_size": [loader.source_width, loader.source_height],
+            "total_frames": loader.total_frames,
+            "shape": None,
+        }
+        self.positions = []
+        self.closed = False
+
+    def append(self, gray, position):
+        """Store one preprocess() output (source frame number `position`)."""
+        if self.closed:
+            return
+        shape = list(gray.shape)
+        if self.meta["shape"] is None:
+            self.meta["shape"] = shape
+        elif self.meta["shape"] != shape:
+            # Frame size changed mid-clip - not cacheable as one array
+            self.abort()
+            return
+        self._file.write(np.ascontiguousarray(gray, dtype=np.uint8).data)
+        self.positions.append(int(position))
+        if self._file.tell() > self.cache.budget:
+            print("ℹ️  Frame cache: clip is larger than FRAME_CACHE_BUDGET_MB - not cached")
+            self.abort()
+
+    def commit(self):
+        """The clip was read to the end: publish the entry and evict down to the budget."""
+        if self.closed:
+            return False
+        self._file.close()
+        self.closed = True
+        if not self.positions:
+            shutil.rmtree(self.path, ignore_errors=True)
+            return False
+        self.meta.update(count=len(self.positions), positions=self.positions,
+                         bytes=os.path.getsize(os.path.join(self.path, "frames.raw")), last_used=time.time())
+        _write_json_atomic(os.path.join(self.path, "meta.json"), self.meta)
+        try:
+            os.replace(self.path, self.final_path)
+        except OSError:
+            # Another run published the same entry first
+            shutil.rmtree(self.path, ignore_errors=True)
+            return False
+        self.cache.evict(keep=self.key)
+        return True
+
+    def abort(self):
+        if self.closed:
+            return
+        self._file.close()
+        self.closed = True
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class CachedVideo:
+    """
+    VideoLoader stand-in over a cache entry: read() returns zero-copy, read-only views of
+    the preprocessed frames (pass them to FrameAnalyzer.analyze(..., source_size=self.source_size)).
+    """
+
+    def __init__(self, path, meta, video_path):
+        self.video_path = video_path
+        self.meta = meta
+        self.source_fps = meta["fps"]
+        self.source_width, self.source_height = meta["source_size"]
+        self.source_size = (self.source_width, self.source_height)
+        self.total_frames = meta["total_frames"]
+        self.positions = np.asarray(meta["positions"], dtype=np.int64)
+        self.frames = np.asarray(np.memmap(os.path.join(path, "frames.raw"), dtype=np.uint8, mode="r",
+                                           shape=(meta["count"], *meta["shape"])))
+        self.frame_skip = meta["params"].get("frame_skip", 1)
+        self.prefetch = 0
+        self.live = False
+        self._next = 0
+        self.frame_count = 0
+        self.position = 0
+        self.frame_timestamp = None
+        print(f"✅ Frame cache hit: {video_path} ({meta['count']} preprocessed frames)")
+
+    def read(self):
+        if self._next >= len(self.frames):
+            return False, None
+        frame = self.frames[self._next]
+        self.position = self.frame_count = int(self.positions[self._next])
+        self.frame_timestamp = time.monotonic()
+        self._next += 1
+        return True, frame
+
+    def seek(self, frame_index):
+        """Continue after raw frame `frame_index` (same semantics as VideoLoader.seek)."""
+        self._next = int(np.searchsorted(self.positions, frame_index, side="right"))
+        self.frame_count = self.position = frame_index
+
+    def queued(self):
+        return 0
+
+    def release(self):
+        self.frames = self.frames[:0]
@@ -0,0 +1,116 @@
+"""
+Fixed-capacity NumPy ring buffers for per-frame time series.
+
+Every value is written twice, at slot i and i + capacity of a 2 x capacity
+array, so the newest n values are always one contiguous slice: windowed reads
+are zero-copy views and appends are O(1), with no list trimming and no
+list -> array conversion per render. Series can be scalars or per-cell grids.
+
+HistoryStore keeps several series that advance together (one record per
+frame); the system, dashboard and visualizer all read the same store.
+"""
+
+import numpy as np
+
+
+class RingHistory:
+    """
+    One typed series: RingHistory(150), RingHistory(150, shape=(10, 10), dtype=np.float32).
+    view(n) / h[-n:] return read-only views, oldest first, valid until the next append.
+    """
+
+    def __init__(self, capacity, shape=(), dtype=np.float64):
+        if capacity < 1:
+            raise ValueError("[ERROR] RingHistory capacity must be at least 1")
+        self.capacity = capacity
+        self.shape = tuple(shape)
+        self._data = np.zeros((2 * capacity,) + self.shape, dtype=dtype)
+        self._head = 0
+        self._count = 0
+
+    def append(self, value):
+        self._data[self._head] = value
+        self._data[self._head + self.capacity] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    def view(self, n=None):
+        """Newest n values (default: all), oldest first, as a contiguous read-only view."""
+        n = self._count if n is None else max(min(n, self._count), 0)
+        end = self._head + self.capacity
+        window = self._data[end - n:end]
+        window.flags.writeable = False
+        return window
+
+    def last(self, default=0.0):
+        return self._data[self._head + self.capacity - 1] if self._count else default
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def __iter__(self):
+        return iter(self.view())
+
+    def __array__(self, dtype=None, copy=None):
+        window = self.view()
+        return window.astype(dtype) if dtype is not None else window
+
+    def __getitem__(self, index):
+        # h[-1] -> newest value, h[-50:] -> view of the newest 50
+        if isinstance(index, slice) and index.step in (None, 1) and index.stop is None \
+                and index.start is not None and index.start < 0:
+            return self.view(-index.start)
+        return self.view()[index]
+
+
+class HistoryStore:
+    """
+    Named RingHistory series with one shared capacity, appended one record per frame:
+        store = HistoryStore(150, density=(), density_grid=((10, 10), np.float32))
+        store.append(density=0.4, density_grid=grid)
+        store["density"].view(50)
+    A series spec is a shape, or (shape, dtype).
+    """
+
+    def __init__(self, capacity, **series):
+        self.capacity = capacity
+        self.series = {}
+        for name, spec in series.items():
+            self.add_series(name, *(spec if len(spec) == 2 and isinstance(spec[0], tuple) else (spec,)))
+
+    def add_series(self, name, shape=(), dtype=np.float64):
+        self.series[name] = RingHistory(self.capacity, shape, dtype)
+        return self.series[name]
+
+    def append(self, **values):
+        """One record; series not given repeat their last value so all series stay aligned."""
+        for name, history in self.series.items():
+            if name in values:
+                history.append(values[name])
+            else:
+                history.append(history.last())
+
+    def clear(self):
+        for history in self.series.values():
+            history.clear()
+
+    def __getitem__(self, name):
+        return self.series[name]
+
+    def __contains__(self, name):
+        return name in self.series
+
+    def __len__(self):
+        return min((len(h) for h in self.series.values()), default=0)
@@ -0,0 +1,150 @@
+"""
+Real-time latency budget with progressive load shedding.
+
+The per-frame budget is frame_skip / source FPS. When the smoothed processing
+latency threatens the budget the shedder steps down a fixed degradation ladder:
+
+    1. render the dashboard less often (RENDER_EVERY x2, x4, ...)
+    2. cheaper motion tiers (pyramid -> warm -> sparse, i.e. smaller flow resolution)
+    3. raise the effective frame skip
+
+and steps back up once latency has stayed well under budget. Density and risk
+are computed on every processed frame at every level.
+"""
+
+import time
+from collections import deque
+
+from motion_analysis import MotionEngine
+
+
+class LoadShedder:
+    """
+    Hysteresis controller over a ladder of pipeline settings.
+    Each level is a dict with render_every, motion_tier and frame_skip.
+    """
+
+    def __init__(self, source_fps, render_every=1, motion_tier="full", frame_skip=1,
+                 headroom=0.9, recover_below=0.6, max_render_every=8, max_frame_skip=4,
+                 smoothing=0.2, hold_frames=None, metrics=None):
+        self.source_fps = source_fps if source_fps and source_fps > 0 else 25.0
+        self.headroom = headroom
+        self.recover_below = recover_below
+        self.smoothing = smoothing
+        # Frames to wait after a change before the next one (lets the EWMA settle)
+        self.hold_frames = hold_frames or max(int(self.source_fps // 2), 5)
+        self.metrics = metrics
+
+        self.levels = self._build_ladder(render_every, motion_tier, frame_skip, max_render_every, max_frame_skip)
+        self.level = 0
+        self.latency_ewma = None
+        self._frames_since_change = 0
+        self._recover_streak = 0
+
+        self.frames = 0
+        self.degraded_frames = 0
+        self.changes = 0
+        self.frames_per_level = [0] * len(self.levels)
+        self.decisions = deque(maxlen=100)
+
+    @staticmethod
+    def _build_ladder(render_every, motion_tier, frame_skip, max_render_every, max_frame_skip):
+        state = {"render_every": render_every, "motion_tier": motion_tier, "frame_skip": frame_skip}
+        levels = [dict(state)]
+
+        if render_every:
+            while state["render_every"] * 2 <= max_render_every:
+                state["render_every"] *= 2
+                levels.append(dict(state))
+
+        for tier in MotionEngine.TIERS[MotionEngine.TIERS.index(motion_tier) + 1:]:
+            state["motion_tier"] = tier
+            levels.append(dict(state))
+
+        while state["frame_skip"] < max_frame_skip:
+            state["frame_skip"] += 1
+            levels.append(dict(state))
+
+        return levels
+
+    @property
+    def state(self):
+        return self.levels[self.level]
+
+    @property
+    def budget(self):
+        """Seconds available per processed frame at the current skip."""
+        return self.state["frame_skip"] / self.source_fps
+
+    def update(self, latency):
+        """
+        Record one processed frame's latency (seconds).
+        Returns the new state dict when the level changed, otherwise None.
+        """
+        self.frames += 1
+        self.frames_per_level[self.level] += 1
+        if self.level > 0:
+            self.degraded_frames += 1
+            if self.metrics is not None:
+                self.metrics.inc("degraded_frames")
+
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += self.smoothing * (latency - self.latency_ewma)
+
+        self._frames_since_change += 1
+        if self._frames_since_change < self.hold_frames:
+            return None
+
+        budget = self.budget
+        if self.latency_ewma > budget * self.headroom and self.level < len(self.levels) - 1:
+            self._recover_streak = 0
+            return self._change(self.level + 1, "shed")
+
+        if self.latency_ewma < budget * self.recover_below and self.level > 0:
+            # Recover slowly: the lighter level must have been comfortably fast for a while
+            self._recover_streak += 1
+            if self._recover_streak >= 2 * self.hold_frames:
+                self._recover_streak = 0
+                return self._change(self.level - 1, "recover")
+        else:
+            self._recover_streak = 0
+        return None
+
+    def _change(self, level, action):
+        old = self.state
+        self.level = level
+        self._frames_since_change = 0
+        new = self.state
+
+        changed = ", ".join(f"{k} {old[k]}->{new[k]}" for k in new if new[k] != old[k])
+        decision = {
+            "time": time.time(),
+            "frame": self.frames,
+            "action": action,
+            "level": level,
+            "latency_ms": self.latency_ewma * 1000,
+            "budget_ms": self.budget * 1000,
+            "change": changed,
+        }
+        self.decisions.append(decision)
+        self.changes += 1
+        icon = "⚠️ " if action == "shed" else "✅"
+        print(f"\n{icon} Load shedding: {action} to level {level}/{len(self.levels) - 1} ({changed}) | "
+              f"latency {decision['latency_ms']:.1f} ms vs budget {decision['budget_ms']:.1f} ms")
+
+        if self.metrics is not None:
+            self.metrics.inc(f"{action}_events")
+            self.metrics.set_gauge("shed_level", level)
+        return new
+
+    def stats(self):
+        return {
+            "level": self.level,
+            "max_level": len(self.levels) - 1,
+            "frames": self.frames,
+            "degraded_ratio": self.degraded_frames / max(self.frames, 1),
+            "changes": self.changes,
+            "frames_per_level": list(self.frames_per_level),
+        }
@@ -3,44 +3,62 @@ Enhanced main.py that works with your existing code structure
 """
 
 import cv2
-import numpy as np
+import os
 import time
 from pathlib import Path
 
 # Your existing function-based imports
 from video_loader import VideoLoader
-from preprocessing import Preprocessor
+from video_writer import AsyncVideoWriter
+from frame_analysis import FrameAnalyzer, FrameScorer
 from visualizer import DashboardVisualizer
-from anomaly_detection import AnomalyDetector
-import density_estimation
-import motion_analysis
+from metrics import MetricsRegistry
+from load_shedding import LoadShedder
+from checkpoint import Checkpointer
+from metric_store import MetricStoreWriter, store_name
+from frame_cache import FrameCache
 import risk_classifier
 
 # Import the new dashboard
 from dashboard import CrowdSafetyDashboard
+from parallel_processing import process_video_parallel
+from shm_pipeline import process_video_shm
 
 import config
 
 
+def default_metric_store(video_path):
+    """METRIC_STORE_DIR/<video name>-<path hash>, or None when the store is off (or for cameras)."""
+    if not getattr(config, 'METRIC_STORE_DIR', None) or isinstance(video_path, int):
+        return None
+    return Path(config.METRIC_STORE_DIR) / store_name(video_path)
+
+
 class EnhancedCrowdSafetySystem:
     def __init__(self):
         """Initialize all components including dashboard"""
-        self.preprocessor = Preprocessor()
+        # Per-stage latency histograms and pipeline counters
+        self.metrics = MetricsRegistry(enabled=getattr(config, 'METRICS_ENABLED', True))
+        self.analyzer = FrameAnalyzer(metrics=self.metrics)
         self.visualizer = DashboardVisualizer()
-        self.anomaly_detector = AnomalyDetector()
+        self.scorer = FrameScorer()
         
         # Initialize dashboard with 150 frames of history
-        self.dashboard = CrowdSafetyDashboard(max_history=150)
+        self.dashboard = CrowdSafetyDashboard(max_history=150,
+                                              grid_shape=(self.analyzer.rows, self.analyzer.cols))
+        self.dashboard.metrics = self.metrics
         
         # Performance tracking
         self.fps = 0
         self.frame_count = 0
         self.prev_time = time.time()
         
-        # History tracking for metrics
-        self.density_history = []
-        self.risk_history = []
-        self.motion_history = []
+        # History tracking for metrics: the dashboard's ring buffers, shared with the visualizer
+        self.history = self.dashboard.history
+        
+        # Per-zone results (ROI zones from config) and high-risk frame counts
+        self.zone_scores = {}
+        self.zone_high_risk_frames = {}
         
     def calculate_fps(self):
         """Calculate current FPS"""
@@ -61,21 +79,22 @@ class EnhancedCrowdSafetySystem:
         
         # Convert risk_score (0-1) for comparisons
         risk_normalized = risk_score if isinstance(risk_score, (int, float)) else 0.5
+        fired = risk_classifier.alert_rules(risk_normalized, density, motion_magnitude, anomaly_detected)
         
         # Critical risk alert
-        if risk_normalized > 0.85:
+        if "critical" in fired:
             self.dashboard.add_alert(
                 'CRITICAL RISK', 
                 'high',
                 f'EMERGENCY: Risk level at {risk_normalized:.0%}!'
             )
-        elif risk_normalized > 0.7:
+        elif "high" in fired:
             self.dashboard.add_alert(
                 'High Risk',
                 'high',
                 f'High crowd risk detected: {risk_normalized:.0%}'
             )
-        elif risk_normalized > 0.5:
+        elif "moderate" in fired:
             self.dashboard.add_alert(
                 'Moderate Risk',
                 'medium',
@@ -83,7 +102,7 @@ class EnhancedCrowdSafetySystem:
             )
         
         # Density alerts
-        if density > 0.8:
+        if "density" in fired:
             self.dashboard.add_alert(
                 'High Density',
                 'high',
@@ -91,7 +110,7 @@ class EnhancedCrowdSafetySystem:
             )
         
         # Motion alerts
-        if motion_magnitude > 15.0:  # Adjusted threshold for your motion values
+        if "motion" in fired:
             self.dashboard.add_alert(
                 'High Motion',
                 'medium',
@@ -99,46 +118,200 @@ class EnhancedCrowdSafetySystem:
             )
         
         # Anomaly alert
-        if anomaly_detected:
+        if "anomaly" in fired:
             self.dashboard.add_alert(
                 'Anomaly Detected',
                 'medium',
                 'Unusual crowd behavior pattern'
             )
     
+    def generate_zone_alerts(self, zone_scores):
+        """Per-zone alerts, so operators know where in the frame the risk is"""
+        for name, zone in zone_scores.items():
+            label = name.replace('_', ' ')
+            if zone["risk_score"] > 0.7:
+                self.dashboard.add_alert(
+                    f'Zone Risk: {label}',
+                    'high',
+                    f'{label}: risk {zone["risk_score"]:.0%}, density {zone["density"]:.0%}'
+                )
+            elif zone["risk_score"] > 0.5:
+                self.dashboard.add_alert(
+                    f'Zone Caution: {label}',
+                    'medium',
+                    f'{label}: risk {zone["risk_score"]:.0%}'
+                )
+    
     def normalize_risk(self, risk_str, density, motion):
         """Convert risk string to normalized 0-1 value"""
-        if isinstance(risk_str, (int, float)):
-            return risk_str
-        
-        # Convert string risk to numerical
-        if risk_str == "HIGH":
-            base = 0.75
-        elif risk_str == "MEDIUM":
-            base = 0.5
-        else:  # LOW
-            base = 0.25
-        
-        # Adjust based on density and motion
-        adjustment = (density * 0.3 + min(motion / 20.0, 1.0) * 0.2)
-        return min(base + adjustment, 1.0)
+        return risk_classifier.normalize_risk(risk_str, density, motion)
     
-    def process_video(self, video_path, output_path=None, display=True):
-        """Process video with enhanced dashboard visualization"""
+    def score_frame(self, analysis):
+        """Anomaly (global + per-cell) and risk scoring for one frame's analysis"""
+        scores = self.scorer.score(
+            analysis["density"], analysis["motion"],
+            analysis["density_map"], analysis["motion_map"]
+        )
+        return scores["anomaly_score"], scores["anomaly"], scores["risk"], scores["risk_score"]
+    
+    def analyze_frame(self, frame, frame_gap=1, source_size=None):
+        """
+        Analysis, scoring, dashboard metrics and alerts for one frame
+        (source_size: `frame` is already preprocessed, see FrameAnalyzer.analyze).
+        Returns dict with the analysis, anomaly / risk results, FPS and the alerts raised on this frame.
+        """
+        metrics = self.metrics
+        
+        # Preprocessing, density and motion (motion normalized to px per source frame)
+        analysis = self.analyzer.analyze(frame, frame_gap=frame_gap, source_size=source_size)
+        density_value = analysis["density"]
+        motion_magnitude = analysis["motion"]
+        
+        # Anomaly detection + risk classification
+        with metrics.stage("scoring"):
+            anomaly_score, anomaly_detected, risk_str, risk_normalized = self.score_frame(analysis)
+        
+        # Calculate FPS
+        current_fps = self.calculate_fps()
+        metrics.set_gauge("fps", round(current_fps, 2))
+        
+        # Update dashboard metrics
+        self.dashboard.update_metrics(
+            density=density_value,
+            risk_level=risk_normalized,
+            motion_magnitude=motion_magnitude / 20.0,  # Normalize to 0-1
+            anomaly_detected=anomaly_detected,
+            fps=current_fps,
+            density_map=analysis["density_map"],
+            motion_map=analysis["motion_map"]
+        )
+        
+        # Generate alerts
+        alerts_before = self.dashboard.alert_count
+        with metrics.stage("alerts"):
+            self.generate_alerts(
+                density_value, 
+                risk_normalized, 
+                anomaly_detected,
+                motion_magnitude
+            )
+            
+            # ROI zones: per-zone density / motion / risk
+            if analysis["zones"]:
+                self.zone_scores = self.scorer.score_zones(analysis["zones"])
+                for name, zone in self.zone_scores.items():
+                    if zone["risk_score"] > 0.7:
+                        self.zone_high_risk_frames[name] = self.zone_high_risk_frames.get(name, 0) + 1
+                self.generate_zone_alerts(self.zone_scores)
+        new_alerts = self.dashboard.alert_count - alerts_before
+        
+        return {
+            "analysis": analysis,
+            "density": density_value,
+            "motion": motion_magnitude,
+            "anomaly_score": anomaly_score,
+            "anomaly": anomaly_detected,
+            "risk": risk_str,
+            "risk_score": risk_normalized,
+            "fps": current_fps,
+            "alerts": self.dashboard.current_alerts[-new_alerts:] if new_alerts else [],
+        }
+    
+    @staticmethod
+    def frame_record(frame_num, position, source_fps, result):
+        """Per-frame metrics record (on_frame callbacks, metric store, batch CSV) from analyze_frame() output"""
+        return {
+            "frame": frame_num,
+            "position": position,
+            "time": (position - 1) / max(source_fps, 1e-6),   # positions are 1-based: first frame at 0 s
+            "density": float(result["density"]),
+            "motion": float(result["motion"]),
+            "anomaly_score": float(result["anomaly_score"]),
+            "anomaly": bool(result["anomaly"]),
+            "risk": result["risk"],
+            "risk_score": float(result["risk_score"]),
+        }
+    
+    def render_frame(self, frame, density_value, motion_magnitude, risk_normalized, current_fps,
+                     model_accuracy=92.5):
+        """Build the full 1920x1080 dashboard frame (only called when rendering is attached)"""
+        # Create visualization using your existing visualizer
+        vis_frame = self.visualizer.create_pro_dashboard(
+            frame, 
+            density_value,
+            motion_magnitude,
+            risk_normalized,
+            current_fps,
+            self.history["density"],
+            self.history["risk"],
+            model_accuracy,
+            size=self.dashboard.VIDEO_SIZE
+        )
+        
+        # Render complete dashboard with visualization
+        return self.dashboard.render_dashboard(vis_frame, model_accuracy)
+    
+    def process_video(self, video_path, output_path=None, display=True, render_every=None, headless=None,
+                      realtime=None, live=None, on_frame=None, checkpoint=None, resume=None,
+                      metric_store=None, frame_cache=None):
+        """
+        Process video with enhanced dashboard visualization.
+        render_every: render the dashboard on 1 of every N frames (0 = never)
+        headless: analytics only - no dashboard frames, no window, no video output
+        realtime: keep up with the source FPS by shedding load (render rate, motion tier, frame skip)
+        live: always analyze the newest captured frame, dropping older ones (cameras / real-time replay)
+        on_frame: optional callback receiving one metrics record (dict) per analyzed frame
+        checkpoint: checkpoint file saved every CHECKPOINT_EVERY frames (default CHECKPOINT_PATH, None = off)
+        resume: continue from the checkpoint - None = only if it was saved for this same source
+                by a run that did not reach the end, True = always (e.g. a live stream moved from another node), False = start over
+        metric_store: directory for the per-frame metric store (default METRIC_STORE_DIR/<video name>-<path hash>
+                      when METRIC_STORE_DIR is set, False = off)
+        frame_cache: reuse / fill the decode-once frame cache (default FRAME_CACHE); headless file runs only
+        Returns a run summary dict (None if the video could not be opened).
+        """
+        if headless is None:
+            headless = getattr(config, 'HEADLESS', False)
+        if realtime is None:
+            realtime = getattr(config, 'REALTIME', False)
+        if live is None:
+            live = getattr(config, 'LIVE', False)
+        if render_every is None:
+            render_every = getattr(config, 'RENDER_EVERY', 1)
+        if headless:
+            render_every = 0
+            display = False
+            output_path = None
+        
+        # Frame cache: analytics-only replays of a file can skip decode + preprocessing entirely
+        if frame_cache is None:
+            frame_cache = getattr(config, 'FRAME_CACHE', False)
+        cache = cache_writer = video_loader = None
+        if frame_cache and not render_every and not live and not realtime and not isinstance(video_path, int) \
+                and os.path.exists(video_path):
+            cache = FrameCache()
+            cache_params = dict(self.analyzer.preprocess_params(), frame_skip=getattr(config, 'FRAME_SKIP', 1))
+            video_loader = cache.open(video_path, cache_params)
+        cached = video_loader is not None
+        
         # Load video - initialize VideoLoader with path
-        try:
-            video_loader = VideoLoader(video_path)
-        except Exception as e:
-            print(f"Error: Could not load video from {video_path}")
-            print(f"Details: {e}")
-            return
-        
-        # Get video properties from the VideoLoader's cap
-        cap = video_loader.cap
-        fps_original = int(cap.get(cv2.CAP_PROP_FPS))
-        frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if not cached:
+            try:
+                video_loader = VideoLoader(video_path, frame_skip=getattr(config, 'FRAME_SKIP', 1),
+                                           prefetch=getattr(config, 'PREFETCH_DEPTH', 0), pool=self.analyzer.pool,
+                                           live=live)
+            except Exception as e:
+                print(f"Error: Could not load video from {video_path}")
+                print(f"Details: {e}")
+                return
+            if cache is not None:
+                cache_writer = cache.writer(video_path, cache_params, video_loader)
+        source_size = (video_loader.source_width, video_loader.source_height)
+        
+        # Get video properties from the VideoLoader
+        fps_original = int(video_loader.source_fps)
+        frame_width = video_loader.source_width
+        frame_height = video_loader.source_height
+        total_frames = video_loader.total_frames
         
         print(f"Processing video: {video_path}")
         print(f"Resolution: {frame_width}x{frame_height}")
@@ -146,150 +319,298 @@ class EnhancedCrowdSafetySystem:
         print(f"Total frames: {total_frames}")
         print("-" * 50)
         
-        # Setup video writer if output path provided
-        if output_path:
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            # Dashboard output is 1920x1080
-            out = cv2.VideoWriter(output_path, fourcc, fps_original, (1920, 1080))
+        print(f"Mode: {'headless (analytics only)' if not render_every else f'render 1/{render_every} frames'}")
+        if live:
+            print("Live capture: analyzing the newest frame only (older frames are dropped)")
+        
+        # Setup video writer if output path provided (encodes on its own thread)
+        out = None
+        if output_path and render_every:
+            # Dashboard is 1920x1080; output size / rate are configured separately
+            out = AsyncVideoWriter(
+                output_path,
+                fps=getattr(config, 'OUTPUT_FPS', None) or max(fps_original / render_every, 1),
+                size=getattr(config, 'OUTPUT_SIZE', None) or (1920, 1080),
+                backend=getattr(config, 'OUTPUT_BACKEND', 'opencv'),
+                queue_size=getattr(config, 'WRITER_QUEUE_SIZE', 8),
+                policy=getattr(config, 'WRITER_POLICY', 'block'),
+                pool=self.analyzer.pool,
+            )
+        
+        metrics = self.metrics
+        metrics_port = getattr(config, 'METRICS_PORT', 0)
+        if metrics_port and metrics.enabled:
+            metrics.start_http_server(metrics_port, getattr(config, 'METRICS_HOST', '127.0.0.1'))
+        
+        # Real-time mode: per-frame latency budget from the source FPS
+        shedder = None
+        if realtime:
+            shedder = LoadShedder(
+                video_loader.source_fps,
+                render_every=render_every,
+                motion_tier=self.analyzer.motion_engine.tier,
+                frame_skip=video_loader.frame_skip,
+                headroom=getattr(config, 'REALTIME_HEADROOM', 0.9),
+                max_render_every=getattr(config, 'SHED_MAX_RENDER_EVERY', 8),
+                # Live capture already drops stale frames - raising the skip would only discard fresh ones
+                max_frame_skip=video_loader.frame_skip if live else getattr(config, 'SHED_MAX_FRAME_SKIP', 4),
+                metrics=metrics,
+            )
+            print(f"Real-time budget: {shedder.budget * 1000:.1f} ms/frame | {len(shedder.levels) - 1} shedding levels")
+        
+        # The window scales the 1920x1080 dashboard itself - no per-frame resize for display
+        window_name = 'Crowd Safety AI Dashboard'
+        if display:
+            cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+            cv2.resizeWindow(window_name, getattr(config, 'FRAME_WIDTH', 1280), getattr(config, 'FRAME_HEIGHT', 720))
         
         frame_num = 0
-        prev_gray = None
+        last_position = 0
+        run_start = time.perf_counter()
+        self.analyzer.reset()
+        
+        # Checkpoints: restore detector baseline, counters and histories, then seek past the saved frame
+        checkpointer = None
+        if checkpoint is None:
+            checkpoint = getattr(config, 'CHECKPOINT_PATH', None)
+        if checkpoint:
+            checkpointer = Checkpointer(checkpoint, every=getattr(config, 'CHECKPOINT_EVERY', 500))
+            if checkpointer.exists() and resume is not False:
+                meta, arrays = checkpointer.load()
+                if meta.get("complete") and not resume:
+                    # The previous run reached the end of the stream - nothing left to resume
+                    print(f"Checkpoint {checkpoint} is from a finished run - starting from frame 0")
+                elif resume or meta["source"] == str(video_path):
+                    checkpointer.restore(self, meta, arrays)
+                    frame_num = meta["frame_num"]
+                    last_position = meta["position"]
+                    if not live and not isinstance(video_path, int):
+                        video_loader.seek(last_position)
+                    if cache_writer is not None:
+                        # A partial read cannot fill the cache
+                        cache_writer.abort()
+                        cache_writer = None
+                    print(f"Resumed from checkpoint: frame {frame_num} (source frame {last_position})")
+                else:
+                    print(f"Checkpoint {checkpoint} belongs to {meta['source']} - starting from frame 0")
+        saved_frame = frame_num
+        
+        # Per-frame metrics + risk interval index for instant segment queries after the run
+        store = None
+        if metric_store is None:
+            metric_store = default_metric_store(video_path)
+        if metric_store:
+            store = MetricStoreWriter(metric_store, video_path, video_loader.source_fps,
+                                      (self.analyzer.rows, self.analyzer.cols), start_row=frame_num)
         model_accuracy = 92.5  # Mock accuracy for visualization
+        finished = False
         
         try:
             while True:
+                # Latency clock starts before read(), so decode (or waiting on prefetch) counts
+                frame_start = time.monotonic()
                 # Use VideoLoader's read method
-                ret, frame = video_loader.read()
+                with metrics.stage("decode"):
+                    ret, frame = video_loader.read()
                 if not ret:
+                    # Read to the end: the frames seen so far are the whole clip
+                    finished = True
+                    if cache_writer is not None and cache_writer.commit():
+                        print(f"\nFrame cache: stored {len(cache_writer.positions)} frames | {cache.stats()}")
                     break
                 
+                if live and video_loader.frame_timestamp is not None:
+                    # Live: from the frame's capture (the wait for the next grab is idle time, not work)
+                    frame_start = video_loader.frame_timestamp
+                waited = 0.0
                 frame_num += 1
+                frame_gap = video_loader.position - last_position
+                last_position = video_loader.position
+                metrics.inc("frames_processed")
+                metrics.set_gauge("prefetch_queue_depth", video_loader.queued())
                 
-                # Preprocess frame
-                gray_frame = self.preprocessor.process(frame)
-                
-                # Density estimation using your function
-                rows, cols = 10, 10
-                density_map = density_estimation.estimate_density(gray_frame, rows, cols)
-                density_value = np.mean(density_map)
-                
-                # Motion analysis using your function
-                if prev_gray is not None:
-                    motion_magnitude = motion_analysis.compute_motion(prev_gray, gray_frame)
+                # Preprocessing, density and motion (motion normalized to px per source frame)
+                if cached:
+                    result = self.analyze_frame(frame, frame_gap=frame_gap, source_size=source_size)
+                elif cache_writer is not None:
+                    gray = self.analyzer.preprocess(frame)
+                    cache_writer.append(gray, video_loader.position)
+                    result = self.analyze_frame(gray, frame_gap=frame_gap, source_size=source_size)
                 else:
-                    motion_magnitude = 0.0
-                
-                prev_gray = gray_frame.copy()
-                
-                # Anomaly detection
-                anomaly_score = self.anomaly_detector.compute_score(motion_magnitude, density_value)
-                anomaly_detected = anomaly_score > 0.7  # Threshold for anomaly
-                
-                # Risk classification using your function
-                # Create a combined score for risk classification
-                risk_score = (density_value * 0.6 + min(motion_magnitude / 20.0, 1.0) * 0.4)
-                risk_str = risk_classifier.classify_risk(risk_score)
-                risk_normalized = self.normalize_risk(risk_str, density_value, motion_magnitude)
+                    result = self.analyze_frame(frame, frame_gap=frame_gap)
+                analysis = result["analysis"]
+                density_value, motion_magnitude = result["density"], result["motion"]
+                risk_str, risk_normalized = result["risk"], result["risk_score"]
+                current_fps = result["fps"]
                 
-                # Update history
-                self.density_history.append(density_value)
-                self.risk_history.append(risk_normalized)
-                self.motion_history.append(motion_magnitude)
+                # Capture-to-alert latency: from the moment the frame was grabbed to its alert
+                if result["alerts"] and video_loader.frame_timestamp is not None:
+                    metrics.observe("capture_to_alert", time.monotonic() - video_loader.frame_timestamp)
+                if live:
+                    metrics.set_gauge("capture_dropped_frames", video_loader.frames_dropped)
                 
-                # Keep history length manageable
-                if len(self.density_history) > 150:
-                    self.density_history.pop(0)
-                    self.risk_history.pop(0)
-                    self.motion_history.pop(0)
-                
-                # Calculate FPS
-                current_fps = self.calculate_fps()
-                
-                # Update dashboard metrics
-                self.dashboard.update_metrics(
-                    density=density_value,
-                    risk_level=risk_normalized,
-                    motion_magnitude=motion_magnitude / 20.0,  # Normalize to 0-1
-                    anomaly_detected=anomaly_detected,
-                    fps=current_fps
-                )
-                
-                # Generate alerts
-                self.generate_alerts(
-                    density_value, 
-                    risk_normalized, 
-                    anomaly_detected,
-                    motion_magnitude
-                )
-                
-                # Create visualization using your existing visualizer
-                vis_frame = self.visualizer.create_pro_dashboard(
-                    frame, 
-                    density_value,
-                    motion_magnitude,
-                    risk_normalized,
-                    current_fps,
-                    self.density_history,
-                    self.risk_history,
-                    model_accuracy
-                )
+                if on_frame is not None or store is not None:
+                    record = self.frame_record(frame_num, video_loader.position, video_loader.source_fps, result)
+                    if on_frame is not None:
+                        on_frame(record)
+                    if store is not None:
+                        store.append(record, analysis["density_map"], result["alerts"])
                 
-                # Render complete dashboard with visualization
-                dashboard_frame = self.dashboard.render_dashboard(vis_frame, model_accuracy)
-                
-                # Display
-                if display:
-                    # Resize for display if too large
-                    display_frame = cv2.resize(dashboard_frame, (1280, 720))
-                    cv2.imshow('Crowd Safety AI Dashboard', display_frame)
+                # Rendering is an optional consumer: 1 of every N frames, never in headless mode
+                if render_every and frame_num % render_every == 0:
+                    with metrics.stage("render"):
+                        dashboard_frame = self.render_frame(
+                            frame, density_value, motion_magnitude, risk_normalized, current_fps, model_accuracy
+                        )
                     
-                    wait_time = max(1, int(1000 / fps_original))
-                    key = cv2.waitKey(wait_time) & 0xFF
+                    # Display
+                    if display:
+                        with metrics.stage("display"):
+                            cv2.imshow(window_name, dashboard_frame)
+                        
+                        # Real-time / live modes never sleep: the source sets the pace
+                        wait_time = 1 if realtime or live else max(1, int(1000 * render_every / max(fps_original, 1)))
+                        wait_start = time.perf_counter()
+                        key = cv2.waitKey(wait_time) & 0xFF
+                        waited = time.perf_counter() - wait_start
 
-                    if key == ord('q'):
-                        print("\nStopping video processing...")
-                        break
-                    elif key == ord('p'):
-                        print("Paused. Press any key to continue...")
-                        cv2.waitKey(0)
+                        if key == ord('q'):
+                            print("\nStopping video processing...")
+                            break
+                        elif key == ord('p'):
+                            print("Paused. Press any key to continue...")
+                            cv2.waitKey(0)
+                    
+                    # Write to output
+                    if out is not None:
+                        with metrics.stage("write"):
+                            if not out.write(dashboard_frame):
+                                metrics.inc("frames_dropped")
+                        metrics.set_gauge("writer_queue_depth", out.queued())
+                
+                # Load shedding: compare this frame's work (excluding display pacing) with the budget
+                if shedder is not None:
+                    new_state = shedder.update(time.monotonic() - frame_start - waited)
+                    if new_state is not None:
+                        render_every = new_state["render_every"]
+                        self.analyzer.motion_engine.set_tier(new_state["motion_tier"])
+                        video_loader.frame_skip = new_state["frame_skip"]
+                
+                if checkpointer is not None and checkpointer.due(frame_num):
+                    with metrics.stage("checkpoint"):
+                        if store is not None:
+                            # Rows up to the checkpoint must be on disk before it is
+                            store.flush()
+                        checkpointer.save(self, video_loader, frame_num)
+                    saved_frame = frame_num
                 
-                # Write to output
-                if output_path:
-                    out.write(dashboard_frame)
+                # Steady state should allocate no frame buffers at all
+                if self.analyzer.pool is not None:
+                    self.analyzer.pool.end_frame()
                 
                 # Progress indicator
                 if frame_num % 30 == 0:
-                    progress = (frame_num / total_frames) * 100
+                    progress = (video_loader.position / max(total_frames, 1)) * 100
                     print(f"Progress: {progress:.1f}% | "
                           f"FPS: {current_fps:.1f} | "
                           f"Risk: {risk_str} ({risk_normalized:.2f})", end='\r')
+            
+            # Clean stop (end of stream or 'q'): checkpoint the final state too
+            if checkpointer is not None and frame_num > saved_frame:
+                checkpointer.save(self, video_loader, frame_num, complete=finished)
         
         except KeyboardInterrupt:
             print("\n\nProcessing interrupted by user")
         
         finally:
             # Cleanup
+            queue_stats = video_loader.queue_stats() if video_loader.prefetch > 0 else None
+            live_stats = video_loader.live_stats() if live else None
             video_loader.release()
-            if output_path:
+            if cache_writer is not None:
+                cache_writer.abort()
+            writer_stats = None
+            if out is not None:
                 out.release()
-            cv2.destroyAllWindows()
+                writer_stats = out.stats()
+            if display:
+                cv2.destroyAllWindows()
+            metrics.stop_http_server()
+            if store is not None:
+                store.close()
             
             print("\n" + "=" * 50)
             print("PROCESSING COMPLETE")
             print(f"Total frames processed: {frame_num}")
-            print(f"Average FPS: {np.mean(self.dashboard.fps_history) if self.dashboard.fps_history else 0:.2f}")
+            print(f"Average FPS: {self.dashboard.fps_history.view().mean() if self.dashboard.fps_history else 0:.2f}")
             print(f"High risk frames: {self.dashboard.high_risk_frames}")
             print(f"Anomalies detected: {self.dashboard.anomaly_count}")
+            for name, zone in self.zone_scores.items():
+                print(f"Zone {name}: density {zone['density']:.2f} | motion {zone['motion']:.2f} | "
+                      f"risk {zone['risk']} | high risk frames {self.zone_high_risk_frames.get(name, 0)}")
+            if queue_stats:
+                print(f"Prefetch queue: avg {queue_stats['avg_occupancy']:.1f}/{queue_stats['depth']} | "
+                      f"empty on {queue_stats['empty_ratio']:.0%} of reads | "
+                      f"decoder blocked {queue_stats['decoder_blocked']}x")
+            if checkpointer is not None and checkpointer.saves:
+                checkpoint_stats = checkpointer.stats()
+                print(f"Checkpoints: {checkpoint_stats['saves']} saved to {checkpointer.path} | "
+                      f"{checkpoint_stats['avg_ms']:.1f} ms each | {checkpoint_stats['bytes'] / 1024:.0f} KB")
+            if store is not None:
+                print(f"Metric store: {store.rows} frames in {store.path}")
+            if live_stats:
+                print(f"Live capture: {live_stats['grabbed']} grabbed | {live_stats['delivered']} analyzed | "
+                      f"{live_stats['dropped']} dropped ({live_stats['drop_ratio']:.0%})")
+            if writer_stats:
+                print(f"Video writer ({writer_stats['backend']}): {writer_stats['written']} written | "
+                      f"{writer_stats['dropped']} dropped | {writer_stats['avg_encode_ms']:.1f} ms/frame")
+            if self.analyzer.gate is not None:
+                gate_stats = self.analyzer.gate.stats()
+                print(f"Change gate: {gate_stats['skipped_ratio']:.0%} of frames skipped | "
+                      f"{gate_stats['computed_cell_ratio']:.0%} of cells recomputed")
+            if self.analyzer.pool is not None:
+                pool_stats = self.analyzer.pool.stats()
+                print(f"Buffer pool: {pool_stats['buffers']} buffers ({pool_stats['bytes'] / 2**20:.1f} MB) | "
+                      f"{pool_stats['allocations']} allocations | last frame {pool_stats['last_frame_allocations']}")
+            if shedder is not None:
+                shed_stats = shedder.stats()
+                print(f"Load shedding: {shed_stats['changes']} changes | "
+                      f"degraded {shed_stats['degraded_ratio']:.0%} of frames | "
+                      f"final level {shed_stats['level']}/{shed_stats['max_level']}")
+            if metrics.enabled and metrics.histograms:
+                print("Stage latency (ms):     p50      p95      p99")
+                for name, p50, p95, p99, _ in metrics.stage_summary():
+                    print(f"  {name:18s} {p50:8.2f} {p95:8.2f} {p99:8.2f}")
             print("=" * 50)
+        
+        seconds = time.perf_counter() - run_start
+        return {
+            "frames": frame_num,
+            "seconds": seconds,
+            "fps": frame_num / max(seconds, 1e-6),
+            "high_risk_frames": self.dashboard.high_risk_frames,
+            "anomalies": self.dashboard.anomaly_count,
+        }
 
 
 def main():
     """Main execution function"""
+    # Input video path
+    video_path = getattr(config, 'VIDEO_PATH', 'data/videos/merged_crowd_demo.mp4')
+    
+    # Offline archive mode: analysis only, spread across a process pool
+    workers = getattr(config, 'PARALLEL_WORKERS', 0)
+    if workers:
+        process_video_parallel(video_path, workers=workers, frame_skip=getattr(config, 'FRAME_SKIP', 1))
+        return
+    
     # Initialize system
     system = EnhancedCrowdSafetySystem()
     
-    # Input video path
-    video_path = getattr(config, 'VIDEO_PATH', 'data/videos/merged_crowd_demo.mp4')
+    # Server nodes: analytics only, no display and no dashboard video
+    if getattr(config, 'HEADLESS', False):
+        system.process_video(video_path=video_path, headless=True)
+        return
     
     # Output path
     output_dir = Path(getattr(config, 'OUTPUT_DIR', 'data/outputs'))
@@ -302,6 +623,14 @@ def main():
     print(f"Input: {video_path}")
     print(f"Output: {output_path}")
     print("=" * 50)
+    
+    # Multi-core single-camera mode: decode / analysis / render+encode processes, no window
+    if getattr(config, 'SHM_PIPELINE', False):
+        process_video_shm(video_path, output_path=str(output_path), system=system,
+                          metric_store=default_metric_store(video_path))
+        print(f"\nOutput saved to: {output_path}")
+        return
+    
     print("\nControls:")
     print("  Q - Quit")
     print("  P - Pause/Resume")
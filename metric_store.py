@@ -0,0 +1,379 @@
+"""
+Per-video metric store: columnar, memory-mappable per-frame metrics.
+
+A store is a directory:
+    meta.json          source, fps, grid shape, column dtypes / shapes
+    <column>.bin       one raw little-endian array per column, appended frame by frame
+    alerts.jsonl       alert events (frame, time, type, severity, message)
+    risk_index.npz     risk-level intervals (start / end row, level, times, peak risk)
+
+Columns are opened with np.memmap, so queries over hours of metrics only touch
+the columns they need. The row count comes from the column file sizes, so a
+store cut short by a crash is still readable (the index is rebuilt on open if
+it is missing or stale).
+
+    store = MetricStore("data/outputs/metrics/platform_cam-1a2b3c4d")
+    segments = store.segments(min_risk=0.7, min_duration=5.0)
+    store.cut_clips(segments, "data/outputs/clips")
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import cv2
+import numpy as np
+
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH")
+
+# name -> dtype; per-cell density grids are added with the grid shape
+COLUMNS = {
+    "frame": np.int32,           # analyzed frame number (1-based)
+    "position": np.int64,        # source frame number (1-based, includes skipped frames)
+    "time": np.float64,          # seconds into the source
+    "density": np.float32,
+    "motion": np.float32,
+    "anomaly_score": np.float32,
+    "risk_score": np.float32,
+    "risk_level": np.uint8,      # index into RISK_LEVELS
+    "alert_count": np.uint16,    # alerts raised on this frame (details in alerts.jsonl)
+}
+
+
+def _write_json_atomic(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def store_name(video_path):
+    """Default store directory name: clip name plus a short path hash (equal names in different folders)."""
+    path = os.path.abspath(str(video_path))
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{stem}-{hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _is_store(path):
+    """True if `path` holds a metric store (a meta.json in this format)."""
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return isinstance(meta, dict) and "columns" in meta and "risk_levels" in meta
+
+
+def level_intervals(levels):
+    """Run-length intervals of a level column: (starts, ends (exclusive), values)."""
+    levels = np.asarray(levels)
+    if levels.size == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, levels[:0]
+    change = np.flatnonzero(levels[1:] != levels[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [levels.size]))
+    return starts, ends, levels[starts]
+
+
+class MetricStoreWriter:
+    """
+    Appends one row per analyzed frame; columns are buffered in chunks and flushed
+    to their .bin files, so a run costs one small write per column per chunk.
+    start_row: keep the first N rows of an existing store and continue after them
+               (resume from a checkpoint); 0 = start a new store.
+    """
+
+    def __init__(self, path, source, fps, grid_shape, start_row=0, chunk=256):
+        self.path = str(path)
+        self.chunk = chunk
+        self.grid_shape = tuple(grid_shape)
+        self.columns = dict(COLUMNS, density_grid=np.float32)
+        self.shapes = {name: () for name in COLUMNS}
+        self.shapes["density_grid"] = self.grid_shape
+
+        existing = _is_store(self.path)
+        if start_row and existing:
+            self._truncate(start_row)
+        else:
+            start_row = 0
+            # Only ever replace a previous store - never some other directory passed by mistake
+            if existing:
+                shutil.rmtree(self.path)
+            elif os.path.exists(self.path) and (not os.path.isdir(self.path) or os.listdir(self.path)):
+                raise ValueError(f"[ERROR] {self.path} exists and is not a metric store - refusing to overwrite it")
+            os.makedirs(self.path, exist_ok=True)
+
+        self.meta = {
+            "source": str(source),
+            "fps": float(fps),
+            "grid_shape": list(self.grid_shape),
+            "risk_levels": list(RISK_LEVELS),
+            "columns": {name: {"dtype": np.dtype(dtype).str, "shape": list(self.shapes[name])}
+                        for name, dtype in self.columns.items()},
+        }
+        _write_json_atomic(os.path.join(self.path, "meta.json"), self.meta)
+
+        self.rows = start_row
+        self._buffers = {name: np.zeros((chunk,) + self.shapes[name], dtype=dtype)
+                         for name, dtype in self.columns.items()}
+        self._fill = 0
+        self._alerts = open(os.path.join(self.path, "alerts.jsonl"), "a")
+
+    def _truncate(self, rows):
+        """Drop rows written after the checkpoint the run resumes from."""
+        with open(os.path.join(self.path, "meta.json")) as f:
+            meta = json.load(f)
+        for name, spec in meta["columns"].items():
+            row_bytes = np.dtype(spec["dtype"]).itemsize * int(np.prod(spec["shape"], dtype=np.int64))
+            column = os.path.join(self.path, f"{name}.bin")
+            if os.path.exists(column):
+                with open(column, "r+b") as f:
+                    f.truncate(min(os.path.getsize(column), rows * row_bytes))
+        alerts = os.path.join(self.path, "alerts.jsonl")
+        if os.path.exists(alerts):
+            with open(alerts) as f:
+                kept = [line for line in f if json.loads(line)["frame"] <= rows]
+            with open(alerts, "w") as f:
+                f.writelines(kept)
+
+    def append(self, record, density_grid, alerts=()):
+        """
+        record: per-frame metrics (frame, position, time, density, motion, anomaly_score, risk, risk_score)
+        density_grid: (rows, cols) density map (NaN cells allowed)
+        alerts: dashboard alert dicts raised on this frame
+        """
+        i = self._fill
+        b = self._buffers
+        for name in ("frame", "position", "time", "density", "motion", "anomaly_score", "risk_score"):
+            b[name][i] = record[name]
+        b["risk_level"][i] = RISK_LEVELS.index(record["risk"])
+        b["alert_count"][i] = len(alerts)
+        b["density_grid"][i] = density_grid
+        for alert in alerts:
+            self._alerts.write(json.dumps({"frame": int(record["frame"]), "time": float(record["time"]),
+                                           "type": alert["type"], "severity": alert["severity"],
+                                           "message": alert["message"]}) + "\n")
+
+        self._fill += 1
+        self.rows += 1
+        if self._fill == self.chunk:
+            self.flush()
+
+    def flush(self):
+        if self._fill:
+            for name, buf in self._buffers.items():
+                with open(os.path.join(self.path, f"{name}.bin"), "ab") as f:
+                    buf[:self._fill].tofile(f)
+            self._fill = 0
+        self._alerts.flush()
+
+    def close(self):
+        """Flush and write the risk-level interval index."""
+        if self._alerts.closed:
+            return
+        self.flush()
+        self._alerts.close()
+        MetricStore(self.path).build_index()
+
+
+class MetricStore:
+    """Read side: memory-mapped columns, the risk interval index, segment queries and clip cutting."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        meta_path = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"[ERROR] Metric store not found: {self.path}")
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+        self.fps = self.meta["fps"]
+        self._columns = {}
+        self._index = None
+
+        sizes = []
+        for name, spec in self.meta["columns"].items():
+            column = os.path.join(self.path, f"{name}.bin")
+            row_bytes = np.dtype(spec["dtype"]).itemsize * int(np.prod(spec["shape"], dtype=np.int64))
+            sizes.append(os.path.getsize(column) // row_bytes if os.path.exists(column) else 0)
+        # Columns flush together; after a crash the shortest one bounds the valid rows
+        self.rows = min(sizes) if sizes else 0
+
+    def __len__(self):
+        return self.rows
+
+    def column(self, name):
+        """Memory-mapped (rows, *shape) array of one column (read-only)."""
+        if name not in self._columns:
+            spec = self.meta["columns"].get(name)
+            if spec is None:
+                raise ValueError(f"[ERROR] Unknown metric column: {name}")
+            shape = (self.rows,) + tuple(spec["shape"])
+            if self.rows == 0:
+                self._columns[name] = np.zeros(shape, dtype=spec["dtype"])
+            else:
+                self._columns[name] = np.memmap(os.path.join(self.path, f"{name}.bin"),
+                                                dtype=spec["dtype"], mode="r", shape=shape)
+        return self._columns[name]
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    def alerts(self, start_frame=None, end_frame=None):
+        """Alert events, optionally limited to frames [start_frame, end_frame]."""
+        path = os.path.join(self.path, "alerts.jsonl")
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            events = [json.loads(line) for line in f if line.strip()]
+        return [e for e in events
+                if (start_frame is None or e["frame"] >= start_frame) and (end_frame is None or e["frame"] <= end_frame)]
+
+    def build_index(self):
+        """Write risk_index.npz: one interval per run of equal risk level."""
+        starts, ends, levels = level_intervals(self.column("risk_level"))
+        risk = self.column("risk_score")
+        times = self.column("time")
+        peaks = np.maximum.reduceat(np.asarray(risk), starts) if starts.size else np.zeros(0, np.float32)
+        index = {
+            "rows": np.asarray(self.rows),
+            "start": starts,
+            "end": ends,
+            "level": levels,
+            "start_time": times[starts] if starts.size else np.zeros(0),
+            "end_time": times[ends - 1] + 1.0 / max(self.fps, 1e-6) if starts.size else np.zeros(0),
+            "peak_risk": peaks,
+        }
+        tmp = os.path.join(self.path, "risk_index.tmp.npz")
+        np.savez(tmp, **index)
+        os.replace(tmp, os.path.join(self.path, "risk_index.npz"))
+        self._index = index
+        return index
+
+    def index(self):
+        """Risk-level intervals (rebuilt if missing or older than the columns)."""
+        if self._index is None:
+            path = os.path.join(self.path, "risk_index.npz")
+            if os.path.exists(path):
+                with np.load(path) as data:
+                    index = {key: data[key] for key in data.files}
+                if int(index["rows"]) == self.rows:
+                    self._index = index
+            if self._index is None:
+                self.build_index()
+        return self._index
+
+    def segments(self, min_risk=None, level=None, min_duration=0.0, merge_gap=0.0):
+        """
+        Time segments where the risk is high:
+            level="HIGH"   - intervals of that risk level (or above) straight from the index
+            min_risk=0.7   - rows with risk_score > min_risk, found with one vectorized pass
+        min_duration: drop segments shorter than this (seconds)
+        merge_gap: join segments separated by at most this many seconds
+        Returns [{"start_frame", "end_frame", "start_position", "end_position",
+                  "start_time", "end_time", "duration", "peak_risk"}] (end inclusive).
+        """
+        if (min_risk is None) == (level is None):
+            raise ValueError("[ERROR] Give exactly one of min_risk or level")
+
+        if level is not None:
+            index = self.index()
+            keep = index["level"] >= RISK_LEVELS.index(level)
+            starts, ends = index["start"][keep], index["end"][keep]
+        else:
+            hot = np.asarray(self.column("risk_score")) > min_risk
+            edges = np.diff(hot.astype(np.int8), prepend=0, append=0)
+            starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+        if starts.size == 0:
+            return []
+        times = self.column("time")
+        frame_time = 1.0 / max(self.fps, 1e-6)
+        start_times = times[starts]
+        end_times = times[ends - 1] + frame_time
+
+        # Merge neighbours (also joins adjacent index intervals, e.g. MEDIUM -> HIGH)
+        if starts.size > 1:
+            join = start_times[1:] - end_times[:-1] <= merge_gap + 1e-9
+            first = np.concatenate(([True], ~join))
+            last = np.concatenate((~join, [True]))
+            starts, ends = starts[first], ends[last]
+            start_times, end_times = start_times[first], end_times[last]
+
+        durations = end_times - start_times
+        keep = durations >= min_duration
+        starts, ends, start_times, end_times, durations = (
+            starts[keep], ends[keep], start_times[keep], end_times[keep], durations[keep])
+        if starts.size == 0:
+            return []
+        peaks = np.maximum.reduceat(np.asarray(self.column("risk_score")), starts)
+        frames, positions = self.column("frame"), self.column("position")
+        return [{
+            "start_frame": int(frames[s]), "end_frame": int(frames[e - 1]),
+            "start_position": int(positions[s]), "end_position": int(positions[e - 1]),
+            "start_time": float(t0), "end_time": float(t1), "duration": float(d), "peak_risk": float(p),
+        } for s, e, t0, t1, d, p in zip(starts, ends, start_times, end_times, durations, peaks)]
+
+    def cut_clips(self, segments, output_dir, source=None, pad=1.0, fourcc="mp4v"):
+        """
+        Copy each segment (plus `pad` seconds either side) out of the source video by seeking -
+        nothing is re-analyzed. Returns the written clip paths.
+        """
+        source = source or self.meta["source"]
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            raise IOError(f"[ERROR] Cannot open video: {source}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or self.fps
+        size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+        os.makedirs(output_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(str(source)))[0]
+
+        paths = []
+        try:
+            for segment in segments:
+                # Positions are 1-based source frame numbers; CAP_PROP_POS_FRAMES is 0-based
+                first = max(segment["start_position"] - 1 - int(round(pad * fps)), 0)
+                last = segment["end_position"] - 1 + int(round(pad * fps))
+                if total:
+                    last = min(last, total - 1)
+                path = os.path.join(output_dir, f"{stem}_{segment['start_time']:.1f}s-{segment['end_time']:.1f}s.mp4")
+                cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+                for _ in range(last - first + 1):
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    writer.write(frame)
+                writer.release()
+                paths.append(path)
+        finally:
+            cap.release()
+        return paths
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Query a per-video metric store")
+    parser.add_argument("store", help="metric store directory")
+    parser.add_argument("--min-risk", type=float, default=0.7)
+    parser.add_argument("--level", choices=RISK_LEVELS, help="query risk-level intervals instead of a threshold")
+    parser.add_argument("--min-duration", type=float, default=5.0, help="seconds")
+    parser.add_argument("--merge-gap", type=float, default=0.0, help="seconds")
+    parser.add_argument("--cut", help="write the matching clips to this directory")
+    args = parser.parse_args()
+
+    store = MetricStore(args.store)
+    start = time.perf_counter()
+    found = store.segments(min_risk=None if args.level else args.min_risk, level=args.level,
+                           min_duration=args.min_duration, merge_gap=args.merge_gap)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"📊 {len(store)} frames | {len(found)} segment(s) in {elapsed:.2f} ms")
+    for s in found:
+        print(f"  {s['start_time']:8.1f}s - {s['end_time']:8.1f}s ({s['duration']:.1f}s) | peak risk {s['peak_risk']:.2f}")
+    if args.cut and found:
+        for path in store.cut_clips(found, args.cut):
+            print(f"✅ {path}")
@@ -0,0 +1,194 @@
+"""
+Lightweight pipeline instrumentation.
+
+- LatencyHistogram: HDR-style log-linear buckets (~6% relative precision),
+  O(1) record, fixed memory, quantiles without storing samples
+- MetricsRegistry: per-stage histograms, counters and gauges, cheap stage timers
+- Optional Prometheus text endpoint on localhost (http.server, daemon thread)
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of integer microsecond values.
+    Values below 2*SUB_BUCKETS are exact; above that every power of two is split
+    into SUB_BUCKETS linear buckets.
+    """
+
+    SUB_BUCKETS = 16
+    _SUB_BITS = 4  # log2(SUB_BUCKETS)
+
+    def __init__(self, max_buckets=512):
+        self.counts = [0] * max_buckets
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def _index(self, value):
+        if value < 2 * self.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - (self._SUB_BITS + 1)
+        return (shift + 1) * self.SUB_BUCKETS + ((value >> shift) - self.SUB_BUCKETS)
+
+    def _bucket_value(self, index):
+        """Upper-edge value of a bucket (quantiles never under-report)."""
+        if index < 2 * self.SUB_BUCKETS:
+            return index
+        shift = index // self.SUB_BUCKETS - 1
+        sub = index % self.SUB_BUCKETS + self.SUB_BUCKETS
+        return ((sub + 1) << shift) - 1
+
+    def record(self, value_us):
+        value = int(value_us)
+        index = min(self._index(value), len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        if self.count == 0:
+            return 0
+        target = q * self.count
+        seen = 0
+        for index, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= target:
+                return min(self._bucket_value(index), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class _StageTimer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record((time.perf_counter_ns() - self.start) // 1000)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Per-stage latency histograms, counters and gauges for one pipeline."""
+
+    def __init__(self, enabled=True, prefix="crowd"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self._server = None
+
+    def stage(self, name):
+        """
+        Context manager timing one execution of a pipeline stage. Every call gets its own
+        timer (only the histogram is shared), so nested and concurrent use is safe.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return _StageTimer(histogram)
+
+    def observe(self, name, seconds):
+        """Record a latency measured elsewhere (e.g. capture-to-alert) into the `name` histogram."""
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(max(int(seconds * 1e6), 0))
+
+    def inc(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        if self.enabled:
+            self.gauges[name] = value
+
+    def stage_summary(self):
+        """[(stage, p50_ms, p95_ms, p99_ms, count)] in first-seen order."""
+        return [
+            (name, h.quantile(0.5) / 1000, h.quantile(0.95) / 1000, h.quantile(0.99) / 1000, h.count)
+            for name, h in list(self.histograms.items())
+        ]
+
+    def prometheus_text(self):
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_stage_latency_seconds Pipeline stage latency",
+            f"# TYPE {p}_stage_latency_seconds summary",
+        ]
+        for name, h in list(self.histograms.items()):
+            for q in (0.5, 0.95, 0.99):
+                lines.append(f'{p}_stage_latency_seconds{{stage="{name}",quantile="{q}"}} {h.quantile(q) / 1e6:.6f}')
+            lines.append(f'{p}_stage_latency_seconds_sum{{stage="{name}"}} {h.total / 1e6:.6f}')
+            lines.append(f'{p}_stage_latency_seconds_count{{stage="{name}"}} {h.count}')
+        for name, value in list(self.counters.items()):
+            lines.append(f"# TYPE {p}_{name}_total counter")
+            lines.append(f"{p}_{name}_total {value}")
+        for name, value in list(self.gauges.items()):
+            lines.append(f"# TYPE {p}_{name} gauge")
+            lines.append(f"{p}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port, host="127.0.0.1"):
+        """Serve /metrics in Prometheus text format from a daemon thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        thread.start()
+        print(f"📈 Metrics endpoint: http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server
+
+    def stop_http_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -1,6 +1,9 @@
 import cv2
 import numpy as np
 
+from buffer_pool import buffer, ring_buffer
+from density_estimation import _grid_edges, _integral, grid_sums
+
 def compute_motion(prev_gray, curr_gray):
     """
     Compute motion magnitude using optical flow.
@@ -14,3 +17,269 @@ def compute_motion(prev_gray, curr_gray):
     avg_motion = np.mean(magnitude)
 
     return avg_motion
+
+
+class MotionEngine:
+    """
+    Optical flow with selectable quality tiers (fastest last):
+        "full"    - dense Farneback at full resolution (same as compute_motion)
+        "pyramid" - dense Farneback on a downscaled level
+        "warm"    - downscaled Farneback warm-started from the previous flow (fewer levels/iterations)
+        "sparse"  - Lucas-Kanade on a fixed grid of points (untrackable points count as still)
+    Every tier returns per-cell magnitude and direction maps aligned with the density grid.
+    Magnitudes are always in full-resolution pixels per frame.
+    With a BufferPool, flow fields, downscaled frames and summed-area tables are reused
+    across calls ("magnitude" in a result is then overwritten by the next call).
+    """
+
+    TIERS = ("full", "pyramid", "warm", "sparse")
+
+    # Farneback: pyr_scale, levels, winsize, iterations, poly_n, poly_sigma
+    FARNEBACK_PARAMS = {
+        "full": (0.5, 3, 15, 3, 5, 1.2),
+        "pyramid": (0.5, 3, 15, 3, 5, 1.2),
+        "warm": (0.5, 1, 15, 2, 5, 1.2),
+    }
+
+    def __init__(self, tier="full", rows=10, cols=10, scale=0.5, points_per_cell=3, pool=None):
+        if tier not in self.TIERS:
+            raise ValueError(f"[ERROR] Unknown motion tier: {tier}")
+        self.tier = tier
+        self.rows = rows
+        self.cols = cols
+        self.base_scale = scale
+        self.scale = scale if tier in ("pyramid", "warm") else 1.0
+        self.points_per_cell = points_per_cell
+        self.pool = pool
+        self.reset()
+
+    def set_tier(self, tier):
+        """Switch quality tier between frames (e.g. under load shedding)."""
+        if tier not in self.TIERS:
+            raise ValueError(f"[ERROR] Unknown motion tier: {tier}")
+        if tier == self.tier:
+            return
+        self.tier = tier
+        self.scale = self.base_scale if tier in ("pyramid", "warm") else 1.0
+        self.reset()
+
+    def reset(self):
+        """Drop state carried between frames (previous flow, cached downscaled frame)."""
+        self.prev_flow = None
+        self._last_gray = None
+        self._last_small = None
+        self._grid_points = None
+        self._grid_key = None
+        self._mask_key = None
+        self._mask_small = None
+
+    def forget_frame(self):
+        """
+        Stop reusing the cached downscaled frame - the caller's frame buffers were reused or
+        moved (pooled buffers cycle, so the same array object may come back with new pixels).
+        """
+        self._last_gray = None
+        self._last_small = None
+
+    def _downscale(self, gray):
+        if self.scale == 1.0:
+            return gray
+        h, w = gray.shape
+        # Two slots: the previous frame's small copy stays valid while the current one is written
+        small = ring_buffer(self.pool, "motion.small", 2, (round(h * self.scale), round(w * self.scale)))
+        return cv2.resize(gray, None, dst=small, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+    def compute(self, prev_gray, curr_gray, mask=None, cell_edges=None):
+        """
+        mask: optional uint8 image (nonzero = analyzed); motion outside it is ignored
+        cell_edges: optional (ys, xs) cell boundaries in input pixels (default: even rows x cols grid);
+                    the returned maps have one entry per cell
+        Returns dict:
+            motion        - mean magnitude (px/frame)
+            magnitude_map - (rows, cols) mean magnitude per cell
+            direction_map - (rows, cols) mean flow direction per cell (radians)
+            magnitude     - dense tiers: per-pixel magnitude at the working scale (masked)
+            points / point_magnitude - sparse tier: tracked points (input pixels) and their motion
+        """
+        if cell_edges is None:
+            h, w = curr_gray.shape
+            cell_edges = (_grid_edges(h, self.rows), _grid_edges(w, self.cols))
+        if self.tier == "sparse":
+            return self._compute_sparse(prev_gray, curr_gray, mask, cell_edges)
+        return self._compute_dense(prev_gray, curr_gray, mask, cell_edges)
+
+    @staticmethod
+    def _mask_id(mask):
+        # Memory region rather than id(): sub-views of a static ROI mask are recreated every frame
+        if mask is None:
+            return None
+        return (mask.__array_interface__['data'][0], mask.shape, mask.strides)
+
+    def _small_mask(self, mask, shape):
+        """Mask as 0/1 float32 at the working scale (cached - ROI masks are static)."""
+        key = (self._mask_id(mask), shape)
+        if self._mask_key != key:
+            small = cv2.resize(mask, (shape[1], shape[0]), interpolation=cv2.INTER_NEAREST)
+            self._mask_small = (small > 0).astype(np.float32)
+            self._mask_key = key
+        return self._mask_small
+
+    def _compute_dense(self, prev_gray, curr_gray, mask, cell_edges):
+        # Reuse the previous call's current frame when it is passed back as prev_gray
+        if prev_gray is self._last_gray and self._last_small is not None:
+            prev_small = self._last_small
+        else:
+            prev_small = self._downscale(prev_gray)
+        curr_small = self._downscale(curr_gray)
+        self._last_gray, self._last_small = curr_gray, curr_small
+
+        pyr_scale, levels, winsize, iterations, poly_n, poly_sigma = self.FARNEBACK_PARAMS[self.tier]
+        flags = 0
+        h, w = curr_small.shape
+        if self.tier == "warm" and self.prev_flow is not None and self.prev_flow.shape[:2] == curr_small.shape:
+            flow = self.prev_flow
+            flags = cv2.OPTFLOW_USE_INITIAL_FLOW
+        else:
+            flow = buffer(self.pool, f"motion.flow.{self.tier}", (h, w, 2), np.float32)
+
+        flow = cv2.calcOpticalFlowFarneback(
+            prev_small, curr_small,
+            flow, pyr_scale, levels, winsize, iterations, poly_n, poly_sigma, flags
+        )
+        if self.tier == "warm":
+            self.prev_flow = flow
+
+        pool = self.pool
+        fx = cv2.extractChannel(flow, 0, dst=buffer(pool, "motion.fx", (h, w), np.float32))
+        fy = cv2.extractChannel(flow, 1, dst=buffer(pool, "motion.fy", (h, w), np.float32))
+        # Back to full-resolution pixel units (the warm-start flow stays at the working scale)
+        if self.scale != 1.0:
+            fx *= 1.0 / self.scale
+            fy *= 1.0 / self.scale
+        magnitude = cv2.magnitude(fx, fy, buffer(pool, "motion.magnitude", (h, w), np.float32))
+
+        full_h, full_w = curr_gray.shape
+        ys = np.round(np.asarray(cell_edges[0]) * (h / full_h)).astype(int)
+        xs = np.round(np.asarray(cell_edges[1]) * (w / full_w)).astype(int)
+
+        if mask is not None:
+            weights = self._small_mask(mask, (h, w))
+            magnitude *= weights
+            fx *= weights
+            fy *= weights
+            count_integral = _integral(weights, pool, "motion.count_integral")
+            counts = grid_sums(count_integral, ys, xs)
+            total = count_integral[-1, -1]
+        else:
+            counts = np.outer(np.diff(ys), np.diff(xs))
+            total = h * w
+        counts = np.maximum(counts, 1)
+
+        mag_integral = _integral(magnitude, pool, "motion.magnitude_integral")
+        magnitude_map = grid_sums(mag_integral, ys, xs) / counts
+        mean_fx = grid_sums(_integral(fx, pool, "motion.fx_integral"), ys, xs) / counts
+        mean_fy = grid_sums(_integral(fy, pool, "motion.fy_integral"), ys, xs) / counts
+
+        return {
+            "motion": mag_integral[-1, -1] / max(total, 1),
+            "magnitude_map": magnitude_map,
+            "direction_map": np.arctan2(mean_fy, mean_fx),
+            "magnitude": magnitude,
+        }
+
+    def _points_for(self, cell_edges, mask):
+        """
+        Tracked point grid (points_per_cell^2 per cell), the cell index of each point
+        and the number of points per cell. Points outside the mask are dropped.
+        """
+        ys_edges, xs_edges = cell_edges
+        rows, cols = len(ys_edges) - 1, len(xs_edges) - 1
+        key = (tuple(ys_edges), tuple(xs_edges), self._mask_id(mask))
+        if self._grid_key != key:
+            n = self.points_per_cell
+            offsets = (np.arange(n) + 0.5) / n
+            ys_edges = np.asarray(ys_edges, dtype=np.float64)
+            xs_edges = np.asarray(xs_edges, dtype=np.float64)
+            ys = (ys_edges[:-1, None] + offsets[None, :] * np.diff(ys_edges)[:, None]).ravel()
+            xs = (xs_edges[:-1, None] + offsets[None, :] * np.diff(xs_edges)[:, None]).ravel()
+            gx, gy = np.meshgrid(xs, ys)
+            points = np.stack([gx.ravel(), gy.ravel()], axis=1).astype(np.float32)
+            cell_r = (np.arange(rows * n) // n)[:, None]
+            cell_c = (np.arange(cols * n) // n)[None, :]
+            cells = np.broadcast_to(cell_r * cols + cell_c, gx.shape).ravel()
+
+            # Empty cells (zero-size after ROI clipping) and masked-out points carry no points
+            keep = (np.repeat(np.diff(ys_edges) > 0, n)[:, None] & np.repeat(np.diff(xs_edges) > 0, n)[None, :]).ravel()
+            if mask is not None:
+                px = np.clip(points[:, 0].astype(int), 0, mask.shape[1] - 1)
+                py = np.clip(points[:, 1].astype(int), 0, mask.shape[0] - 1)
+                keep &= mask[py, px] > 0
+            points, cells = points[keep].reshape(-1, 1, 2), cells[keep]
+            per_cell = np.bincount(cells, minlength=rows * cols)
+            self._grid_points = (points, cells, per_cell)
+            self._grid_key = key
+        return self._grid_points
+
+    def _compute_sparse(self, prev_gray, curr_gray, mask, cell_edges):
+        points, cells, per_cell = self._points_for(cell_edges, mask)
+        rows, cols = len(cell_edges[0]) - 1, len(cell_edges[1]) - 1
+        n_cells = rows * cols
+        if len(points) == 0:
+            zeros = np.zeros((rows, cols))
+            return {"motion": 0.0, "magnitude_map": zeros, "direction_map": zeros,
+                    "points": points.reshape(-1, 2), "point_magnitude": np.zeros(0)}
+
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(
+            prev_gray, curr_gray, points, None, winSize=(15, 15), maxLevel=2, minEigThreshold=1e-3
+        )
+
+        good = status.ravel() == 1
+        disp = (moved - points).reshape(-1, 2)[good]
+        good_cells = cells[good]
+        magnitude = np.hypot(disp[:, 0], disp[:, 1])
+
+        # Untrackable (textureless) points count as zero motion, like flat areas in dense flow
+        counts = np.maximum(np.bincount(good_cells, minlength=n_cells), 1)
+        magnitude_map = np.bincount(good_cells, magnitude, n_cells) / np.maximum(per_cell, 1)
+        mean_dx = np.bincount(good_cells, disp[:, 0], n_cells) / counts
+        mean_dy = np.bincount(good_cells, disp[:, 1], n_cells) / counts
+
+        point_magnitude = np.zeros(len(points))
+        point_magnitude[good] = magnitude
+
+        return {
+            "motion": float(magnitude.sum()) / len(points),
+            "magnitude_map": magnitude_map.reshape(rows, cols),
+            "direction_map": np.arctan2(mean_dy, mean_dx).reshape(rows, cols),
+            "points": points.reshape(-1, 2),
+            "point_magnitude": point_magnitude,
+        }
+
+
+if __name__ == "__main__":
+    import time
+    import config
+    from video_loader import VideoLoader
+    from preprocessing import Preprocessor
+
+    print("💨 Benchmarking motion tiers...")
+    try:
+        loader = VideoLoader(getattr(config, 'VIDEO_PATH', 'data/videos/merged_crowd_demo.mp4'))
+        preprocessor = Preprocessor()
+        frames = []
+        while len(frames) < 60:
+            ret, frame = loader.read()
+            if not ret:
+                break
+            frames.append(preprocessor.process(frame))
+        loader.release()
+
+        for tier in MotionEngine.TIERS:
+            engine = MotionEngine(tier, config.GRID_ROWS, config.GRID_COLS)
+            start = time.perf_counter()
+            for prev, curr in zip(frames, frames[1:]):
+                result = engine.compute(prev, curr)
+            fps = (len(frames) - 1) / (time.perf_counter() - start)
+            print(f"✅ {tier:8s}: {fps:7.1f} FPS | last motion {result['motion']:.2f} px/f")
+    except FileNotFoundError as e:
+        print(f"ℹ️  {e} - NORMAL without video file")
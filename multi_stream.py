@@ -0,0 +1,218 @@
+"""
+Multi-camera runner: many VideoLoader sources on one shared worker pool.
+
+Each stream keeps its own FrameAnalyzer, FrameScorer (AnomalyDetector) and history, and has
+at most one frame in flight (motion needs the previous frame). Idle streams are
+scheduled onto a fixed-size thread pool either round-robin or by current risk.
+OpenCV releases the GIL while decoding / filtering, so threads scale, and
+cv2.setNumThreads is lowered so workers x OpenCV threads ~= cores.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import cv2
+
+from video_loader import VideoLoader
+from frame_analysis import FrameAnalyzer, FrameScorer
+from history import HistoryStore
+from roi import load_zones
+
+import config
+
+
+class StreamState:
+    """Per-camera state: source, analyzer, detector, history and throughput stats."""
+
+    def __init__(self, name, source, max_history=150):
+        self.name = name
+        # ROI zones are configured per camera name
+        self.analyzer = FrameAnalyzer(zones=load_zones(name))
+        self.loader = VideoLoader(source, pool=self.analyzer.pool)
+        self.scorer = FrameScorer()
+        self.max_history = max_history
+
+        self.history = HistoryStore(max_history, density=(), risk=(), motion=())
+        self.density_history = self.history["density"]
+        self.risk_history = self.history["risk"]
+        self.motion_history = self.history["motion"]
+
+        self.frames = 0
+        self.anomaly_count = 0
+        self.high_risk_frames = 0
+        self.last_risk = 0.0
+        self.waiting_rounds = 0
+        self.busy = False
+        self.finished = False
+        self.start_time = None
+
+    def process_next(self):
+        """Read, analyze and score one frame. Runs on a pool worker."""
+        ret, frame = self.loader.read()
+        if not ret:
+            self.finished = True
+            return
+
+        analysis = self.analyzer.analyze(frame)
+        density_value = analysis["density"]
+        motion_magnitude = analysis["motion"]
+
+        scores = self.scorer.score(density_value, motion_magnitude,
+                                   analysis["density_map"], analysis["motion_map"])
+        risk_normalized = scores["risk_score"]
+
+        self.history.append(density=density_value, risk=risk_normalized, motion=motion_magnitude)
+
+        self.frames += 1
+        self.last_risk = risk_normalized
+        if risk_normalized > 0.7:
+            self.high_risk_frames += 1
+        if scores["anomaly"]:
+            self.anomaly_count += 1
+
+    def stats(self, now):
+        """FPS and lag behind the source frame rate (seconds)."""
+        elapsed = max(now - self.start_time, 1e-6) if self.start_time else 0.0
+        fps = self.frames / elapsed if elapsed else 0.0
+        source_fps = self.loader.source_fps
+        if source_fps > 0 and elapsed:
+            lag = max(0.0, elapsed - self.frames * self.loader.frame_skip / source_fps)
+        else:
+            lag = None
+        return {
+            "frames": self.frames,
+            "fps": fps,
+            "lag_s": lag,
+            "risk": self.last_risk,
+            "high_risk_frames": self.high_risk_frames,
+            "anomalies": self.anomaly_count,
+            "finished": self.finished,
+        }
+
+    def release(self):
+        self.loader.release()
+
+
+class MultiStreamRunner:
+    """
+    Runs N streams on a fixed-size worker pool.
+    policy: "round_robin" (fair) or "risk" (highest current risk first, with aging)
+    """
+
+    POLICIES = ("round_robin", "risk")
+
+    def __init__(self, sources, workers=None, policy="round_robin"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"[ERROR] Unknown scheduling policy: {policy}")
+
+        if isinstance(sources, dict):
+            items = list(sources.items())
+        else:
+            items = [(f"cam{i}", src) for i, src in enumerate(sources)]
+        if not items:
+            raise ValueError("[ERROR] MultiStreamRunner needs at least one source")
+
+        cores = os.cpu_count() or 1
+        self.workers = workers or min(cores, len(items))
+        self.policy = policy
+
+        # Keep workers x OpenCV threads close to the core count
+        self.cv_threads = max(1, cores // self.workers)
+        cv2.setNumThreads(self.cv_threads)
+
+        self.streams = [StreamState(name, src) for name, src in items]
+        self._next_index = 0
+
+    def _pick(self, count):
+        """Choose up to `count` idle streams to schedule."""
+        idle = [s for s in self.streams if not s.busy and not s.finished]
+        if not idle or count <= 0:
+            return []
+
+        if self.policy == "risk":
+            # Aging keeps low-risk cameras from starving
+            idle.sort(key=lambda s: s.last_risk + 0.1 * s.waiting_rounds, reverse=True)
+            chosen = idle[:count]
+        else:
+            n = len(self.streams)
+            chosen = []
+            for k in range(n):
+                s = self.streams[(self._next_index + k) % n]
+                if not s.busy and not s.finished:
+                    chosen.append(s)
+                    if len(chosen) == count:
+                        break
+            self._next_index = (self.streams.index(chosen[-1]) + 1) % n
+
+        for s in idle:
+            s.waiting_rounds = 0 if s in chosen else s.waiting_rounds + 1
+        return chosen
+
+    def run(self, duration=None, report_every=5.0):
+        """Process all streams until they end (or `duration` seconds). Returns the final report."""
+        print(f"Multi-stream run: {len(self.streams)} streams | "
+              f"{self.workers} workers x {self.cv_threads} OpenCV threads | policy: {self.policy}")
+        print("-" * 50)
+
+        start = time.time()
+        for s in self.streams:
+            s.start_time = start
+        last_report = start
+        in_flight = {}
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                while True:
+                    now = time.time()
+                    stop = duration is not None and now - start >= duration
+
+                    if not stop:
+                        for s in self._pick(self.workers - len(in_flight)):
+                            s.busy = True
+                            in_flight[pool.submit(s.process_next)] = s
+
+                    if not in_flight:
+                        break
+
+                    done, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        s = in_flight.pop(future)
+                        s.busy = False
+                        future.result()
+
+                    if report_every and time.time() - last_report >= report_every:
+                        self.print_report()
+                        last_report = time.time()
+        except KeyboardInterrupt:
+            print("\n\nMulti-stream run interrupted by user")
+        finally:
+            for s in self.streams:
+                s.release()
+
+        self.print_report()
+        return self.report()
+
+    def report(self):
+        now = time.time()
+        return {s.name: s.stats(now) for s in self.streams}
+
+    def print_report(self):
+        for name, st in self.report().items():
+            lag = f"{st['lag_s']:.1f}s" if st['lag_s'] is not None else "n/a"
+            print(f"[{name}] frames: {st['frames']} | FPS: {st['fps']:.1f} | lag: {lag} | "
+                  f"risk: {st['risk']:.2f}{' | done' if st['finished'] else ''}")
+        print("-" * 50)
+
+
+if __name__ == "__main__":
+    print("🎥 Testing MultiStreamRunner...")
+    sources = getattr(config, 'STREAM_SOURCES', None) or [getattr(config, 'VIDEO_PATH', 'data/videos/merged_crowd_demo.mp4')]
+    try:
+        runner = MultiStreamRunner(sources,
+                                   workers=getattr(config, 'STREAM_WORKERS', 0) or None,
+                                   policy=getattr(config, 'STREAM_POLICY', 'round_robin'))
+        runner.run()
+        print("🎉 MultiStreamRunner READY!")
+    except FileNotFoundError as e:
+        print(f"ℹ️  {e} - NORMAL without video file")
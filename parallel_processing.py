@@ -0,0 +1,173 @@
+"""
+Offline parallel processing of a single long video.
+
+The file is split into frame ranges, each range is decoded and analyzed
+(preprocessing, density, motion) in its own worker process, and the
+per-frame metrics are merged back in order. Anomaly detection and risk
+classification are then replayed sequentially over the merged series, so
+the results match a single-process run.
+
+Chunks start cold, so state carried from frame to frame cannot be reproduced
+per chunk: workers always run without the change gate (CHANGE_GATE) and use
+the "full" motion tier in place of the warm-started "warm" tier. Results then
+match a sequential run with those settings, not one with the gate or "warm".
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from video_loader import VideoLoader
+from frame_analysis import FrameAnalyzer, FrameScorer
+from motion_analysis import MotionEngine
+
+import config
+
+
+def split_frame_ranges(num_frames, chunks):
+    """
+    Split analyzed-frame indices [0, num_frames) into contiguous ranges.
+    The last range is open-ended (None) so frames past CAP_PROP_FRAME_COUNT are not lost.
+    """
+    chunks = max(1, min(chunks, num_frames))
+    bounds = np.linspace(0, num_frames, chunks + 1).astype(int)
+    ranges = [(int(bounds[i]), int(bounds[i + 1])) for i in range(chunks)]
+    ranges[-1] = (ranges[-1][0], None)
+    return ranges
+
+
+def _process_chunk(args):
+    """
+    Worker: analyze frames [start, end) of the video.
+    Starts one frame early (overlap) so motion at `start` uses the real previous frame.
+    """
+    video_path, start, end, frame_skip = args
+
+    # One OpenCV thread per worker - the pool itself provides the parallelism
+    cv2.setNumThreads(1)
+
+    analyzer = FrameAnalyzer()
+    # Stateful shortcuts would depend on frames before the chunk - see module docstring
+    analyzer.gate = None
+    if analyzer.motion_engine.tier == "warm":
+        engine = analyzer.motion_engine
+        analyzer.motion_engine = MotionEngine("full", rows=engine.rows, cols=engine.cols,
+                                              scale=engine.base_scale, pool=analyzer.pool)
+    loader = VideoLoader(video_path, frame_skip=frame_skip, pool=analyzer.pool)
+
+    overlap = 1 if start > 0 else 0
+    first = start - overlap
+    # Raw position of the first frame of analyzed frame `first`
+    loader.seek(first * frame_skip)
+
+    densities, motions, density_maps, motion_maps = [], [], [], []
+    index = first
+    last_position = loader.position
+    try:
+        while end is None or index < end:
+            ret, frame = loader.read()
+            if not ret:
+                break
+
+            # Same gap as process_video: motion in px per source frame
+            frame_gap = loader.position - last_position
+            last_position = loader.position
+            analysis = analyzer.analyze(frame, frame_gap=frame_gap)
+            if index >= start:
+                densities.append(analysis["density"])
+                motions.append(analysis["motion"])
+                density_maps.append(analysis["density_map"])
+                motion_maps.append(analysis["motion_map"])
+            index += 1
+    finally:
+        loader.release()
+
+    return {
+        "start": start,
+        "density": np.asarray(densities, dtype=np.float64),
+        "motion": np.asarray(motions, dtype=np.float64),
+        "density_map": np.asarray(density_maps),
+        "motion_map": np.asarray(motion_maps),
+    }
+
+
+def _concat_maps(maps):
+    maps = [m for m in maps if len(m)]
+    return np.concatenate(maps) if maps else np.empty((0, 0, 0))
+
+
+def replay_scoring(densities, motions, density_maps, motion_maps):
+    """
+    Run anomaly detection and risk classification sequentially over merged metrics.
+    Returns one record per frame, in order.
+    """
+    scorer = FrameScorer()
+    records = []
+    for i in range(len(densities)):
+        scores = scorer.score(densities[i], motions[i], density_maps[i], motion_maps[i])
+        records.append({
+            "frame": i + 1,
+            "density": float(densities[i]),
+            "motion": float(motions[i]),
+            "anomaly_score": float(scores["anomaly_score"]),
+            "anomaly": scores["anomaly"],
+            "risk": scores["risk"],
+            "risk_score": scores["risk_score"],
+        })
+    return records
+
+
+def process_video_parallel(video_path, workers=None, frame_skip=1):
+    """
+    Analyze one video across a process pool.
+    Returns (records, density_maps) in the same order as a sequential run
+    (without the change gate and with "full" instead of "warm" motion).
+    """
+    workers = workers or os.cpu_count() or 1
+
+    probe = VideoLoader(video_path, frame_skip=frame_skip)
+    total_frames = probe.total_frames
+    probe.release()
+
+    num_frames = max(total_frames // frame_skip, 1)
+    ranges = split_frame_ranges(num_frames, workers)
+
+    print(f"Parallel analysis: {video_path}")
+    print(f"Frames: {num_frames} | Workers: {workers} | Chunks: {len(ranges)}")
+    print("-" * 50)
+
+    start_time = time.time()
+    tasks = [(video_path, start, end, frame_skip) for start, end in ranges]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunks = list(pool.map(_process_chunk, tasks))
+
+    # Merge back in frame order
+    chunks.sort(key=lambda c: c["start"])
+    densities = np.concatenate([c["density"] for c in chunks])
+    motions = np.concatenate([c["motion"] for c in chunks])
+    density_maps = _concat_maps([c["density_map"] for c in chunks])
+    motion_maps = _concat_maps([c["motion_map"] for c in chunks])
+    analysis_time = time.time() - start_time
+
+    records = replay_scoring(densities, motions, density_maps, motion_maps)
+    total_time = time.time() - start_time
+
+    print(f"Analyzed {len(records)} frames in {total_time:.1f}s "
+          f"({len(records) / max(total_time, 1e-6):.1f} FPS, analysis {analysis_time:.1f}s)")
+    print(f"High risk frames: {sum(r['risk'] == 'HIGH' for r in records)}")
+    print(f"Anomalies detected: {sum(r['anomaly'] for r in records)}")
+
+    return records, density_maps
+
+
+if __name__ == "__main__":
+    print("⚡ Testing parallel processing...")
+    video_path = getattr(config, 'VIDEO_PATH', 'data/videos/merged_crowd_demo.mp4')
+    try:
+        records, _ = process_video_parallel(video_path, workers=getattr(config, 'PARALLEL_WORKERS', 0) or None)
+        print(f"✅ {len(records)} frames analyzed")
+    except FileNotFoundError as e:
+        print(f"ℹ️  {e} - NORMAL without video file")
@@ -1,5 +1,6 @@
 import cv2
-import numpy as np
+
+from buffer_pool import buffer, ring_buffer
 
 def preprocess_frame(frame):
     """
@@ -10,27 +11,38 @@ def preprocess_frame(frame):
     return gray
 
 class Preprocessor:
-    def __init__(self):
-        """Initialize with optimal preprocessing parameters."""
+    def __init__(self, pool=None):
+        """
+        Initialize with optimal preprocessing parameters.
+        pool: optional BufferPool - outputs then alternate between two pooled gray buffers,
+              so a result stays valid until the second call after it
+        """
         self.kernel_size = (15, 15)
         self.sigma = 1.0
+        self.pool = pool
     
-    def process(self, frame):
+    def process(self, frame, size=None):
         """
         Full preprocessing pipeline for crowd analysis.
-        Input: BGR frame (H, W, 3)
-        Output: Normalized grayscale (H, W)
+        Input: BGR frame (H, W, 3) at any resolution; size = optional (width, height) analysis size
+        Output: Normalized grayscale (H, W), or (height, width) when size is given
         """
-        # 1. Convert to grayscale
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # 1. Shrink to the analysis size first, so color conversion and blur touch the fewest pixels
+        pool = self.pool
+        if size is not None and (frame.shape[1], frame.shape[0]) != tuple(size):
+            frame = cv2.resize(frame, tuple(size), dst=buffer(pool, "preprocess.resized", (size[1], size[0], 3)),
+                               interpolation=cv2.INTER_LINEAR)
+        shape = frame.shape[:2]
         
-        # 2. Gaussian blur for noise reduction
-        blurred = cv2.GaussianBlur(gray, self.kernel_size, self.sigma)
+        # 2. Convert to grayscale
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=buffer(pool, "preprocess.gray", shape))
         
-        # 3. Normalize to 0-255 range
-        normalized = cv2.normalize(blurred, None, 0, 255, cv2.NORM_MINMAX)
+        # 3. Gaussian blur for noise reduction
+        blurred = cv2.GaussianBlur(gray, self.kernel_size, self.sigma, dst=buffer(pool, "preprocess.blurred", shape))
         
-        return normalized.astype(np.uint8)
+        # 4. Normalize to 0-255 range (ping-pong output: the previous result is still someone's prev_gray)
+        return cv2.normalize(blurred, ring_buffer(pool, "preprocess.output", 2, shape), 0, 255,
+                             cv2.NORM_MINMAX, cv2.CV_8U)
 
 # Test function
 if __name__ == "__main__":
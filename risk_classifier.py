@@ -7,6 +7,20 @@ from config import LOW_RISK_THRESHOLD, HIGH_RISK_THRESHOLD
 
 from config import LOW_RISK_THRESHOLD, HIGH_RISK_THRESHOLD
 
+# Risk model constants (also the defaults of threshold_sweep.py)
+DENSITY_WEIGHT = 0.6
+MOTION_WEIGHT = 0.4
+MOTION_SCALE = 20.0         # px/frame mapped to motion 1.0
+LEVEL_BASE = {"LOW": 0.25, "MEDIUM": 0.5, "HIGH": 0.75}
+DENSITY_ADJUST = 0.3
+MOTION_ADJUST = 0.2
+
+# Anomaly score above which a frame is flagged (FrameScorer)
+ANOMALY_THRESHOLD = 0.7
+
+# generate_alerts() rules: normalized risk levels, density fraction, motion px/frame
+ALERT_THRESHOLDS = {"critical": 0.85, "high": 0.7, "moderate": 0.5, "density": 0.8, "motion": 15.0}
+
 def classify_risk(score):
     if score < LOW_RISK_THRESHOLD:
         return "LOW"
@@ -14,3 +28,40 @@ def classify_risk(score):
         return "MEDIUM"
     else:
         return "HIGH"
+
+
+def combined_score(density, motion):
+    """Combined 0-1 score used for risk classification (density 60%, motion 40%)."""
+    return density * DENSITY_WEIGHT + min(motion / MOTION_SCALE, 1.0) * MOTION_WEIGHT
+
+def normalize_risk(risk_str, density, motion):
+    """Convert risk string to normalized 0-1 value"""
+    if isinstance(risk_str, (int, float)):
+        return risk_str
+
+    # Convert string risk to numerical (unknown labels count as LOW)
+    base = LEVEL_BASE.get(risk_str, LEVEL_BASE["LOW"])
+
+    # Adjust based on density and motion
+    adjustment = (density * DENSITY_ADJUST + min(motion / MOTION_SCALE, 1.0) * MOTION_ADJUST)
+    return min(base + adjustment, 1.0)
+
+def alert_rules(risk_normalized, density, motion, anomaly):
+    """
+    Names of the generate_alerts() rules that fire for one frame: at most one of
+    critical / high / moderate, plus density, motion and anomaly.
+    """
+    fired = []
+    if risk_normalized > ALERT_THRESHOLDS["critical"]:
+        fired.append("critical")
+    elif risk_normalized > ALERT_THRESHOLDS["high"]:
+        fired.append("high")
+    elif risk_normalized > ALERT_THRESHOLDS["moderate"]:
+        fired.append("moderate")
+    if density > ALERT_THRESHOLDS["density"]:
+        fired.append("density")
+    if motion > ALERT_THRESHOLDS["motion"]:
+        fired.append("motion")
+    if anomaly:
+        fired.append("anomaly")
+    return fired
@@ -0,0 +1,126 @@
+"""
+Polygon regions of interest.
+
+Zones are configured per camera in config.ROI_ZONES as polygons in normalized
+(0-1) frame coordinates:
+
+    ROI_ZONES = {
+        "platform_cam": {
+            "platform_edge": [(0.05, 0.55), (0.95, 0.55), (0.95, 0.75), (0.05, 0.75)],
+            "stairwell": [(0.70, 0.20), (0.90, 0.20), (0.90, 0.50), (0.70, 0.50)],
+        },
+    }
+
+Only the bounding box of all zones is cropped and analyzed. Grid cells keep
+their full-frame geometry (so maps line up with unmasked runs); cells with too
+little zone coverage are NaN and pixels outside the zones never enter the
+density or motion averages.
+"""
+
+import cv2
+import numpy as np
+
+from density_estimation import _grid_edges, grid_sums
+
+import config
+
+
+def load_zones(camera=None):
+    """Zones of one camera from config ({} = analyze the whole frame)."""
+    zones = getattr(config, 'ROI_ZONES', {}) or {}
+    camera = camera if camera is not None else getattr(config, 'ROI_CAMERA', 'default')
+    return dict(zones.get(camera, {}))
+
+
+class ZoneLayout:
+    """
+    Pixel geometry of a zone set for one frame size and grid:
+    crop slices, union mask, per-zone masks (crop coordinates) and per-grid cell edges.
+    """
+
+    def __init__(self, zones, frame_shape, min_coverage=0.1):
+        if not zones:
+            raise ValueError("[ERROR] ZoneLayout needs at least one zone")
+        self.frame_height, self.frame_width = frame_shape[:2]
+        self.min_coverage = min_coverage
+
+        full_masks = {}
+        union = np.zeros((self.frame_height, self.frame_width), dtype=np.uint8)
+        for name, polygon in zones.items():
+            points = np.asarray(polygon, dtype=np.float64)
+            if points.ndim != 2 or points.shape[0] < 3 or points.shape[1] != 2:
+                raise ValueError(f"[ERROR] Zone '{name}' needs at least 3 (x, y) points")
+            pixels = np.round(points * (self.frame_width, self.frame_height)).astype(np.int32)
+            zone_mask = np.zeros_like(union)
+            cv2.fillPoly(zone_mask, [pixels], 255)
+            full_masks[name] = zone_mask
+            cv2.bitwise_or(union, zone_mask, dst=union)
+
+        x, y, w, h = cv2.boundingRect(union)
+        if w == 0 or h == 0:
+            raise ValueError("[ERROR] ROI zones do not cover any pixel of the frame")
+        self.bbox = (x, y, w, h)
+        self.crop = (slice(y, y + h), slice(x, x + w))
+        self.mask = np.ascontiguousarray(union[self.crop])
+        self.zone_masks = {name: np.ascontiguousarray(m[self.crop]) for name, m in full_masks.items()}
+        self.area_fraction = (w * h) / (self.frame_width * self.frame_height)
+
+        self._union_integral = cv2.integral((union > 0).view(np.uint8), sdepth=cv2.CV_64F)
+        self._grids = {}
+        self._cell_pixels = {}
+        self._zone_small = {}
+
+    def grid(self, rows, cols):
+        """(ys, xs, valid): full-frame cell edges in crop coordinates and the cells with enough coverage."""
+        key = (rows, cols)
+        if key not in self._grids:
+            ys_full = _grid_edges(self.frame_height, rows)
+            xs_full = _grid_edges(self.frame_width, cols)
+            areas = np.outer(np.diff(ys_full), np.diff(xs_full))
+            coverage = grid_sums(self._union_integral, ys_full, xs_full) / np.maximum(areas, 1)
+
+            x, y, w, h = self.bbox
+            ys = np.clip(ys_full - y, 0, h)
+            xs = np.clip(xs_full - x, 0, w)
+            self._grids[key] = (ys, xs, coverage >= self.min_coverage)
+        return self._grids[key]
+
+    def cell_pixels(self, rows, cols, name=None):
+        """Analyzed pixels per grid cell, for the union of all zones or for one zone."""
+        key = (rows, cols, name)
+        if key not in self._cell_pixels:
+            mask = self.mask if name is None else self.zone_masks[name]
+            ys, xs, _ = self.grid(rows, cols)
+            integral = cv2.integral((mask > 0).view(np.uint8), sdepth=cv2.CV_64F)
+            self._cell_pixels[key] = grid_sums(integral, ys, xs)
+        return self._cell_pixels[key]
+
+    def zone_stats(self, gray, motion=None):
+        """
+        Per-zone density (mean normalized intensity) and motion (px/frame) from the
+        cropped gray frame and a MotionEngine result.
+        """
+        stats = {}
+        for name, zone_mask in self.zone_masks.items():
+            density = cv2.mean(gray, mask=zone_mask)[0] / 255.0
+            stats[name] = {"density": density, "motion": self._zone_motion(name, zone_mask, motion)}
+        return stats
+
+    def _zone_motion(self, name, zone_mask, motion):
+        if motion is None:
+            return 0.0
+        if "magnitude" in motion:
+            magnitude = motion["magnitude"]
+            key = (name, magnitude.shape)
+            if key not in self._zone_small:
+                self._zone_small[key] = cv2.resize(zone_mask, (magnitude.shape[1], magnitude.shape[0]),
+                                                   interpolation=cv2.INTER_NEAREST)
+            return cv2.mean(magnitude, mask=self._zone_small[key])[0]
+
+        points = motion.get("points")
+        if points is None or len(points) == 0:
+            return 0.0
+        px = np.clip(points[:, 0].astype(int), 0, zone_mask.shape[1] - 1)
+        py = np.clip(points[:, 1].astype(int), 0, zone_mask.shape[0] - 1)
+        inside = zone_mask[py, px] > 0
+        return float(motion["point_magnitude"][inside].mean()) if inside.any() else 0.0
@@ -0,0 +1,361 @@
+"""
+Multi-process pipeline: decode, analysis and render / encode in separate processes.
+
+    decode process   VideoLoader.read(dst=slot) decodes straight into shared memory
+    this process     EnhancedCrowdSafetySystem.analyze_frame(): preprocessing, density,
+                     motion, anomaly, risk and alerts
+    render process   dashboard drawing and AsyncVideoWriter encoding
+
+Frames live in a ring of multiprocessing.shared_memory slots and are never
+pickled - the queues only carry slot numbers, sequence numbers and the small
+per-frame metrics. A slot travels free -> decode -> analysis -> (render) -> free,
+so the free-slot queue is the backpressure: decoding pauses while every slot is
+in flight, and the bounded render queue holds analysis back when drawing or
+encoding falls behind. Sequence numbers are checked at every hop so frames stay in order.
+
+Each stage has its own interpreter (and GIL), so one high-resolution camera
+can use three or more cores. Display, live capture, checkpoints and the frame
+cache stay with process_video().
+"""
+
+import multiprocessing as mp
+import queue
+import time
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from video_loader import VideoLoader
+from metric_store import MetricStoreWriter
+
+import config
+
+_MODEL_ACCURACY = 92.5
+
+
+class FrameRing:
+    """
+    `slots` frame buffers of one shape in a single SharedMemory block.
+    Created by the parent; workers attach with FrameRing.attach(ring.spec()).
+    """
+
+    def __init__(self, slots, shape, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner,
+                                              size=slots * int(np.prod(self.shape)))
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    def spec(self):
+        return self.slots, self.shape, self.shm.name
+
+    @classmethod
+    def attach(cls, spec):
+        slots, shape, name = spec
+        return cls(slots, shape, name)
+
+    def close(self):
+        # Views into the block must be gone before the mapping can close
+        self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+        if self.owner:
+            self.shm.unlink()
+
+
+def _get(q, stop=None, process=None, watch=None, timeout=0.1):
+    """
+    q.get() that returns None once `stop` is set or the producing `process` exited with
+    nothing left to read, and raises if the `watch` process (the consumer of the slots) died.
+    """
+    while True:
+        try:
+            return q.get(timeout=timeout)
+        except queue.Empty:
+            if stop is not None and stop.is_set():
+                return None
+            if process is not None and not process.is_alive() and q.empty():
+                return None
+            if watch is not None and not watch.is_alive():
+                raise RuntimeError(f"[ERROR] {watch.name} process stopped unexpectedly")
+
+
+def _put(q, item, consumer, timeout=0.1):
+    """Bounded q.put() that raises instead of blocking forever if the consumer died."""
+    while True:
+        try:
+            q.put(item, timeout=timeout)
+            return
+        except queue.Full:
+            if not consumer.is_alive():
+                raise RuntimeError(f"[ERROR] {consumer.name} process stopped unexpectedly")
+
+
+def _decode_worker(video_path, ring_spec, frame_skip, free, ready, stop):
+    """Decode process: fill free slots in order; messages are (seq, slot, position, capture time)."""
+    ring = FrameRing.attach(ring_spec)
+    loader = None
+    try:
+        loader = VideoLoader(video_path, frame_skip=frame_skip)
+        seq = 0
+        while not stop.is_set():
+            # Blocks while every slot is in flight (analysis / render are behind)
+            slot = _get(free, stop)
+            if slot is None:
+                break
+            dst = ring.frames[slot]
+            ret, frame = loader.read(dst=dst)
+            if not ret:
+                free.put(slot)
+                break
+            if not np.may_share_memory(frame, dst):
+                np.copyto(dst, frame)
+            ready.put((seq, slot, loader.position, loader.frame_timestamp))
+            seq += 1
+    except Exception:
+        ready.put(traceback.format_exc())
+    finally:
+        ready.put(None)
+        if loader is not None:
+            loader.release()
+        ring.close()
+
+
+def _render_worker(ring_spec, output_path, writer_options, render_q, free, results):
+    """
+    Render process: mirrors the dashboard state from the per-frame metrics and draws / encodes
+    the frames sent with a slot. Messages are (seq, slot or -1, metrics).
+    writer_options: AsyncVideoWriter settings, resolved in the parent (spawned workers re-import config)
+    """
+    from main import EnhancedCrowdSafetySystem
+    from video_writer import AsyncVideoWriter
+
+    ring = FrameRing.attach(ring_spec)
+    system = EnhancedCrowdSafetySystem()
+    dashboard = system.dashboard
+    metrics = system.metrics
+    out = None
+    rendered = 0
+    try:
+        out = AsyncVideoWriter(output_path, pool=system.analyzer.pool, **writer_options)
+        expected = 0
+        while True:
+            msg = render_q.get()
+            if msg is None:
+                break
+            seq, slot, m = msg
+            if seq != expected:
+                raise RuntimeError(f"[ERROR] Render got frame {seq}, expected {expected}")
+            expected += 1
+
+            dashboard.update_metrics(m["density"], m["risk_score"], m["motion"] / 20.0, m["anomaly"], m["fps"],
+                                     density_map=m["density_map"], motion_map=m["motion_map"])
+            dashboard.clear_old_alerts(max_age=5.0)
+            for alert_type, severity, message in m["alerts"]:
+                dashboard.add_alert(alert_type, severity, message)
+            if slot < 0:
+                continue
+
+            with metrics.stage("render"):
+                dashboard_frame = system.render_frame(ring.frames[slot], m["density"], m["motion"],
+                                                      m["risk_score"], m["fps"], _MODEL_ACCURACY)
+            # The video frame is already resized into the dashboard: the slot can be refilled
+            free.put(slot)
+            with metrics.stage("write"):
+                if not out.write(dashboard_frame):
+                    metrics.inc("frames_dropped")
+            rendered += 1
+    except Exception:
+        results.put({"rendered": rendered, "error": traceback.format_exc()})
+    finally:
+        if out is not None:
+            out.release()
+        results.put({"rendered": rendered, "writer": out.stats() if out is not None else None})
+        ring.close()
+
+
+def process_video_shm(video_path, output_path=None, render_every=None, slots=None, on_frame=None,
+                      metric_store=False, system=None):
+    """
+    Analyze (and optionally render to output_path) one video with decode, analysis and
+    render / encode in separate processes.
+    render_every: render 1 of every N frames (0 = analytics only, no render process)
+    slots: shared-memory frame slots in flight (default SHM_SLOTS)
+    on_frame: optional callback receiving one metrics record (dict) per analyzed frame
+    metric_store: directory for the per-frame metric store (False = off)
+    Returns the same run summary dict as process_video.
+    """
+    from main import EnhancedCrowdSafetySystem
+
+    system = system or EnhancedCrowdSafetySystem()
+    slots = slots or getattr(config, 'SHM_SLOTS', 8)
+    if render_every is None:
+        render_every = getattr(config, 'RENDER_EVERY', 1)
+    if not output_path:
+        render_every = 0
+    frame_skip = getattr(config, 'FRAME_SKIP', 1)
+
+    # Source properties from a short-lived probe (the decode process owns the capture)
+    probe = VideoLoader(video_path, frame_skip=frame_skip)
+    source_fps, total_frames = probe.source_fps, probe.total_frames
+    shape = (probe.source_height, probe.source_width, 3)
+    probe.release()
+
+    print(f"Shared-memory pipeline: {video_path}")
+    print(f"Resolution: {shape[1]}x{shape[0]} | Slots: {slots} ({slots * int(np.prod(shape)) / 1e6:.1f} MB)")
+    print(f"Processes: decode | analysis{' | render' if render_every else ''}")
+    print("-" * 50)
+
+    ring = FrameRing(slots, shape)
+    ctx = mp.get_context("spawn")
+    free, ready, results = ctx.Queue(), ctx.Queue(), ctx.Queue()
+    render_q = ctx.Queue(maxsize=2 * slots)
+    stop = ctx.Event()
+    for slot in range(slots):
+        free.put(slot)
+
+    decoder = ctx.Process(target=_decode_worker, name="pipeline-decode",
+                          args=(video_path, ring.spec(), frame_skip, free, ready, stop), daemon=True)
+    renderer = None
+    if render_every:
+        writer_options = dict(
+            fps=getattr(config, 'OUTPUT_FPS', None) or max(source_fps / render_every, 1),
+            size=getattr(config, 'OUTPUT_SIZE', None) or (1920, 1080),
+            backend=getattr(config, 'OUTPUT_BACKEND', 'opencv'),
+            queue_size=getattr(config, 'WRITER_QUEUE_SIZE', 8),
+            policy=getattr(config, 'WRITER_POLICY', 'block'),
+        )
+        renderer = ctx.Process(target=_render_worker, name="pipeline-render",
+                               args=(ring.spec(), str(output_path), writer_options, render_q, free, results),
+                               daemon=True)
+        renderer.start()
+    decoder.start()
+
+    store = None
+    if metric_store:
+        store = MetricStoreWriter(metric_store, video_path, source_fps, (system.analyzer.rows, system.analyzer.cols))
+
+    metrics = system.metrics
+    frame_num = 0
+    last_position = 0
+    expected = 0
+    run_start = time.perf_counter()
+    system.analyzer.reset()
+    try:
+        while True:
+            with metrics.stage("decode_wait"):
+                msg = _get(ready, process=decoder, watch=renderer)
+            if msg is None:
+                break
+            if isinstance(msg, str):
+                raise RuntimeError(f"[ERROR] Decode process failed:\n{msg}")
+            seq, slot, position, timestamp = msg
+            if seq != expected:
+                raise RuntimeError(f"[ERROR] Frame {seq} arrived out of order (expected {expected})")
+            expected += 1
+
+            frame_num += 1
+            frame_gap = position - last_position
+            last_position = position
+            metrics.inc("frames_processed")
+
+            result = system.analyze_frame(ring.frames[slot], frame_gap=frame_gap)
+            if result["alerts"] and timestamp is not None:
+                metrics.observe("capture_to_alert", time.monotonic() - timestamp)
+
+            if renderer is not None:
+                analysis = result["analysis"]
+                render = frame_num % render_every == 0
+                with metrics.stage("render_wait"):
+                    _put(render_q, (seq, slot if render else -1, {
+                        "density": result["density"], "motion": result["motion"],
+                        "risk_score": result["risk_score"], "anomaly": result["anomaly"], "fps": result["fps"],
+                        "density_map": analysis["density_map"], "motion_map": analysis["motion_map"],
+                        "alerts": [(a["type"], a["severity"], a["message"]) for a in result["alerts"]],
+                    }), renderer)
+                if not render:
+                    free.put(slot)
+            else:
+                free.put(slot)
+
+            if on_frame is not None or store is not None:
+                record = system.frame_record(frame_num, position, source_fps, result)
+                if on_frame is not None:
+                    on_frame(record)
+                if store is not None:
+                    store.append(record, result["analysis"]["density_map"], result["alerts"])
+
+            if system.analyzer.pool is not None:
+                system.analyzer.pool.end_frame()
+
+            if frame_num % 30 == 0:
+                print(f"Progress: {position / max(total_frames, 1) * 100:.1f}% | "
+                      f"FPS: {result['fps']:.1f} | Risk: {result['risk']} ({result['risk_score']:.2f})", end='\r')
+
+    except KeyboardInterrupt:
+        print("\n\nProcessing interrupted by user")
+
+    finally:
+        stop.set()
+        render_stats = {}
+        if renderer is not None:
+            try:
+                render_q.put(None, timeout=5.0)
+            except queue.Full:
+                pass
+            # Wait for the writer to flush; its stats are the last message
+            while renderer.is_alive() or not results.empty():
+                stats = _get(results, process=renderer, timeout=0.5)
+                if stats is None:
+                    break
+                render_stats.update({k: v for k, v in stats.items() if v is not None})
+            renderer.join(timeout=5.0)
+        decoder.join(timeout=5.0)
+        for process in (decoder, renderer):
+            if process is not None and process.is_alive():
+                process.terminate()
+        ring.close()
+        if store is not None:
+            store.close()
+        if "error" in render_stats:
+            print(f"❌ Render process failed:\n{render_stats['error']}")
+
+    seconds = time.perf_counter() - run_start
+    summary = {
+        "frames": frame_num,
+        "seconds": seconds,
+        "fps": frame_num / max(seconds, 1e-6),
+        "high_risk_frames": system.dashboard.high_risk_frames,
+        "anomalies": system.dashboard.anomaly_count,
+        "rendered": render_stats.get("rendered", 0),
+    }
+
+    print("\n" + "=" * 50)
+    print("PIPELINE COMPLETE")
+    print(f"Total frames processed: {frame_num} in {seconds:.1f}s ({summary['fps']:.1f} FPS)")
+    print(f"High risk frames: {summary['high_risk_frames']}")
+    print(f"Anomalies detected: {summary['anomalies']}")
+    if render_every:
+        writer = render_stats.get("writer") or {}
+        print(f"Rendered: {summary['rendered']} frames | written {writer.get('written', 0)} "
+              f"| dropped {writer.get('dropped', 0)}")
+    summary_stages = metrics.stage_summary()
+    if summary_stages:
+        print(f"{'stage':18s} {'p50 ms':>8s} {'p95 ms':>8s}")
+        for name, p50, p95, _, _ in summary_stages:
+            print(f"  {name:18s} {p50:8.2f} {p95:8.2f}")
+    print("=" * 50)
+    return summary
+
+
+if __name__ == "__main__":
+    print("🔀 Testing shared-memory pipeline...")
+    video_path = getattr(config, 'VIDEO_PATH', 'data/videos/merged_crowd_demo.mp4')
+    try:
+        process_video_shm(video_path, output_path=None)
+    except FileNotFoundError as e:
+        print(f"ℹ️  {e} - NORMAL without video file")
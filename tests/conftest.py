@@ -0,0 +1,79 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import generate_synthetic_video
+
+
+@pytest.fixture(scope="session")
+def video(tmp_path_factory):
+    """Short deterministic synthetic crowd clip (24 frames, 320x240, 25 fps)."""
+    path = tmp_path_factory.mktemp("video") / "synthetic.mp4"
+    return generate_synthetic_video(str(path), 320, 240, frames=24, blobs=30, speed=4.0, seed=1)
+
+
+@pytest.fixture(scope="session")
+def quiet_video(video, tmp_path_factory):
+    """The synthetic clip with every 3rd frame held for 4 frames (static stretches the change gate skips)."""
+    cap = cv2.VideoCapture(video)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+
+    path = str(tmp_path_factory.mktemp("video") / "quiet.mp4")
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), 25, (width, height))
+    for i, frame in enumerate(frames[:12]):
+        for _ in range(4 if i % 3 == 2 else 1):
+            writer.write(frame)
+    writer.release()
+    return path
+
+
+def _write_shifted(video, path, contrast=1.0):
+    """One frame of `video`, held for 3 frames, then shifted 20 px (16 frames)."""
+    cap = cv2.VideoCapture(video)
+    _, frame = cap.read()
+    cap.release()
+    if contrast != 1.0:
+        frame = (frame * contrast + 100 * (1 - contrast)).astype(np.uint8)
+
+    height, width = frame.shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), 25, (width, height))
+    for i in range(16):
+        shift = np.float32([[1, 0, (i // 3) * 20], [0, 1, 0]])
+        writer.write(cv2.warpAffine(frame, shift, (width, height), borderMode=cv2.BORDER_WRAP))
+    writer.release()
+    return path
+
+
+@pytest.fixture(scope="session")
+def shifted_video(video, tmp_path_factory):
+    return _write_shifted(video, str(tmp_path_factory.mktemp("video") / "shifted.mp4"))
+
+
+@pytest.fixture(scope="session")
+def low_contrast_video(video, tmp_path_factory):
+    """The shifted clip at 8% contrast: small raw differences that preprocessing normalizes up."""
+    return _write_shifted(video, str(tmp_path_factory.mktemp("video") / "low_contrast.mp4"), contrast=0.08)
+
+
+def run_headless(video_path, **kwargs):
+    """process_video() analytics only; returns the per-frame records."""
+    from main import EnhancedCrowdSafetySystem
+
+    records = []
+    system = EnhancedCrowdSafetySystem()
+    kwargs.setdefault("metric_store", False)
+    system.process_video(video_path, headless=True, on_frame=records.append, **kwargs)
+    return records, system
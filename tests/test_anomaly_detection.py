@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from anomaly_detection import AnomalyDetector, RunningStats, WindowStats
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    return rng.normal(5.0, 1.0, 200), rng.uniform(0.2, 0.4, (200, 3, 4))
+
+
+def test_running_stats_match_numpy(series):
+    values, maps = series
+    stats, cell_stats = RunningStats(), RunningStats((3, 4))
+    for value, grid in zip(values, maps):
+        stats.update(value)
+        cell_stats.update(grid)
+    assert stats.center == pytest.approx(values.mean())
+    assert stats.std == pytest.approx(values.std(ddof=1))
+    np.testing.assert_allclose(cell_stats.std, maps.std(axis=0, ddof=1))
+
+
+def test_window_stats_keep_only_the_window(series):
+    values, _ = series
+    stats = WindowStats(50)
+    for value in values:
+        stats.update(value)
+    assert stats.count == len(values)
+    assert stats.center == pytest.approx(np.median(values[-50:]))
+
+
+@pytest.mark.parametrize("mode", AnomalyDetector.MODES)
+def test_state_round_trip_continues_identically(series, mode):
+    values, maps = series
+    detector = AnomalyDetector(mode, half_life=20, window=40)
+    for value, grid in zip(values[:100], maps[:100]):
+        detector.compute_score(value / 10, grid.mean())
+        detector.compute_cell_scores(grid, grid * 10)
+
+    restored = AnomalyDetector(mode, half_life=20, window=40)
+    restored.set_state(detector.get_state())
+    for value, grid in zip(values[100:], maps[100:]):
+        assert restored.compute_score(value / 10, grid.mean()) == detector.compute_score(value / 10, grid.mean())
+        np.testing.assert_array_equal(restored.compute_cell_scores(grid, grid * 10),
+                                      detector.compute_cell_scores(grid, grid * 10))
+
+
+def test_state_mode_mismatch():
+    with pytest.raises(ValueError):
+        AnomalyDetector("ewma").set_state(AnomalyDetector("welford").get_state())
+
+
+@pytest.mark.parametrize("mode", AnomalyDetector.MODES)
+def test_cell_scores_flag_only_the_surging_cell(series, mode):
+    _, maps = series
+    detector = AnomalyDetector(mode, warmup=10)
+    assert not detector.compute_cell_scores(maps[0], maps[0]).any()
+    for grid in maps[1:100]:
+        detector.compute_cell_scores(grid, grid)
+
+    surge = maps[100].copy()
+    surge[1, 2] += 0.5
+    scores = detector.compute_cell_scores(surge, maps[100])
+    assert scores[1, 2] > 0.5
+    assert np.delete(scores.ravel(), 1 * 4 + 2).max() < 0.3
+
+
+def test_score_is_zero_during_warmup():
+    detector = AnomalyDetector(warmup=5)
+    assert [detector.compute_score(9.0, 0.9) for _ in range(4)] == [0.0] * 4
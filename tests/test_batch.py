@@ -0,0 +1,68 @@
+import csv
+import json
+import os
+import shutil
+
+import config
+from batch import MANIFEST_NAME, clip_id, find_videos, process_clip, run_batch
+
+
+def test_find_videos(tmp_path):
+    for name in ("a/cam1.mp4", "a/notes.txt", "b/cam1.MP4", "b/deep/cam2.avi"):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+    found = find_videos([str(tmp_path / "a"), str(tmp_path / "b" / "**" / "*"), str(tmp_path / "a" / "*.mp4")])
+    assert [os.path.relpath(p, tmp_path) for p in found] == ["a/cam1.mp4", "b/cam1.MP4", "b/deep/cam2.avi"]
+    # Equal names in different folders get different output files
+    assert clip_id(found[0]) != clip_id(found[1])
+
+
+def manifest_status(output_dir):
+    with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+        return {os.path.basename(os.path.dirname(clip)): entry["status"] for clip, entry in json.load(f)["clips"].items()}
+
+
+def test_manifest_resume(video, tmp_path):
+    archive = tmp_path / "archive"
+    for cam in ("cam1", "cam2"):
+        (archive / cam).mkdir(parents=True)
+        shutil.copy(video, archive / cam / "clip.mp4")
+    (archive / "broken").mkdir()
+    (archive / "broken" / "clip.mp4").write_text("not a video")
+    output_dir = str(tmp_path / "out")
+
+    report = run_batch([str(archive)], output_dir, workers=1)
+    assert (report["clips"], report["failed"], report["frames"]) == (2, 1, 48)
+    assert manifest_status(output_dir) == {"cam1": "done", "cam2": "done", "broken": "failed"}
+    cam1 = str(archive / "cam1" / "clip.mp4")
+    csv_path = os.path.join(output_dir, f"{clip_id(cam1)}.csv")
+    with open(csv_path) as f:
+        assert len(list(csv.DictReader(f))) == 24
+
+    # Rerun: finished and failed clips are skipped
+    report = run_batch([str(archive)], output_dir, workers=1)
+    assert (report["clips"], report["failed"]) == (0, 0)
+
+    # A deleted CSV makes its clip pending again; --retry-failed reruns the broken one
+    os.remove(csv_path)
+    report = run_batch([str(archive)], output_dir, workers=1, retry_failed=True)
+    assert (report["clips"], report["failed"], report["frames"]) == (1, 1, 24)
+    assert os.path.exists(csv_path)
+    assert manifest_status(output_dir) == {"cam1": "done", "cam2": "done", "broken": "failed"}
+
+
+def test_clips_never_share_the_configured_checkpoint(video, tmp_path, monkeypatch):
+    shared = tmp_path / "session.ckpt.npz"
+    monkeypatch.setattr(config, "CHECKPOINT_PATH", str(shared))
+    monkeypatch.setattr(config, "CHECKPOINT_EVERY", 8)
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    summary = process_clip(video, str(output_dir))
+
+    assert summary["frames"] == 24
+    assert not shared.exists()
+    # The clip's own checkpoint is dropped once it finished
+    assert not (output_dir / f"{clip_id(video)}.ckpt.npz").exists()
+    assert not [name for name in os.listdir(output_dir) if ".tmp" in name]
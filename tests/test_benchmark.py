@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+import pytest
+
+import config
+from benchmark import (StageTimer, benchmark_resolution, compare_to_baseline, generate_synthetic_video,
+                       parse_resolutions)
+
+
+def read_frames(path):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return np.stack(frames)
+
+
+@pytest.fixture(scope="module")
+def short_video(tmp_path_factory):
+    path = tmp_path_factory.mktemp("bench") / "clip.mp4"
+    return generate_synthetic_video(str(path), 160, 120, frames=8, blobs=10, seed=3)
+
+
+def test_synthetic_video_is_deterministic(tmp_path, short_video):
+    frames = read_frames(short_video)
+    assert frames.shape == (8, 120, 160, 3)
+    again = generate_synthetic_video(str(tmp_path / "again.mp4"), 160, 120, frames=8, blobs=10, seed=3)
+    other = generate_synthetic_video(str(tmp_path / "other.mp4"), 160, 120, frames=8, blobs=10, seed=4)
+    np.testing.assert_array_equal(read_frames(again), frames)
+    assert not np.array_equal(read_frames(other), frames)
+
+
+def test_stage_timer_drops_warmup_calls():
+    timer = StageTimer(warmup=2)
+    for _ in range(5):
+        assert timer.time("stage", max, 1, 2) == 2
+    summary = timer.summary()["stage"]
+    assert summary["n"] == 3
+    assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"]
+
+
+def test_compare_to_baseline():
+    def report(p50):
+        return {"results": {"640x480": {"fast": {"p50_ms": 1.0}, "slow": {"p50_ms": p50}}}}
+
+    assert compare_to_baseline(report(1.1), report(1.0), tolerance=0.15) == []
+    regressions = compare_to_baseline(report(1.3), report(1.0), tolerance=0.15)
+    assert [(r["stage"], round(r["change"], 2)) for r in regressions] == [("slow", 0.3)]
+    # Stages missing from the baseline are not regressions
+    assert compare_to_baseline(report(9.0), {"results": {}}) == []
+
+
+def test_parse_resolutions():
+    assert parse_resolutions("640x480,1280X720") == ((640, 480), (1280, 720))
+
+
+@pytest.mark.parametrize("analysis_size, timed", [((640, 480), False), ((160, 120), True)])
+def test_analyzer_stage_only_at_the_analysis_resolution(short_video, monkeypatch, analysis_size, timed):
+    monkeypatch.setattr(config, "ANALYSIS_WIDTH", analysis_size[0])
+    monkeypatch.setattr(config, "ANALYSIS_HEIGHT", analysis_size[1])
+    results = benchmark_resolution(short_video, 160, 120)
+
+    assert ("FrameAnalyzer.analyze" in results) == timed
+    assert results["VideoLoader.read"]["n"] == 9 - 3
+    assert results["estimate_density"]["n"] == 8 - 3
@@ -0,0 +1,46 @@
+import numpy as np
+
+from buffer_pool import BufferPool, buffer, ring_buffer
+from frame_analysis import FrameAnalyzer
+from video_loader import VideoLoader
+
+
+def test_get_reuses_buffers():
+    pool = BufferPool()
+    a = pool.get("a", (4, 4))
+    assert pool.get("a", (4, 4)) is a
+    assert pool.allocations == 1
+
+    # A different shape or dtype replaces the buffer
+    pool.get("a", (4, 5))
+    pool.get("a", (4, 5), np.float32)
+    assert pool.allocations == 3
+
+
+def test_ring_allocates_count_buffers_once():
+    pool = BufferPool()
+    handed = [pool.ring("r", 3, (2, 2)) for _ in range(9)]
+    assert pool.allocations == 3
+    assert handed[0] is handed[3] is handed[6]
+    assert handed[0] is not handed[1]
+
+
+def test_helpers_without_pool():
+    assert buffer(None, "a", (2, 2)) is None
+    assert ring_buffer(None, "r", 2, (2, 2)) is None
+
+
+def test_pipeline_allocates_nothing_after_warmup(video):
+    analyzer = FrameAnalyzer()
+    loader = VideoLoader(video, pool=analyzer.pool)
+    per_frame = []
+    while True:
+        ret, frame = loader.read()
+        if not ret:
+            break
+        analyzer.analyze(frame)
+        per_frame.append(analyzer.pool.end_frame())
+    loader.release()
+
+    assert per_frame[0] > 0
+    assert per_frame[3:] == [0] * len(per_frame[3:])
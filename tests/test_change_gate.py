@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+
+import config
+from change_gate import ChangeGate
+from frame_analysis import FrameAnalyzer
+
+EDGES = (np.array([0, 40, 80]), np.array([0, 40, 80, 120]))
+
+
+def textured(seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (80, 120), dtype=np.uint8)
+
+
+def test_only_changed_cells_are_recomputed():
+    gate = ChangeGate(threshold=3.0, scale=0.25, refresh_interval=50)
+    frame = textured()
+    assert gate.update(frame, *EDGES).all()
+    assert not gate.update(frame, *EDGES).any()
+
+    moved = frame.copy()
+    moved[45:75, 85:115] = textured(1)[45:75, 85:115]
+    expected = np.zeros((2, 3), dtype=bool)
+    expected[1, 2] = True
+    np.testing.assert_array_equal(gate.update(moved, *EDGES), expected)
+    # A settled cell is recomputed once more, then skipped
+    np.testing.assert_array_equal(gate.update(moved, *EDGES), expected)
+    assert not gate.update(moved, *EDGES).any()
+
+    stats = gate.stats()
+    assert stats["frames"] == 5 and stats["skipped_ratio"] == 2 / 5
+    assert stats["computed_cell_ratio"] == (6 + 1 + 1) / 30
+
+
+def test_refresh_interval_recomputes_everything():
+    gate = ChangeGate(refresh_interval=3)
+    frame = textured()
+    changed = [bool(gate.update(frame, *EDGES).all()) for _ in range(7)]
+    assert changed == [True, False, False, True, False, False, True]
+
+
+def test_bgr_and_sized_frames():
+    gate = ChangeGate()
+    frame = np.dstack([textured()] * 3)
+    # Cell edges given in a 240x160 frame's pixels while the gate sees 120x80
+    edges = (EDGES[0] * 2, EDGES[1] * 2)
+    assert gate.update(frame, *edges, size=(240, 160)).shape == (2, 3)
+    assert not gate.update(frame, *edges, size=(240, 160)).any()
+
+
+def test_static_frames_carry_the_previous_result(quiet_video, monkeypatch):
+    monkeypatch.setattr(config, "CHANGE_GATE", True)
+    analyzer = FrameAnalyzer(4, 4)
+    cap = cv2.VideoCapture(quiet_video)
+    results = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        result = analyzer.analyze(frame)
+        results.append((result["gated"], result["motion"], result["density"]))
+    cap.release()
+
+    gated = [i for i, (is_gated, _, _) in enumerate(results) if is_gated]
+    assert gated
+    for i in gated:
+        assert results[i][1:] == results[i - 1][1:]
@@ -0,0 +1,35 @@
+import numpy as np
+
+from charts import Gauge, LineChart, hex_to_bgr
+
+
+def test_hex_to_bgr():
+    assert hex_to_bgr("#ff8000") == (0, 128, 255)
+
+
+def test_line_chart_draws_into_its_reused_canvas():
+    chart = LineChart(400, 200, "Density", "#00ff00", "d")
+    canvas = chart.render(np.linspace(0.0, 0.8, 50))
+    assert canvas.shape == (200, 400, 3) and canvas.dtype == np.uint8
+    assert canvas is chart.canvas
+    # The line color appears only once data is drawn
+    assert (canvas == (0, 255, 0)).all(axis=2).any()
+    assert not (chart.background == (0, 255, 0)).all(axis=2).any()
+
+
+def test_line_chart_redraw_leaves_no_trace():
+    chart, fresh = LineChart(300, 150, "Motion", "#ff0000", "m"), LineChart(300, 150, "Motion", "#ff0000", "m")
+    chart.render(np.full(30, 0.9))
+    np.testing.assert_array_equal(chart.render([0.1, 0.2]).copy(), fresh.render([0.1, 0.2]))
+    # Fewer than two points draw no line
+    assert not (chart.render([0.5]) == (0, 0, 255)).all(axis=2).any()
+
+
+def test_gauge_color_follows_value():
+    gauge = Gauge(300, 200, "Risk")
+    fresh = Gauge(300, 200, "Risk").render(0.1).copy()
+    assert gauge.render(0.9).shape == (200, 300, 3)
+    assert (gauge.canvas == (0, 0, 255)).all(axis=2).sum() > 100
+    low = gauge.render(0.1)
+    assert not (low == (0, 0, 255)).all(axis=2).any()
+    np.testing.assert_array_equal(low, fresh)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+import config
+from checkpoint import Checkpointer
+from main import EnhancedCrowdSafetySystem
+
+from conftest import run_headless
+
+
+def test_save_restore_round_trip(video, tmp_path):
+    path = tmp_path / "session.ckpt.npz"
+    _, system = run_headless(video, checkpoint=str(path), resume=False)
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+
+    restored = EnhancedCrowdSafetySystem()
+    meta = Checkpointer(path).restore(restored)
+    assert meta["frame_num"] == system.dashboard.total_frames == 24
+
+    for name in ("total_frames", "high_risk_frames", "anomaly_count", "alert_count"):
+        assert getattr(restored.dashboard, name) == getattr(system.dashboard, name)
+    for name, history in system.dashboard.history.series.items():
+        np.testing.assert_array_equal(restored.dashboard.history.series[name].view(), history.view())
+    np.testing.assert_array_equal(restored.analyzer.prev_gray, system.analyzer.prev_gray)
+    for key, value in system.scorer.anomaly_detector.get_state().items():
+        np.testing.assert_array_equal(restored.scorer.anomaly_detector.get_state()[key], value)
+
+
+def test_resume_after_crash_matches_uninterrupted_run(video, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CHECKPOINT_EVERY", 8)
+    path = tmp_path / "session.ckpt.npz"
+    full, _ = run_headless(video)
+
+    def crash(record):
+        if record["frame"] == 14:
+            raise RuntimeError("crash")
+
+    with pytest.raises(RuntimeError):
+        EnhancedCrowdSafetySystem().process_video(video, headless=True, on_frame=crash, metric_store=False,
+                                                  checkpoint=str(path))
+    resumed, _ = run_headless(video, checkpoint=str(path))
+
+    assert resumed[0]["frame"] == 9 and resumed[-1]["frame"] == 24
+    for a, b in zip(full[resumed[0]["frame"] - 1:], resumed):
+        assert a["frame"] == b["frame"]
+        assert a["motion"] == pytest.approx(b["motion"], abs=1e-6)
+        assert a["anomaly_score"] == pytest.approx(b["anomaly_score"], abs=1e-6)
+
+
+def test_finished_run_is_not_resumed(video, tmp_path):
+    path = tmp_path / "session.ckpt.npz"
+    first, _ = run_headless(video, checkpoint=str(path))
+    meta, _ = Checkpointer(path).load()
+    assert meta["complete"] and meta["frame_num"] == len(first) == 24
+
+    # Rerunning the same file analyzes it again instead of "resuming" at the end
+    second, _ = run_headless(video, checkpoint=str(path))
+    assert len(second) == 24 and second[0]["frame"] == 1
+
+
+def test_load_missing_checkpoint(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Checkpointer(tmp_path / "missing.npz").load()
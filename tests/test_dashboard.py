@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+import dashboard
+from dashboard import CrowdSafetyDashboard, DashboardCompositor
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Stats / timing panels refresh once per second of wall clock; step it by hand
+    now = [1000.0]
+    monkeypatch.setattr(dashboard.time, "time", lambda: now[0])
+    return now
+
+
+def feed(board, i):
+    # Gauges hold their value for 3 frames, so some regions stay clean between renders
+    board.update_metrics(0.1 + 0.03 * (i // 3), 0.2 + 0.04 * (i // 3), 2.0 + i, i % 5 == 0, 20.0 + i)
+    if i == 6:
+        board.add_alert("High Risk", "high", "Risk above threshold")
+
+
+def test_dirty_regions_match_a_full_render(clock):
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 256, (15, 240, 320, 3), dtype=np.uint8)
+    incremental, full = CrowdSafetyDashboard(), CrowdSafetyDashboard()
+
+    for i, frame in enumerate(frames):
+        clock[0] += 1.0
+        feed(incremental, i)
+        feed(full, i)
+        output = incremental.render_dashboard(frame)
+    assert output.shape == (1080, 1920, 3)
+    np.testing.assert_array_equal(output, full.render_dashboard(frames[-1]))
+
+
+def test_compositor_redraws_only_changed_regions():
+    comp = DashboardCompositor(40, 20, (5, 5, 5))
+    comp.add_region("a", 0, 10, 0, 20)
+    comp.add_region("badge", 10, 20, 20, 40, opaque=False)
+    calls = []
+
+    def fill(name, value):
+        def draw(view):
+            calls.append(name)
+            view[:2] = value
+        return draw
+
+    comp.compose({"a": (1, fill("a", 50)), "badge": (1, fill("badge", 60))})
+    comp.compose({"a": (1, fill("a", 70)), "badge": (2, fill("badge", 80))})
+    output = comp.compose({"a": (None, fill("a", 90)), "badge": (2, fill("badge", 0))})
+
+    assert calls == ["a", "badge", "badge", "a"]
+    assert output[0, 0, 0] == 90 and output[10, 20, 0] == 80
+    # Transparent regions start from the background on every redraw
+    assert output[15, 30, 0] == 5
+
+    comp.invalidate()
+    comp.compose({"a": (1, fill("a", 1)), "badge": (2, fill("badge", 2))})
+    assert calls[-2:] == ["a", "badge"]
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from buffer_pool import BufferPool
+from density_estimation import (_grid_edges, estimate_density, estimate_density_masked,
+                                estimate_density_multiscale)
+
+
+@pytest.fixture
+def gray():
+    return np.random.default_rng(0).integers(0, 256, (97, 131), dtype=np.uint8)
+
+
+def reference_density(gray, rows, cols):
+    ys, xs = _grid_edges(gray.shape[0], rows), _grid_edges(gray.shape[1], cols)
+    return np.array([[gray[ys[r]:ys[r + 1], xs[c]:xs[c + 1]].mean() for c in range(cols)]
+                     for r in range(rows)]) / 255.0
+
+
+def test_density_matches_cell_means(gray):
+    # 97x131 does not divide evenly: edge cells must still cover every pixel
+    np.testing.assert_allclose(estimate_density(gray, 10, 10), reference_density(gray, 10, 10), atol=1e-12)
+
+
+def test_multiscale_matches_single_grids(gray):
+    maps = estimate_density_multiscale(gray, grids=((4, 4), (10, 10), (20, 20)), pool=BufferPool())
+    assert set(maps) == {(4, 4), (10, 10), (20, 20)}
+    for (rows, cols), density_map in maps.items():
+        np.testing.assert_allclose(density_map, estimate_density(gray, rows, cols), atol=1e-12)
+
+
+def test_masked_density_ignores_pixels_outside_the_mask(gray):
+    mask = np.zeros(gray.shape, np.uint8)
+    mask[:, :60] = 255
+    ys, xs = _grid_edges(gray.shape[0], 2), _grid_edges(gray.shape[1], 2)
+    valid = np.array([[True, False], [True, False]])
+
+    maps, density = estimate_density_masked(gray, mask, {(2, 2): (ys, xs, valid)})
+    # Changing pixels outside the mask changes nothing
+    bright = gray.copy()
+    bright[:, 60:] = 255
+    maps_bright, density_bright = estimate_density_masked(bright, mask, {(2, 2): (ys, xs, valid)})
+
+    assert density == pytest.approx(gray[:, :60].mean() / 255.0) == density_bright
+    assert np.isnan(maps[(2, 2)][:, 1]).all()
+    np.testing.assert_array_equal(maps[(2, 2)], maps_bright[(2, 2)])
+    assert maps[(2, 2)][0, 0] == pytest.approx(gray[:ys[1], :60].mean() / 255.0)
@@ -0,0 +1,41 @@
+import pytest
+
+import config
+
+from conftest import run_headless
+
+KEYS = ("density", "motion", "anomaly_score", "risk_score")
+
+
+@pytest.mark.parametrize("clip, gate, tier", [
+    ("quiet_video", False, "full"),
+    ("quiet_video", True, "full"),
+    ("shifted_video", True, "full"),
+    ("shifted_video", True, "pyramid"),
+    ("shifted_video", True, "warm"),
+    ("low_contrast_video", True, "full"),
+])
+def test_cache_hit_equals_fill(request, tmp_path, monkeypatch, clip, gate, tier):
+    # With the gate, held frames are skipped while the cache still stores them
+    video = request.getfixturevalue(clip)
+    monkeypatch.setattr(config, "FRAME_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(config, "CHANGE_GATE", gate)
+    monkeypatch.setattr(config, "MOTION_TIER", tier)
+
+    runs = [run_headless(video, frame_cache=cache) for cache in (False, True, True)]
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+    (reference, _), (fill, _), (hit, _) = runs
+
+    # Decoded and cached frames must gate alike
+    gated = [s.metrics.counters.get("gated_frames", 0) for _, s in runs]
+    assert gated[0] == gated[1] == gated[2]
+    if gate and clip != "low_contrast_video":
+        assert gated[0] > 0
+
+    assert len(reference) == len(fill) == len(hit) > 0
+    assert max(r["motion"] for r in reference) > 0.5
+    for a, b, c in zip(reference, fill, hit):
+        assert a["position"] == b["position"] == c["position"]
+        for key in KEYS:
+            assert b[key] == pytest.approx(a[key], abs=1e-6)
+            assert c[key] == pytest.approx(b[key], abs=1e-6)
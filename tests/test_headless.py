@@ -0,0 +1,47 @@
+import cv2
+import pytest
+
+from main import EnhancedCrowdSafetySystem
+
+from conftest import run_headless
+
+KEYS = ("density", "motion", "anomaly_score", "risk_score")
+
+
+def count_frames(path):
+    cap = cv2.VideoCapture(str(path))
+    frames = 0
+    while cap.read()[0]:
+        frames += 1
+    cap.release()
+    return frames
+
+
+def test_headless_renders_and_writes_nothing(video, tmp_path, monkeypatch):
+    system = EnhancedCrowdSafetySystem()
+    monkeypatch.setattr(system, "render_frame", lambda *args: pytest.fail("headless run rendered a frame"))
+    records = []
+    summary = system.process_video(video, str(tmp_path / "out.mp4"), headless=True,
+                                   on_frame=records.append, metric_store=False)
+
+    assert summary["frames"] == len(records) == 24
+    assert not (tmp_path / "out.mp4").exists()
+
+
+def test_render_every_keeps_analytics_and_writes_rendered_frames(video, tmp_path):
+    reference, _ = run_headless(video)
+
+    system = EnhancedCrowdSafetySystem()
+    rendered, records = [], []
+    render_frame = system.render_frame
+    system.render_frame = lambda frame, *args: rendered.append(frame) or render_frame(frame, *args)
+    system.process_video(video, str(tmp_path / "out.mp4"), display=False, render_every=3,
+                         on_frame=records.append, metric_store=False)
+
+    # Rendering is only a consumer: 1 of every 3 frames, same metrics as the headless run
+    assert len(rendered) == 8
+    assert count_frames(tmp_path / "out.mp4") == 8
+    assert len(records) == len(reference)
+    for a, b in zip(reference, records):
+        for key in KEYS:
+            assert b[key] == pytest.approx(a[key], abs=1e-6)
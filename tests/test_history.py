@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from history import RingHistory
+
+
+def test_ring_history_wraps_around():
+    history = RingHistory(4)
+    history.extend(range(10))
+
+    assert len(history) == 4
+    np.testing.assert_array_equal(history.view(), [6, 7, 8, 9])
+    np.testing.assert_array_equal(history[-2:], [8, 9])
+    assert history[-1] == 9 and history.last() == 9
+
+
+def test_ring_history_partial_and_clear():
+    history = RingHistory(5, shape=(2, 2), dtype=np.float32)
+    assert not history and history.last() == 0.0
+    history.append(np.ones((2, 2)))
+    history.append(np.full((2, 2), 2.0))
+    assert history.view().shape == (2, 2, 2)
+    assert history.view(1)[0, 0, 0] == 2.0
+
+    history.clear()
+    assert len(history) == 0 and history.view().shape == (0, 2, 2)
+
+
+def test_ring_history_views_are_read_only():
+    history = RingHistory(3)
+    history.extend([1.0, 2.0, 3.0, 4.0])
+    with pytest.raises(ValueError):
+        history.view()[0] = 0.0
+
+
+def test_ring_history_rejects_empty_capacity():
+    with pytest.raises(ValueError):
+        RingHistory(0)
@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+import pytest
+
+from video_loader import VideoLoader
+
+
+@pytest.fixture(scope="module")
+def reference(video):
+    loader = VideoLoader(video)
+    frames = []
+    while True:
+        ret, frame = loader.read()
+        if not ret:
+            break
+        frames.append(frame)
+    loader.release()
+    return frames
+
+
+def read_live(video, delay):
+    loader = VideoLoader(video, live=True)
+    delivered = []
+    try:
+        while True:
+            ret, frame = loader.read()
+            if not ret:
+                break
+            delivered.append((loader.position, loader.frame_timestamp, frame))
+            time.sleep(delay)
+    finally:
+        loader.release()
+    return delivered, loader.live_stats()
+
+
+@pytest.mark.parametrize("delay", [0.0, 0.1])
+def test_live_reads_return_the_newest_frame(video, reference, delay):
+    delivered, stats = read_live(video, delay)
+    positions = [position for position, _, _ in delivered]
+    timestamps = [timestamp for _, timestamp, _ in delivered]
+
+    assert positions == sorted(set(positions)) and timestamps == sorted(timestamps)
+    for position, _, frame in delivered:
+        np.testing.assert_array_equal(frame, reference[position - 1])
+
+    # Every grabbed frame is either analyzed or counted as dropped
+    assert stats["grabbed"] == len(reference)
+    assert stats["delivered"] == len(delivered)
+    assert stats["delivered"] + stats["dropped"] == stats["grabbed"]
+    if delay:
+        # A reader slower than the source (25 fps) skips ahead instead of falling behind
+        assert stats["dropped"] > 0 and max(np.diff(positions)) > 1
+        assert stats["drop_ratio"] == stats["dropped"] / stats["grabbed"]
+
+
+def test_live_mode_rejects_seek_and_dst(video):
+    loader = VideoLoader(video, live=True)
+    try:
+        with pytest.raises(ValueError):
+            loader.seek(5)
+        with pytest.raises(ValueError):
+            loader.read(dst=np.empty((240, 320, 3), np.uint8))
+    finally:
+        loader.release()
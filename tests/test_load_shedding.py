@@ -0,0 +1,36 @@
+from load_shedding import LoadShedder
+
+
+def test_ladder_order():
+    shedder = LoadShedder(25.0, render_every=1, motion_tier="pyramid", frame_skip=1,
+                          max_render_every=4, max_frame_skip=3)
+    assert [tuple(level.values()) for level in shedder.levels] == [
+        (1, "pyramid", 1),
+        (2, "pyramid", 1), (4, "pyramid", 1),     # 1. render less often
+        (4, "warm", 1), (4, "sparse", 1),         # 2. cheaper motion tiers
+        (4, "sparse", 2), (4, "sparse", 3),       # 3. raise the frame skip
+    ]
+
+
+def test_live_ladder_keeps_frame_skip():
+    # process_video caps the skip at the current one in live mode
+    shedder = LoadShedder(25.0, render_every=0, motion_tier="full", frame_skip=1, max_frame_skip=1)
+    assert [level["motion_tier"] for level in shedder.levels] == ["full", "pyramid", "warm", "sparse"]
+    assert {level["frame_skip"] for level in shedder.levels} == {1}
+
+
+def test_sheds_one_level_at_a_time_and_recovers():
+    shedder = LoadShedder(25.0, render_every=1, hold_frames=2, max_render_every=2, max_frame_skip=1)
+    top = len(shedder.levels) - 1
+    budget = shedder.budget
+    levels = []
+    for _ in range(2 * top + 2):
+        shedder.update(2 * budget)
+        levels.append(shedder.level)
+    # One step per hold period, then it stays at the last rung
+    assert levels == [0] + [level for level in range(1, top + 1) for _ in range(2)] + [top]
+
+    for _ in range(200):
+        shedder.update(0.1 * budget)
+    assert shedder.level == 0
+    assert shedder.stats()["changes"] == 2 * top
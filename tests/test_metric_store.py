@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from metric_store import MetricStore, MetricStoreWriter, store_name
+
+RISKS = ["LOW"] * 5 + ["HIGH"] * 4 + ["MEDIUM"] * 3 + ["HIGH"] * 2 + ["LOW"] * 6
+
+
+def write_store(path, risks=RISKS, start_row=0, chunk=4):
+    writer = MetricStoreWriter(path, "clip.mp4", 10.0, (2, 3), start_row=start_row, chunk=chunk)
+    for i, risk in enumerate(risks[start_row:], start_row + 1):
+        record = {"frame": i, "position": i, "time": (i - 1) / 10.0, "density": 0.1 * (i % 10),
+                  "motion": float(i), "anomaly_score": 0.0, "risk": risk,
+                  "risk_score": {"LOW": 0.3, "MEDIUM": 0.6, "HIGH": 0.9}[risk]}
+        alerts = [{"type": "High Risk", "severity": "high", "message": "m"}] if risk == "HIGH" else []
+        writer.append(record, np.full((2, 3), i, dtype=np.float32), alerts)
+    writer.close()
+    return MetricStore(path)
+
+
+def test_write_and_read_columns(tmp_path):
+    store = write_store(tmp_path / "store")
+    assert len(store) == len(RISKS)
+    np.testing.assert_array_equal(store.column("frame"), np.arange(1, len(RISKS) + 1))
+    assert store.column("time")[0] == 0.0
+    assert store.column("density_grid").shape == (len(RISKS), 2, 3)
+    assert store.column("density_grid")[-1, 0, 0] == len(RISKS)
+    assert len(store.alerts()) == RISKS.count("HIGH")
+
+
+def test_segments(tmp_path):
+    store = write_store(tmp_path / "store")
+
+    high = store.segments(level="HIGH")
+    assert [(s["start_frame"], s["end_frame"]) for s in high] == [(6, 9), (13, 14)]
+    assert high[0]["start_time"] == pytest.approx(0.5) and high[0]["end_time"] == pytest.approx(0.9)
+
+    # min_risk finds the same rows; merge_gap joins the two runs across the MEDIUM gap
+    assert [(s["start_frame"], s["end_frame"]) for s in store.segments(min_risk=0.7)] == [(6, 9), (13, 14)]
+    merged = store.segments(min_risk=0.7, merge_gap=0.3)
+    assert [(s["start_frame"], s["end_frame"]) for s in merged] == [(6, 14)]
+    assert store.segments(min_risk=0.7, min_duration=0.3) == high[:1]
+
+    with pytest.raises(ValueError):
+        store.segments()
+
+
+def test_truncate_on_resume(tmp_path):
+    path = tmp_path / "store"
+    write_store(path)
+    # A resumed run continues after row 8 and drops everything written later
+    store = write_store(path, risks=RISKS, start_row=8)
+    assert len(store) == len(RISKS)
+    np.testing.assert_array_equal(store.column("frame"), np.arange(1, len(RISKS) + 1))
+    assert len(store.alerts()) == RISKS.count("HIGH")
+
+
+def test_refuses_to_overwrite_other_directories(tmp_path):
+    (tmp_path / "keep.txt").write_text("x")
+    with pytest.raises(ValueError):
+        MetricStoreWriter(tmp_path, "clip.mp4", 10.0, (2, 3))
+    assert (tmp_path / "keep.txt").exists()
+
+
+def test_store_name_includes_path_hash():
+    assert store_name("a/cam1.mp4").startswith("cam1-")
+    assert store_name("a/cam1.mp4") != store_name("b/cam1.mp4")
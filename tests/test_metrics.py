@@ -0,0 +1,74 @@
+import time
+import urllib.request
+
+import numpy as np
+import pytest
+
+from metrics import LatencyHistogram, MetricsRegistry
+
+
+def test_histogram_quantiles_never_under_report():
+    values = np.random.default_rng(0).lognormal(7, 1.2, 5000).astype(int)
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    assert histogram.count == len(values) and histogram.max == values.max()
+    assert histogram.mean == pytest.approx(values.mean())
+    for q in (0.5, 0.95, 0.99):
+        exact = np.percentile(values, 100 * q, method="inverted_cdf")
+        assert exact <= histogram.quantile(q) <= exact * 1.07
+
+
+def test_histogram_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for value in (3, 3, 7, 20):
+        histogram.record(value)
+    assert [histogram.quantile(q) for q in (0.25, 0.5, 0.75, 1.0)] == [3, 3, 7, 20]
+    assert LatencyHistogram().quantile(0.5) == 0
+
+
+def test_nested_stages_time_independently():
+    metrics = MetricsRegistry()
+    with metrics.stage("frame"):
+        with metrics.stage("decode"):
+            time.sleep(0.002)
+        with metrics.stage("decode"):
+            pass
+        time.sleep(0.002)
+
+    frame, decode = metrics.histograms["frame"], metrics.histograms["decode"]
+    assert frame.count == 1 and decode.count == 2
+    assert frame.max >= 4000 and frame.max > decode.max >= 2000
+    assert [row[0] for row in metrics.stage_summary()] == ["frame", "decode"]
+
+
+def test_disabled_registry_records_nothing():
+    metrics = MetricsRegistry(enabled=False)
+    with metrics.stage("decode"):
+        pass
+    metrics.observe("capture_to_alert", 0.1)
+    metrics.inc("frames_processed")
+    metrics.set_gauge("queue", 3)
+    assert not metrics.histograms and not metrics.counters and not metrics.gauges
+
+
+def test_prometheus_endpoint():
+    metrics = MetricsRegistry(prefix="test")
+    metrics.observe("decode", 0.0015)
+    metrics.inc("frames_processed", 5)
+    metrics.set_gauge("prefetch_queue_depth", 2)
+    server = metrics.start_http_server(0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            text = response.read().decode()
+    finally:
+        metrics.stop_http_server()
+
+    assert text == metrics.prometheus_text()
+    lines = text.splitlines()
+    assert 'test_stage_latency_seconds{stage="decode",quantile="0.5"} 0.001500' in lines
+    assert 'test_stage_latency_seconds_count{stage="decode"} 1' in lines
+    assert "test_frames_processed_total 5" in lines
+    assert "test_prefetch_queue_depth 2" in lines
@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+import pytest
+
+from buffer_pool import BufferPool
+from motion_analysis import MotionEngine, compute_motion
+
+
+@pytest.fixture
+def frames():
+    """Blurred noise and the same image shifted 2 px right, with a static left half."""
+    noise = np.random.default_rng(0).integers(0, 256, (120, 160), dtype=np.uint8)
+    prev = cv2.GaussianBlur(noise, (0, 0), 2)
+    curr = prev.copy()
+    curr[:, 80:] = np.roll(prev, 2, axis=1)[:, 80:]
+    return prev, curr
+
+
+def test_full_tier_matches_compute_motion(frames):
+    result = MotionEngine("full", 4, 4).compute(*frames)
+    assert result["motion"] == pytest.approx(compute_motion(*frames), rel=1e-5)
+
+
+@pytest.mark.parametrize("tier", MotionEngine.TIERS)
+def test_tiers_find_the_moving_half(frames, tier):
+    result = MotionEngine(tier, 4, 4, pool=BufferPool()).compute(*frames)
+    magnitude_map = result["magnitude_map"]
+    assert magnitude_map.shape == result["direction_map"].shape == (4, 4)
+
+    # Full-resolution pixels per frame on every tier; flow points right (direction ~0)
+    moving, still = magnitude_map[1:3, 2:], magnitude_map[:, :2]
+    assert moving.mean() == pytest.approx(2.0, abs=0.6)
+    assert still.max() < moving.min()
+    assert np.abs(result["direction_map"][1:3, 2:]).max() < 0.3
+
+
+def test_mask_ignores_motion_outside(frames):
+    mask = np.zeros(frames[0].shape, np.uint8)
+    mask[:, :80] = 255
+    for tier in MotionEngine.TIERS:
+        result = MotionEngine(tier, 4, 4).compute(*frames, mask=mask)
+        assert result["motion"] < 0.3, tier
+
+
+def test_unknown_tier():
+    with pytest.raises(ValueError):
+        MotionEngine("turbo")
+    with pytest.raises(ValueError):
+        MotionEngine().set_tier("turbo")
@@ -0,0 +1,61 @@
+import cv2
+import pytest
+
+import multi_stream
+from multi_stream import MultiStreamRunner
+
+
+@pytest.fixture(autouse=True)
+def restore_cv_threads():
+    # The runner lowers the process-wide OpenCV thread count
+    threads = cv2.getNumThreads()
+    yield
+    cv2.setNumThreads(threads)
+
+
+@pytest.mark.parametrize("sources", [[], {}])
+def test_no_sources(sources):
+    with pytest.raises(ValueError):
+        MultiStreamRunner(sources)
+
+
+@pytest.mark.parametrize("workers, expected", [(None, (3, 2)), (2, (2, 4)), (16, (16, 1))])
+def test_worker_split(video, monkeypatch, workers, expected):
+    monkeypatch.setattr(multi_stream.os, "cpu_count", lambda: 8)
+    runner = MultiStreamRunner([video] * 3, workers=workers)
+    # One worker per stream up to the core count; workers x OpenCV threads ~= cores
+    assert (runner.workers, runner.cv_threads) == expected
+    assert [s.name for s in runner.streams] == ["cam0", "cam1", "cam2"]
+    for s in runner.streams:
+        s.release()
+
+
+def test_round_robin_is_fair(video):
+    runner = MultiStreamRunner({"a": video, "b": video, "c": video}, workers=1)
+    picks = [runner._pick(1)[0].name for _ in range(6)]
+    assert picks == ["a", "b", "c", "a", "b", "c"]
+    for s in runner.streams:
+        s.release()
+
+
+def test_risk_policy_prefers_risk_with_aging(video):
+    runner = MultiStreamRunner({"low": video, "high": video}, workers=1, policy="risk")
+    low, high = runner.streams
+    low.last_risk, high.last_risk = 0.3, 0.55
+    assert runner._pick(1) == [high]
+    # Every round `low` waits it gains 0.1 until it overtakes
+    picks = [runner._pick(1)[0].name for _ in range(3)]
+    assert picks == ["high", "high", "low"]
+    for s in runner.streams:
+        s.release()
+
+
+def test_run_processes_every_stream(video):
+    report = MultiStreamRunner([video, video], workers=2).run(report_every=0)
+    assert set(report) == {"cam0", "cam1"}
+    assert all(st["frames"] == 24 and st["finished"] for st in report.values())
+
+
+def test_unknown_policy(video):
+    with pytest.raises(ValueError):
+        MultiStreamRunner([video], policy="fastest")
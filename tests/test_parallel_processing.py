@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import config
+from frame_analysis import FrameAnalyzer
+from parallel_processing import process_video_parallel, split_frame_ranges
+from video_loader import VideoLoader
+
+from conftest import run_headless
+
+KEYS = ("density", "motion", "anomaly_score", "risk_score")
+
+
+def test_split_frame_ranges_covers_every_frame():
+    ranges = split_frame_ranges(10, 3)
+    assert ranges[0][0] == 0 and ranges[-1][1] is None
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+
+@pytest.mark.parametrize("frame_skip", [1, 2])
+def test_parallel_matches_sequential(video, monkeypatch, frame_skip):
+    monkeypatch.setattr(config, "FRAME_SKIP", frame_skip)
+    sequential, _ = run_headless(video)
+    records, density_maps = process_video_parallel(video, workers=3, frame_skip=frame_skip)
+
+    assert len(records) == len(sequential) == len(density_maps)
+    for a, b in zip(sequential, records):
+        assert a["frame"] == b["frame"]
+        assert a["risk"] == b["risk"] and a["anomaly"] == b["anomaly"]
+        for key in KEYS:
+            assert a[key] == pytest.approx(b[key], abs=1e-6)
+
+
+def test_parallel_ignores_stateful_settings(video, monkeypatch):
+    # Workers run without the gate and with "full" instead of "warm" motion
+    monkeypatch.setattr(config, "MOTION_TIER", "warm")
+    monkeypatch.setattr(config, "CHANGE_GATE", True)
+    records, _ = process_video_parallel(video, workers=2)
+
+    monkeypatch.setattr(config, "MOTION_TIER", "full")
+    monkeypatch.setattr(config, "CHANGE_GATE", False)
+    analyzer, loader = FrameAnalyzer(), VideoLoader(video)
+    motions = []
+    while True:
+        ret, frame = loader.read()
+        if not ret:
+            break
+        motions.append(analyzer.analyze(frame)["motion"])
+    loader.release()
+
+    np.testing.assert_allclose([r["motion"] for r in records], motions, atol=1e-6)
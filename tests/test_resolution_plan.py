@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+import pytest
+
+import config
+from dashboard import CrowdSafetyDashboard
+from frame_analysis import FrameAnalyzer
+from preprocessing import Preprocessor
+from video_loader import VideoLoader
+from visualizer import DashboardVisualizer
+
+ZONES = {"left": [(0.05, 0.1), (0.45, 0.1), (0.45, 0.9), (0.05, 0.9)]}
+
+
+@pytest.fixture
+def analysis_size(monkeypatch):
+    monkeypatch.setattr(config, "ANALYSIS_WIDTH", 160)
+    monkeypatch.setattr(config, "ANALYSIS_HEIGHT", 120)
+    return 160, 120
+
+
+def first_frames(video, count=3):
+    loader = VideoLoader(video)
+    frames = [loader.read()[1] for _ in range(count)]
+    loader.release()
+    return frames
+
+
+def test_loader_keeps_the_decoded_size(video):
+    frame = first_frames(video, 1)[0]
+    assert frame.shape == (240, 320, 3)
+
+
+def test_preprocess_resizes_before_conversion():
+    frame = np.random.default_rng(0).integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    gray = Preprocessor().process(frame, (160, 120))
+    assert gray.shape == (120, 160) and gray.dtype == np.uint8
+    assert gray.min() == 0 and gray.max() == 255
+
+    resized = cv2.cvtColor(cv2.resize(frame, (160, 120), interpolation=cv2.INTER_LINEAR), cv2.COLOR_BGR2GRAY)
+    expected = cv2.normalize(cv2.GaussianBlur(resized, (15, 15), 1.0), None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+    np.testing.assert_array_equal(gray, expected)
+
+
+@pytest.mark.parametrize("zones", [{}, ZONES])
+def test_analysis_does_not_depend_on_the_decoded_size(video, analysis_size, zones):
+    frames = first_frames(video)
+    results = {}
+    for scale in (1, 2):
+        analyzer = FrameAnalyzer(4, 4, zones=zones)
+        for frame in frames:
+            big = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+            results[scale] = analyzer.analyze(big)
+
+    small, large = results[1], results[2]
+    expected_shape = analyzer.layout.mask.shape if zones else analysis_size[::-1]
+    assert small["gray"].shape == large["gray"].shape == expected_shape
+    # Same analysis grid from either decode size (only the resize filter input differs)
+    np.testing.assert_allclose(small["density_map"], large["density_map"], atol=0.02)
+    assert small["motion"] == pytest.approx(large["motion"], rel=0.2)
+
+
+def test_visualizer_renders_at_the_video_slot_size(video):
+    frame = first_frames(video, 1)[0]
+    canvas = DashboardVisualizer().create_pro_dashboard(
+        frame, 0.3, 2.0, 0.4, 25.0, [0.3], [0.4], 92.5, size=CrowdSafetyDashboard.VIDEO_SIZE)
+    assert canvas.shape == (865, 1180, 3)
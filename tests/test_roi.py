@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+import pytest
+
+import config
+from frame_analysis import FrameAnalyzer
+from roi import ZoneLayout, load_zones
+
+ZONES = {
+    "left": [(0.05, 0.1), (0.45, 0.1), (0.45, 0.9), (0.05, 0.9)],
+    "wedge": [(0.3, 0.5), (0.6, 0.5), (0.3, 0.9)],
+}
+
+
+def test_layout_geometry():
+    layout = ZoneLayout(ZONES, (100, 200), min_coverage=0.1)
+    assert layout.bbox == (10, 10, 111, 81)
+    assert layout.mask.shape == (81, 111)
+    assert set(np.unique(layout.mask)) == {0, 255}
+
+    ys, xs, valid = layout.grid(4, 4)
+    # Full-frame cell edges shifted into the crop; cells right of x=0.6 see no zone pixels
+    assert ys.tolist() == [0, 15, 40, 65, 81] and xs.tolist() == [0, 40, 90, 111, 111]
+    assert not valid[:, 3].any() and valid[:, 1].all()
+    assert layout.cell_pixels(4, 4).sum() == np.count_nonzero(layout.mask)
+    assert layout.cell_pixels(4, 4, "wedge").sum() == np.count_nonzero(layout.zone_masks["wedge"])
+
+
+@pytest.mark.parametrize("zones", [{}, {"line": [(0.1, 0.1), (0.5, 0.5)]}, {"off": [(1.5, 1.5), (2, 1.5), (2, 2)]}])
+def test_invalid_zones(zones):
+    with pytest.raises(ValueError):
+        ZoneLayout(zones, (100, 200))
+
+
+def test_load_zones(monkeypatch):
+    monkeypatch.setattr(config, "ROI_ZONES", {"cam1": ZONES})
+    assert load_zones("cam1") == ZONES
+    assert load_zones("cam2") == {}
+
+
+def read_frames(video, count):
+    cap = cv2.VideoCapture(video)
+    frames = [cap.read()[1] for _ in range(count)]
+    cap.release()
+    return frames
+
+
+def test_pixels_outside_the_zones_are_never_analyzed(video, monkeypatch):
+    monkeypatch.setattr(config, "ANALYSIS_WIDTH", None)
+    monkeypatch.setattr(config, "ANALYSIS_HEIGHT", None)
+    frames = read_frames(video, 4)
+    rng = np.random.default_rng(0)
+    noisy = [f.copy() for f in frames]
+    for frame in noisy:
+        # Flicker to the right of the zones' bounding box (x >= 0.6)
+        frame[:, 200:] = rng.integers(0, 256, frame[:, 200:].shape, dtype=np.uint8)
+
+    clean_analyzer, noisy_analyzer = FrameAnalyzer(4, 4, zones=ZONES), FrameAnalyzer(4, 4, zones=ZONES)
+    for clean_frame, noisy_frame in zip(frames, noisy):
+        a = clean_analyzer.analyze(clean_frame)
+        b = noisy_analyzer.analyze(noisy_frame)
+        assert a["density"] == b["density"] and a["motion"] == b["motion"]
+        np.testing.assert_array_equal(a["motion_map"], b["motion_map"])
+        assert a["zones"] == b["zones"]
+
+    assert a["motion"] > 0 and set(a["zones"]) == set(ZONES)
+    # Cells without zone coverage are NaN in every map
+    assert np.isnan(a["density_map"][:, 3]).all() and np.isnan(a["motion_map"][:, 3]).all()
+    assert not np.isnan(a["density_map"][:, 1]).any()
+
+    layout = clean_analyzer.layout
+    for name, zone_mask in layout.zone_masks.items():
+        assert a["zones"][name]["density"] == pytest.approx(cv2.mean(a["gray"], mask=zone_mask)[0] / 255.0)
@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+import pytest
+
+import config
+from shm_pipeline import FrameRing, process_video_shm
+
+from conftest import run_headless
+
+KEYS = ("density", "motion", "anomaly_score", "risk_score")
+
+
+def assert_same_records(expected, records):
+    assert len(records) == len(expected) > 0
+    for a, b in zip(expected, records):
+        assert a["frame"] == b["frame"] and a["position"] == b["position"]
+        assert a["risk"] == b["risk"] and a["anomaly"] == b["anomaly"]
+        for key in KEYS:
+            assert b[key] == pytest.approx(a[key], abs=1e-6)
+
+
+def test_frame_ring_is_shared():
+    ring = FrameRing(3, (4, 5, 3))
+    other = FrameRing.attach(ring.spec())
+    try:
+        ring.frames[1] = 7
+        assert other.frames.shape == (3, 4, 5, 3) and (other.frames[1] == 7).all()
+    finally:
+        other.close()
+        ring.close()
+
+
+@pytest.mark.parametrize("frame_skip, slots", [(1, 2), (2, 8)])
+def test_analytics_match_process_video(video, monkeypatch, frame_skip, slots):
+    monkeypatch.setattr(config, "FRAME_SKIP", frame_skip)
+    expected, _ = run_headless(video)
+    records = []
+    summary = process_video_shm(video, slots=slots, on_frame=records.append)
+
+    assert summary["frames"] == len(records)
+    assert_same_records(expected, records)
+
+
+def test_render_process_writes_every_nth_frame(video, tmp_path):
+    expected, _ = run_headless(video)
+    records = []
+    output = tmp_path / "out.mp4"
+    process_video_shm(video, str(output), render_every=3, slots=4, on_frame=records.append)
+
+    assert_same_records(expected, records)
+    cap = cv2.VideoCapture(str(output))
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    assert len(frames) == 8 and frames[0].shape == (1080, 1920, 3)
+    assert np.std(frames[-1]) > 0
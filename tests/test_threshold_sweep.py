@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import risk_classifier
+from threshold_sweep import PARAMETERS, RESULT_FIELDS, parameter_grid, replay, sweep
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    frames = 500
+    return {
+        "density": rng.uniform(0, 1, frames).round(2),
+        "motion": rng.uniform(0, 30, frames).round(1),
+        "anomaly_score": rng.uniform(0, 1, frames).round(2),
+        "time": np.arange(frames) / 25.0,
+    }
+
+
+def test_sweep_matches_replay(series):
+    grid = parameter_grid(low_threshold=[0.3, 0.4], high_threshold=[0.6, 0.7],
+                          density_adjust=[0.2, 0.3], motion_alert=[10.0, 15.0], anomaly_threshold=[0.5, 0.7])
+    results = sweep(series, grid, chunk_elements=2000)
+    for i in range(len(results["alerts"])):
+        expected = replay(series, **{name: values[i] for name, values in grid.items()})
+        for field in RESULT_FIELDS:
+            assert results[field][i] == pytest.approx(expected[field], abs=1e-9), field
+
+
+def test_replay_restores_live_constants(series):
+    replay(series, low_threshold=0.1, motion_alert=1.0)
+    assert risk_classifier.LOW_RISK_THRESHOLD == PARAMETERS["low_threshold"]
+    assert risk_classifier.ALERT_THRESHOLDS["motion"] == PARAMETERS["motion_alert"]
+
+
+def test_unknown_parameter():
+    with pytest.raises(ValueError):
+        parameter_grid(nonsense=[1.0])
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from buffer_pool import BufferPool
+from video_loader import VideoLoader
+
+
+def read_all(loader):
+    frames, positions = [], []
+    while True:
+        ret, frame = loader.read()
+        if not ret:
+            break
+        frames.append(frame.copy())
+        positions.append(loader.position)
+    loader.release()
+    return frames, positions
+
+
+@pytest.mark.parametrize("frame_skip", [1, 3])
+def test_prefetch_matches_synchronous(video, frame_skip):
+    sync_frames, sync_positions = read_all(VideoLoader(video, frame_skip=frame_skip))
+    frames, positions = read_all(VideoLoader(video, frame_skip=frame_skip, prefetch=4, pool=BufferPool()))
+
+    assert positions == sync_positions == list(range(frame_skip, 25, frame_skip))
+    for a, b in zip(frames, sync_frames):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_prefetch_end_of_stream_is_sticky(video):
+    loader = VideoLoader(video, prefetch=2)
+    frames, _ = read_all(loader)
+    assert len(frames) == 24
+    assert loader.read() == (False, None)
+
+
+class FailingLoader(VideoLoader):
+    """Decode error on the 5th frame (raised on the prefetch thread)."""
+
+    def _retrieve(self, dst=None):
+        self.retrieved = getattr(self, "retrieved", 0) + 1
+        if self.retrieved == 5:
+            raise RuntimeError("decode failed")
+        return super()._retrieve(dst)
+
+
+def test_prefetch_reraises_decode_errors(video):
+    loader = FailingLoader(video, prefetch=2)
+    for _ in range(4):
+        assert loader.read()[0]
+    with pytest.raises(RuntimeError, match="decode failed"):
+        loader.read()
+    # The stream is over after the error - later reads do not block
+    assert loader.read() == (False, None)
+    loader.release()
+
+
+def test_seek_keeps_skip_aligned(video):
+    loader = VideoLoader(video, frame_skip=2, prefetch=2)
+    loader.seek(10)
+    assert loader.read()[0] and loader.position == 12
+    loader.release()
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        VideoLoader(str(tmp_path / "missing.mp4"))
@@ -0,0 +1,77 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from buffer_pool import BufferPool
+from video_writer import AsyncVideoWriter
+
+
+class StalledEncoder:
+    """Holds the first frame until released, so the queue fills up."""
+
+    def __init__(self, fail=False):
+        self.release_event = threading.Event()
+        self.fail = fail
+        self.frames = []
+
+    def write(self, frame):
+        self.release_event.wait(5)
+        if self.fail:
+            raise RuntimeError("disk full")
+        self.frames.append(frame.copy())
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("pool", [None, BufferPool()])
+def test_raw_output_copies_and_resizes_frames(tmp_path, pool):
+    path = str(tmp_path / "out.raw")
+    writer = AsyncVideoWriter(path, 10, (32, 24), backend="raw", queue_size=2, pool=pool)
+    frame = np.empty((48, 64, 3), np.uint8)
+    for value in range(6):
+        # The caller reuses its buffer right after write()
+        frame[:] = value * 40
+        assert writer.write(frame)
+    writer.release()
+
+    data = np.fromfile(path, np.uint8).reshape(-1, 24, 32, 3)
+    assert [int(f.mean()) for f in data] == [0, 40, 80, 120, 160, 200]
+    with open(path + ".json") as f:
+        assert json.load(f)["frames"] == 6
+    assert writer.stats()["written"] == 6 and writer.stats()["dropped"] == 0
+
+
+def test_drop_policy_never_blocks(tmp_path):
+    writer = AsyncVideoWriter(str(tmp_path / "out.raw"), 10, (8, 8), backend="raw", queue_size=2, policy="drop")
+    writer.encoder.close()
+    writer.encoder = encoder = StalledEncoder()
+    frame = np.zeros((8, 8, 3), np.uint8)
+
+    results = [writer.write(frame) for _ in range(10)]
+    # One frame in the encoder, two queued, the rest dropped
+    assert results.count(True) <= 3 and writer.stats()["dropped"] == results.count(False) >= 7
+    encoder.release_event.set()
+    writer.release()
+    assert len(encoder.frames) == writer.stats()["written"] == results.count(True)
+
+
+def test_encoder_error_surfaces_on_write(tmp_path):
+    writer = AsyncVideoWriter(str(tmp_path / "out.raw"), 10, (8, 8), backend="raw")
+    writer.encoder.close()
+    writer.encoder = encoder = StalledEncoder(fail=True)
+    frame = np.zeros((8, 8, 3), np.uint8)
+    writer.write(frame)
+    encoder.release_event.set()
+    writer.release()
+    with pytest.raises(IOError):
+        writer.write(frame)
+
+
+def test_unknown_backend_and_policy(tmp_path):
+    with pytest.raises(ValueError):
+        AsyncVideoWriter(str(tmp_path / "out"), 10, (8, 8), backend="gif")
+    with pytest.raises(ValueError):
+        AsyncVideoWriter(str(tmp_path / "out"), 10, (8, 8), policy="spill")
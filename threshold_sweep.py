@@ -0,0 +1,261 @@
+"""
+Threshold sweeps over recorded metrics.
+
+Risk classification, normalize_risk, the anomaly flag and the generate_alerts
+rules only depend on each frame's density, motion and anomaly score, which the
+metric store (or a batch CSV) already records. This module replays them as
+NumPy array operations over a whole grid of parameter combinations at once,
+so tuning thresholds and weights does not require re-running the video:
+
+    python threshold_sweep.py data/outputs/metrics/platform_cam-1a2b3c4d \\
+        --low 0.3:0.5:0.02 --high 0.6:0.8:0.02 --density-weight 0.5,0.6,0.7 -o sweep.csv
+
+Per combination it reports the alert counts per rule (frames on which the rule
+fires, as the dashboard counts them) and the fraction of time at each risk level.
+The anomaly detector itself is stateful and is not replayed: the recorded
+anomaly score is thresholded. Per-zone alerts are not covered (zones are not stored).
+"""
+
+import csv
+import itertools
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+import config
+import risk_classifier
+
+# Sweepable parameters -> the values the live pipeline uses
+PARAMETERS = {
+    "low_threshold": getattr(config, 'LOW_RISK_THRESHOLD', 0.4),
+    "high_threshold": getattr(config, 'HIGH_RISK_THRESHOLD', 0.7),
+    "density_weight": risk_classifier.DENSITY_WEIGHT,
+    "motion_weight": risk_classifier.MOTION_WEIGHT,
+    "motion_scale": risk_classifier.MOTION_SCALE,
+    "density_adjust": risk_classifier.DENSITY_ADJUST,
+    "motion_adjust": risk_classifier.MOTION_ADJUST,
+    "anomaly_threshold": risk_classifier.ANOMALY_THRESHOLD,
+    "critical_alert": risk_classifier.ALERT_THRESHOLDS["critical"],
+    "high_alert": risk_classifier.ALERT_THRESHOLDS["high"],
+    "moderate_alert": risk_classifier.ALERT_THRESHOLDS["moderate"],
+    "density_alert": risk_classifier.ALERT_THRESHOLDS["density"],
+    "motion_alert": risk_classifier.ALERT_THRESHOLDS["motion"],
+}
+
+ALERT_RULES = ("critical", "high", "moderate", "density", "motion", "anomaly")
+RESULT_FIELDS = (("alerts",) + tuple(f"{rule}_alerts" for rule in ALERT_RULES)
+                 + tuple(f"{level.lower()}_fraction" for level in risk_classifier.LEVEL_BASE))
+
+
+def load_series(source):
+    """
+    density / motion / anomaly_score / time arrays (float64) from a metric store
+    directory or a per-frame CSV written by batch.py.
+    """
+    names = ("density", "motion", "anomaly_score", "time")
+    if os.path.isdir(source):
+        from metric_store import MetricStore
+        store = MetricStore(source)
+        return {name: np.asarray(store.column(name), dtype=np.float64) for name in names}
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"[ERROR] Recorded metrics not found: {source}")
+    with open(source, newline="") as f:
+        rows = list(csv.DictReader(f))
+    return {name: np.array([float(row[name]) for row in rows], dtype=np.float64) for name in names}
+
+
+def _durations(times):
+    """Seconds each frame stands for (frames skipped under load cover more time)."""
+    if times.size < 2:
+        return np.ones(times.size)
+    dt = np.diff(times)
+    dt = np.append(dt, np.median(dt))
+    return np.where(dt > 0, dt, np.median(dt))
+
+
+def parameter_grid(**values):
+    """
+    Cartesian product of the given values per parameter; the others keep their
+    PARAMETERS default. Returns {name: (combinations,) float64 array}.
+    """
+    unknown = set(values) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"[ERROR] Unknown sweep parameter(s): {', '.join(sorted(unknown))}")
+    axes = [np.atleast_1d(np.asarray(values.get(name, default), dtype=np.float64))
+            for name, default in PARAMETERS.items()]
+    combos = np.array(list(itertools.product(*axes)), dtype=np.float64).reshape(-1, len(PARAMETERS))
+    return {name: combos[:, i] for i, name in enumerate(PARAMETERS)}
+
+
+def _count_above(sorted_values, thresholds):
+    """Number of values > each threshold (matches the live `value > threshold` tests)."""
+    return sorted_values.size - np.searchsorted(sorted_values, thresholds, side="right")
+
+
+def sweep(series, grid, chunk_elements=1 << 22):
+    """
+    Evaluate every combination of `grid` (see parameter_grid) over the recorded
+    series. Returns {field: (combinations,) array} for RESULT_FIELDS.
+    Combinations are processed in chunks of about chunk_elements frame-values.
+    """
+    density = np.asarray(series["density"], dtype=np.float64)
+    motion = np.asarray(series["motion"], dtype=np.float64)
+    anomaly_score = np.asarray(series["anomaly_score"], dtype=np.float64)
+    weights = _durations(np.asarray(series["time"], dtype=np.float64))
+    total_time = max(weights.sum(), 1e-12)
+    frames = density.size
+    combos = len(next(iter(grid.values())))
+    results = {field: np.zeros(combos, dtype=np.float64 if field.endswith("fraction") else np.int64)
+               for field in RESULT_FIELDS}
+
+    # Single-threshold rules: one sort, then a binary search per combination
+    results["density_alerts"][:] = _count_above(np.sort(density), grid["density_alert"])
+    results["motion_alerts"][:] = _count_above(np.sort(motion), grid["motion_alert"])
+    results["anomaly_alerts"][:] = _count_above(np.sort(anomaly_score), grid["anomaly_threshold"])
+
+    # Risk level and normalized risk: (chunk, frames) arrays
+    base_low, base_medium, base_high = risk_classifier.LEVEL_BASE.values()
+    step = max(1, chunk_elements // max(frames, 1))
+    for start in range(0, combos, step):
+        p = {name: values[start:start + step, None] for name, values in grid.items()}
+        rows = slice(start, start + step)
+
+        motion_norm = np.minimum(motion / p["motion_scale"], 1.0)
+        score = density * p["density_weight"] + motion_norm * p["motion_weight"]
+        # classify_risk: LOW below low_threshold, else MEDIUM below high_threshold, else HIGH
+        not_low = score >= p["low_threshold"]
+        is_high = not_low & (score >= p["high_threshold"])
+        not_low_time = not_low @ weights
+        high_time = is_high @ weights
+        results["low_fraction"][rows] = (total_time - not_low_time) / total_time
+        results["medium_fraction"][rows] = (not_low_time - high_time) / total_time
+        results["high_fraction"][rows] = high_time / total_time
+
+        # normalize_risk: level base + density / motion adjustment, capped at 1
+        # (same addition order as the scalar code, so boundary frames match exactly)
+        risk = density * p["density_adjust"] + motion_norm * p["motion_adjust"]
+        risk += np.where(is_high, base_high, np.where(not_low, base_medium, base_low))
+        np.minimum(risk, 1.0, out=risk)
+
+        critical = risk > p["critical_alert"]
+        above_high = risk > p["high_alert"]
+        above_moderate = risk > p["moderate_alert"]
+        critical_count = critical.sum(axis=1)
+        # Rules are exclusive (if / elif): high = above high but not critical, etc.
+        results["critical_alerts"][rows] = critical_count
+        results["high_alerts"][rows] = (above_high | critical).sum(axis=1) - critical_count
+        results["moderate_alerts"][rows] = (above_moderate | above_high | critical).sum(axis=1) \
+            - (above_high | critical).sum(axis=1)
+
+    results["alerts"] = sum(results[f"{rule}_alerts"] for rule in ALERT_RULES)
+    return results
+
+
+@contextmanager
+def _live_parameters(p):
+    """Temporarily point the risk_classifier module constants at one combination (not thread-safe)."""
+    names = {
+        "LOW_RISK_THRESHOLD": p["low_threshold"],
+        "HIGH_RISK_THRESHOLD": p["high_threshold"],
+        "DENSITY_WEIGHT": p["density_weight"],
+        "MOTION_WEIGHT": p["motion_weight"],
+        "MOTION_SCALE": p["motion_scale"],
+        "DENSITY_ADJUST": p["density_adjust"],
+        "MOTION_ADJUST": p["motion_adjust"],
+        "ALERT_THRESHOLDS": {rule: p[f"{rule}_alert"] for rule in risk_classifier.ALERT_THRESHOLDS},
+    }
+    saved = {name: getattr(risk_classifier, name) for name in names}
+    try:
+        for name, value in names.items():
+            setattr(risk_classifier, name, value)
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(risk_classifier, name, value)
+
+
+def replay(series, **params):
+    """
+    One combination, frame by frame, through the live scalar functions (combined_score,
+    classify_risk, normalize_risk, alert_rules) - the reference sweep() is checked
+    against. Returns the same fields as sweep().
+    """
+    p = dict(PARAMETERS, **params)
+    weights = _durations(np.asarray(series["time"], dtype=np.float64))
+    counts = dict.fromkeys(ALERT_RULES, 0)
+    level_time = dict.fromkeys(risk_classifier.LEVEL_BASE, 0.0)
+    with _live_parameters(p):
+        for density, motion, anomaly_score, weight in zip(series["density"], series["motion"],
+                                                          series["anomaly_score"], weights):
+            density, motion = float(density), float(motion)
+            level = risk_classifier.classify_risk(risk_classifier.combined_score(density, motion))
+            risk = risk_classifier.normalize_risk(level, density, motion)
+            level_time[level] += weight
+            # Anomaly flag as FrameScorer sets it from the recorded score
+            anomaly = float(anomaly_score) > p["anomaly_threshold"]
+            for rule in risk_classifier.alert_rules(risk, density, motion, anomaly):
+                counts[rule] += 1
+
+    total_time = max(weights.sum(), 1e-12)
+    result = {f"{rule}_alerts": int(count) for rule, count in counts.items()}
+    result["alerts"] = sum(result.values())
+    result.update({f"{level.lower()}_fraction": t / total_time for level, t in level_time.items()})
+    return result
+
+
+def write_csv(path, grid, results, order=None):
+    """One row per combination: the swept parameters, then RESULT_FIELDS."""
+    order = np.arange(len(results["alerts"])) if order is None else order
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(list(grid) + list(RESULT_FIELDS))
+        for i in order:
+            writer.writerow([f"{grid[name][i]:g}" for name in grid] +
+                            [f"{results[field][i]:.4f}" if field.endswith("fraction") else int(results[field][i])
+                             for field in RESULT_FIELDS])
+    os.replace(tmp, path)
+
+
+def _values(text):
+    """'0.3:0.5:0.05' (inclusive range) or '0.3,0.4,0.5'."""
+    if ":" in text:
+        start, stop, step = (float(v) for v in text.split(":"))
+        return np.round(np.arange(start, stop + step / 2, step), 10)
+    return [float(v) for v in text.split(",")]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sweep risk / alert parameters over recorded metrics")
+    parser.add_argument("source", help="metric store directory or batch CSV")
+    for name, default in PARAMETERS.items():
+        parser.add_argument(f"--{name.replace('_threshold', '').replace('_', '-')}", dest=name, type=_values,
+                            help=f"values 'start:stop:step' or 'a,b,c' (default {default:g})")
+    parser.add_argument("-o", "--output", help="write all combinations to this CSV")
+    parser.add_argument("--sort", default="alerts", choices=RESULT_FIELDS)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    series = load_series(args.source)
+    grid = parameter_grid(**{name: getattr(args, name) for name in PARAMETERS if getattr(args, name) is not None})
+    swept = [name for name in PARAMETERS if getattr(args, name) is not None]
+
+    start = time.perf_counter()
+    results = sweep(series, grid)
+    elapsed = time.perf_counter() - start
+    combos = len(results["alerts"])
+    print(f"📊 {combos} combination(s) x {series['density'].size} frames in {elapsed:.2f}s")
+
+    order = np.argsort(results[args.sort], kind="stable")
+    for i in order[:args.top]:
+        params = " ".join(f"{name}={grid[name][i]:g}" for name in swept)
+        print(f"  {params or 'defaults'} | alerts {results['alerts'][i]} | "
+              f"LOW {results['low_fraction'][i]:.1%} MEDIUM {results['medium_fraction'][i]:.1%} "
+              f"HIGH {results['high_fraction'][i]:.1%}")
+    if args.output:
+        write_csv(args.output, grid, results, order)
+        print(f"✅ {args.output}")
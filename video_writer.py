@@ -0,0 +1,200 @@
+"""
+Asynchronous video output stage.
+
+Frames are handed to a bounded queue and encoded on a background thread, so
+the analysis loop never waits on the encoder (unless the "block" policy asks it to).
+Backends:
+    "opencv" - cv2.VideoWriter (mp4v by default)
+    "ffmpeg" - piped local ffmpeg subprocess (libx264); falls back to opencv if ffmpeg is missing
+    "mjpeg"  - concatenated JPEG frames (.mjpeg), for debugging
+    "raw"    - raw BGR24 frames plus a .json sidecar describing them, for debugging
+"""
+
+import json
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from buffer_pool import ring_buffer
+
+_END_OF_STREAM = object()
+
+
+class _OpenCVEncoder:
+    def __init__(self, path, fps, size, fourcc="mp4v"):
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        if not self.writer.isOpened():
+            raise IOError(f"[ERROR] Cannot open video writer: {path}")
+
+    def write(self, frame):
+        self.writer.write(frame)
+
+    def close(self):
+        self.writer.release()
+
+
+class _FFmpegEncoder:
+    def __init__(self, path, fps, size, ffmpeg="ffmpeg"):
+        w, h = size
+        cmd = [
+            ffmpeg, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{w}x{h}", "-r", f"{fps}", "-i", "-",
+            "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", path,
+        ]
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        self.process.stdin.write(memoryview(frame))
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+
+class _MJPEGEncoder:
+    def __init__(self, path, fps, size, quality=85):
+        self.file = open(path, "wb")
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+
+    def write(self, frame):
+        ok, data = cv2.imencode(".jpg", frame, self.params)
+        if ok:
+            self.file.write(data.tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+class _RawEncoder:
+    def __init__(self, path, fps, size):
+        self.path = path
+        self.fps = fps
+        self.size = size
+        self.frames = 0
+        self.file = open(path, "wb")
+
+    def write(self, frame):
+        self.file.write(memoryview(frame))
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+        w, h = self.size
+        with open(self.path + ".json", "w") as f:
+            json.dump({"width": w, "height": h, "fps": self.fps, "pix_fmt": "bgr24", "frames": self.frames}, f)
+
+
+class AsyncVideoWriter:
+    """
+    Bounded-queue video writer with a background encoder thread.
+    size: output (width, height) - frames are resized to it, independent of the dashboard size
+    policy: "block" waits for the encoder when the queue is full, "drop" discards the frame
+    pool: optional BufferPool - queued frames live in a ring of pooled buffers instead of fresh copies
+    """
+
+    BACKENDS = ("opencv", "ffmpeg", "mjpeg", "raw")
+    POLICIES = ("block", "drop")
+
+    def __init__(self, path, fps, size, backend="opencv", queue_size=8, policy="block", pool=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"[ERROR] Unknown writer backend: {backend}")
+        if policy not in self.POLICIES:
+            raise ValueError(f"[ERROR] Unknown writer policy: {policy}")
+
+        if backend == "ffmpeg" and shutil.which("ffmpeg") is None:
+            print("ℹ️  ffmpeg not found - falling back to OpenCV VideoWriter")
+            backend = "opencv"
+
+        self.path = path
+        self.fps = fps
+        self.size = tuple(size)
+        self.backend = backend
+        self.policy = policy
+        self.pool = pool
+        # Frames alive at once: a full queue, the one being encoded and the one being queued
+        self._slots = queue_size + 2
+
+        encoders = {"opencv": _OpenCVEncoder, "ffmpeg": _FFmpegEncoder, "mjpeg": _MJPEGEncoder, "raw": _RawEncoder}
+        self.encoder = encoders[backend](path, fps, self.size)
+
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.encode_time = 0.0
+        self.error = None
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._encode_loop, name="AsyncVideoWriter", daemon=True)
+        self._thread.start()
+
+    def _encode_loop(self):
+        while True:
+            frame = self._queue.get()
+            if frame is _END_OF_STREAM:
+                return
+            if self.error is not None:
+                continue
+            start = time.perf_counter()
+            try:
+                self.encoder.write(frame)
+                self.frames_written += 1
+            except Exception as e:
+                self.error = e
+            self.encode_time += time.perf_counter() - start
+
+    def write(self, frame):
+        """
+        Queue a frame for encoding. The frame is copied (or resized into a new array),
+        so callers may reuse their buffers. Returns False if the frame was dropped.
+        """
+        if self.error is not None:
+            raise IOError(f"[ERROR] Video writer failed: {self.error}")
+
+        if self.policy == "drop" and self._queue.full():
+            self.frames_dropped += 1
+            return False
+
+        h, w = frame.shape[:2]
+        slot = ring_buffer(self.pool, "writer", self._slots, (self.size[1], self.size[0]) + frame.shape[2:], frame.dtype)
+        if (w, h) != self.size:
+            frame = cv2.resize(frame, self.size, dst=slot, interpolation=cv2.INTER_AREA)
+        elif slot is not None:
+            np.copyto(slot, frame)
+            frame = slot
+        else:
+            frame = frame.copy()
+
+        if self.policy == "drop":
+            try:
+                self._queue.put_nowait(frame)
+            except queue.Full:
+                self.frames_dropped += 1
+                return False
+        else:
+            self._queue.put(frame)
+        return True
+
+    def queued(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            "backend": self.backend,
+            "written": self.frames_written,
+            "dropped": self.frames_dropped,
+            "queued": self._queue.qsize(),
+            "avg_encode_ms": 1000 * self.encode_time / max(self.frames_written, 1),
+        }
+
+    def release(self):
+        """Flush queued frames, stop the encoder thread and close the output."""
+        if self._thread is None:
+            return
+        self._queue.put(_END_OF_STREAM)
+        self._thread.join()
+        self._thread = None
+        self.encoder.close()
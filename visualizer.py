@@ -5,15 +5,24 @@ import random
 class DashboardVisualizer:
     def __init__(self):
         self.frame_count = 0
+        # Output canvas reused across frames (reallocated only if the frame size changes)
+        self.canvas = None
     
     def create_pro_dashboard(self, frame, density, motion, risk, fps, 
-                           density_history, risk_history, model_accuracy):
-        """60% Video | 40% Pro Metrics + Graphs"""
-        h, w = frame.shape[:2]
-        
-        # LEFT: Enhanced video (60%)
+                           density_history, risk_history, model_accuracy, size=None):
+        """
+        60% Video | 40% Pro Metrics + Graphs (returned canvas is reused on the next call)
+        size: (width, height) of the canvas - pass the final display size so the decoded
+              frame is resized exactly once (default: the frame's own size)
+        """
+        w, h = size if size is not None else (frame.shape[1], frame.shape[0])
+        if self.canvas is None or self.canvas.shape != (h, w, 3):
+            self.canvas = np.empty((h, w, 3), dtype=np.uint8)
+        
+        # LEFT: Enhanced video (60%) - resized straight into the canvas
         video_w = int(w * 0.6)
-        video_panel = cv2.resize(frame, (video_w, h))
+        video_panel = self.canvas[:, :video_w]
+        cv2.resize(frame, (video_w, h), dst=video_panel)
         
         # PRO RISK OVERLAY
         if risk > 0.7:
@@ -37,7 +46,7 @@ class DashboardVisualizer:
         
         # RIGHT: PRO METRICS PANEL (40%)
         metrics_w = w - video_w
-        metrics = np.zeros((h, metrics_w, 3), dtype=np.uint8)
+        metrics = self.canvas[:, video_w:]
         metrics.fill(15)
         
         # HEADER
@@ -68,8 +77,9 @@ class DashboardVisualizer:
         
         # DENSITY GRAPH
         if len(density_history) > 20:
-            x = np.linspace(20, metrics_w-20, len(density_history[-50:]))
-            y = graph_y + 100 - np.array(density_history[-50:]) * 100
+            window = np.asarray(density_history[-50:])
+            x = np.linspace(20, metrics_w-20, len(window))
+            y = graph_y + 100 - window * 100
             points = np.column_stack((x, y)).astype(int)
             cv2.polylines(metrics, [points], False, (0,255,100), 2)
             cv2.putText(metrics, "Density Trend", (25, graph_y-5), 
@@ -78,8 +88,9 @@ class DashboardVisualizer:
         # RISK GRAPH  
         graph_y2 = graph_y + 140
         if len(risk_history) > 20:
-            x = np.linspace(20, metrics_w-20, len(risk_history[-50:]))
-            y = graph_y2 + 100 - np.array(risk_history[-50:]) * 100
+            window = np.asarray(risk_history[-50:])
+            x = np.linspace(20, metrics_w-20, len(window))
+            y = graph_y2 + 100 - window * 100
             points = np.column_stack((x, y)).astype(int)
             cv2.polylines(metrics, [points], False, (255,100,100), 2)
             cv2.putText(metrics, "Risk Trend", (25, graph_y2-5), 
@@ -108,10 +119,9 @@ class DashboardVisualizer:
         cv2.putText(metrics, "Accuracy", (box_x+10, box_y+75),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200,200,200), 1)
         
-        # COMBINE
-        dashboard = np.hstack([video_panel, metrics])
+        # COMBINE (both panels already live in the shared canvas)
         self.frame_count += 1
-        return dashboard
+        return self.canvas
     
     def show_fullscreen(self, dashboard):
         cv2.namedWindow('Crowd Safety AI v2.0', cv2.WND_PROP_FULLSCREEN)